@@ -0,0 +1,28 @@
+PRAGMA foreign_keys = ON;
+
+-- Индексы для as-of выборок DAO.
+-- DAO сравнивает даты как substr(date,1,10) (в БД встречаются значения со временем),
+-- поэтому индексируем то же выражение: SQLite использует индекс по выражению,
+-- только если в запросе оно записано буквально так же.
+-- rowid (id) идёт в индексе последним, поэтому ORDER BY day DESC, id DESC
+-- берётся прямо из индекса, без сортировки.
+CREATE INDEX IF NOT EXISTS idx_metal_analyses_block_day
+  ON metal_analyses(block_id, substr(date,1,10));
+CREATE INDEX IF NOT EXISTS idx_metal_analyses_block_well_day
+  ON metal_analyses(block_id, well_id, substr(date,1,10));
+CREATE INDEX IF NOT EXISTS idx_metal_analyses_well_day
+  ON metal_analyses(well_id, substr(date,1,10));
+CREATE INDEX IF NOT EXISTS idx_block_acidity_block_metric_day
+  ON block_acidity_analyses(block_id, metric_name, substr(date,1,10));
+CREATE INDEX IF NOT EXISTS idx_well_mode_history_well_day
+  ON well_mode_history(well_id, substr(date_from,1,10));
+CREATE INDEX IF NOT EXISTS idx_block_mode_history_block_day
+  ON block_mode_history(block_id, substr(date_from,1,10));
+
+-- Для as-of VIEW (там сравнение по сырому date)
+CREATE INDEX IF NOT EXISTS idx_metal_analyses_block_well_date
+  ON metal_analyses(block_id, well_id, date);
+CREATE INDEX IF NOT EXISTS idx_metal_analyses_well_date
+  ON metal_analyses(well_id, date);
+CREATE INDEX IF NOT EXISTS idx_block_acidity_block_metric_date
+  ON block_acidity_analyses(block_id, metric_name, date);
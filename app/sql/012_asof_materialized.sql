@@ -0,0 +1,687 @@
+PRAGMA foreign_keys = ON;
+
+-- 012_asof_materialized.sql
+-- Материализованные замены as-of VIEW (v_block_acidity_asof, v_block_metal_asof,
+-- v_well_metal_asof, v_well_mode_on_date, v_block_mode_on_date).
+--
+-- Старые VIEW на каждый запрос строили UNION дат из 5–7 таблиц и крест с blocks/wells,
+-- а значение в каждой ячейке считали коррелированным подзапросом.
+-- Теперь:
+--   * asof_dates — какие даты есть в каждой таблице-источнике (ведут триггеры на источниках);
+--   * mv_* — готовая сетка сущность × дата со значением as-of;
+--   * триггеры добавляют/удаляют строки сетки при появлении/исчезновении даты или сущности
+--     и пересчитывают значения только в затронутом диапазоне дат: от изменённой даты
+--     до следующей пробы (для режимов — до следующего открытого интервала);
+--   * сами VIEW стали тонкими SELECT поверх mv_*.
+-- Сравнение дат — как в исходных VIEW (сырой date), чтобы семантика не поменялась.
+-- Скрипт идемпотентен: первичное заполнение выполняется только в пустые таблицы.
+-- В триггерах нет INSERT OR IGNORE/UPSERT: политика конфликтов внешнего оператора
+-- (например, UPSERT в insert_block_acidity) перекрывает их, поэтому дубли отсекаются NOT EXISTS.
+
+CREATE TABLE IF NOT EXISTS asof_dates (
+  date   TEXT NOT NULL,
+  source TEXT NOT NULL,
+  PRIMARY KEY (date, source)
+) WITHOUT ROWID;
+
+-- «осталась ли ещё строка с этой датой» при удалении — нужен индекс, начинающийся с date
+CREATE INDEX IF NOT EXISTS idx_analyses_date          ON analyses(date);
+CREATE INDEX IF NOT EXISTS idx_downtimes_date         ON downtimes(date);
+CREATE INDEX IF NOT EXISTS idx_metal_analyses_date    ON metal_analyses(date);
+CREATE INDEX IF NOT EXISTS idx_block_acidity_metric   ON block_acidity_analyses(metric_name);
+
+CREATE TABLE IF NOT EXISTS mv_block_acidity_asof (
+  metric_name TEXT NOT NULL,
+  block_id    INTEGER NOT NULL,
+  date        TEXT NOT NULL,
+  value_asof  REAL,
+  PRIMARY KEY (metric_name, block_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_mv_block_acidity_asof_date ON mv_block_acidity_asof(date);
+
+CREATE TABLE IF NOT EXISTS mv_block_metal_asof (
+  block_id       INTEGER NOT NULL,
+  date           TEXT NOT NULL,
+  metal_gpl_asof REAL,
+  PRIMARY KEY (block_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_mv_block_metal_asof_date ON mv_block_metal_asof(date);
+
+CREATE TABLE IF NOT EXISTS mv_well_metal_asof (
+  well_id        INTEGER NOT NULL,
+  date           TEXT NOT NULL,
+  metal_gpl_asof REAL,
+  PRIMARY KEY (well_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_mv_well_metal_asof_date ON mv_well_metal_asof(date);
+
+-- mode здесь — только режим из истории; откат на wells.type делает VIEW
+CREATE TABLE IF NOT EXISTS mv_well_mode_on_date (
+  well_id INTEGER NOT NULL,
+  date    TEXT NOT NULL,
+  mode    TEXT,
+  PRIMARY KEY (well_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_mv_well_mode_on_date_date ON mv_well_mode_on_date(date);
+
+CREATE TABLE IF NOT EXISTS mv_block_mode_on_date (
+  block_id INTEGER NOT NULL,
+  date     TEXT NOT NULL,
+  mode     TEXT,
+  PRIMARY KEY (block_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_mv_block_mode_on_date_date ON mv_block_mode_on_date(date);
+
+-- ---------------------------------------------------------------
+-- Первичное заполнение (только если таблицы пустые)
+-- ---------------------------------------------------------------
+INSERT INTO asof_dates(date, source)
+SELECT date, source FROM (
+  SELECT DISTINCT date, 'daily_readings' AS source FROM daily_readings
+  UNION ALL
+  SELECT DISTINCT date, 'acid_levels' AS source FROM acid_levels
+  UNION ALL
+  SELECT DISTINCT date, 'rvr_events' AS source FROM rvr_events
+  UNION ALL
+  SELECT DISTINCT date, 'analyses' AS source FROM analyses
+  UNION ALL
+  SELECT DISTINCT date, 'downtimes' AS source FROM downtimes
+  UNION ALL
+  SELECT DISTINCT date, 'block_acidity_analyses' AS source FROM block_acidity_analyses
+  UNION ALL
+  SELECT DISTINCT date, 'metal_analyses' AS source FROM metal_analyses
+) WHERE NOT EXISTS (SELECT 1 FROM asof_dates);
+
+INSERT INTO mv_block_acidity_asof(metric_name, block_id, date, value_asof)
+SELECT m.metric_name, b.id, d.date,
+  (SELECT a.value FROM block_acidity_analyses a
+     WHERE a.block_id = b.id AND a.metric_name = m.metric_name AND a.date <= d.date
+     ORDER BY a.date DESC, a.id DESC LIMIT 1)
+FROM blocks b
+JOIN (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','analyses','rvr_events','downtimes','block_acidity_analyses','metal_analyses')) d
+JOIN (SELECT DISTINCT metric_name FROM block_acidity_analyses) m
+WHERE NOT EXISTS (SELECT 1 FROM mv_block_acidity_asof);
+
+INSERT INTO mv_block_metal_asof(block_id, date, metal_gpl_asof)
+SELECT b.id, d.date,
+  (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.block_id = b.id AND ma.well_id IS NULL AND ma.date <= d.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+FROM blocks b
+JOIN (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','rvr_events','downtimes','metal_analyses')) d
+WHERE NOT EXISTS (SELECT 1 FROM mv_block_metal_asof);
+
+INSERT INTO mv_well_metal_asof(well_id, date, metal_gpl_asof)
+SELECT w.id, d.date,
+  (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.well_id = w.id AND ma.date <= d.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+FROM wells w
+JOIN (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','rvr_events','metal_analyses')) d
+WHERE NOT EXISTS (SELECT 1 FROM mv_well_metal_asof);
+
+INSERT INTO mv_well_mode_on_date(well_id, date, mode)
+SELECT w.id, d.date,
+  (SELECT h.mode FROM well_mode_history h
+     WHERE h.well_id = w.id AND h.date_from <= d.date AND (h.date_to IS NULL OR d.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+FROM wells w
+JOIN (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','rvr_events','analyses','downtimes')) d
+WHERE NOT EXISTS (SELECT 1 FROM mv_well_mode_on_date);
+
+INSERT INTO mv_block_mode_on_date(block_id, date, mode)
+SELECT b.id, d.date,
+  (SELECT h.mode FROM block_mode_history h
+     WHERE h.block_id = b.id AND h.date_from <= d.date AND (h.date_to IS NULL OR d.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+FROM blocks b
+JOIN (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','rvr_events','analyses','block_acidity_analyses','metal_analyses')) d
+WHERE NOT EXISTS (SELECT 1 FROM mv_block_mode_on_date);
+
+-- ---------------------------------------------------------------
+-- Появление / исчезновение даты: добавить или убрать строки сетки
+-- ---------------------------------------------------------------
+CREATE TRIGGER IF NOT EXISTS trg_asof_dates_ai AFTER INSERT ON asof_dates
+BEGIN
+  INSERT INTO mv_block_acidity_asof(metric_name, block_id, date, value_asof)
+  SELECT m.metric_name, b.id, NEW.date,
+    (SELECT a.value FROM block_acidity_analyses a
+     WHERE a.block_id = b.id AND a.metric_name = m.metric_name AND a.date <= NEW.date
+     ORDER BY a.date DESC, a.id DESC LIMIT 1)
+  FROM blocks b JOIN (SELECT DISTINCT metric_name FROM block_acidity_analyses) m
+  WHERE NEW.source IN ('daily_readings','acid_levels','analyses','rvr_events','downtimes','block_acidity_analyses','metal_analyses')
+    AND NOT EXISTS (SELECT 1 FROM mv_block_acidity_asof x
+                    WHERE x.metric_name = m.metric_name AND x.block_id = b.id AND x.date = NEW.date);
+
+  INSERT INTO mv_block_metal_asof(block_id, date, metal_gpl_asof)
+  SELECT b.id, NEW.date,
+    (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.block_id = b.id AND ma.well_id IS NULL AND ma.date <= NEW.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  FROM blocks b
+  WHERE NEW.source IN ('daily_readings','acid_levels','rvr_events','downtimes','metal_analyses')
+    AND NOT EXISTS (SELECT 1 FROM mv_block_metal_asof x WHERE x.block_id = b.id AND x.date = NEW.date);
+
+  INSERT INTO mv_well_metal_asof(well_id, date, metal_gpl_asof)
+  SELECT w.id, NEW.date,
+    (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.well_id = w.id AND ma.date <= NEW.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  FROM wells w
+  WHERE NEW.source IN ('daily_readings','rvr_events','metal_analyses')
+    AND NOT EXISTS (SELECT 1 FROM mv_well_metal_asof x WHERE x.well_id = w.id AND x.date = NEW.date);
+
+  INSERT INTO mv_well_mode_on_date(well_id, date, mode)
+  SELECT w.id, NEW.date,
+    (SELECT h.mode FROM well_mode_history h
+     WHERE h.well_id = w.id AND h.date_from <= NEW.date AND (h.date_to IS NULL OR NEW.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  FROM wells w
+  WHERE NEW.source IN ('daily_readings','acid_levels','rvr_events','analyses','downtimes')
+    AND NOT EXISTS (SELECT 1 FROM mv_well_mode_on_date x WHERE x.well_id = w.id AND x.date = NEW.date);
+
+  INSERT INTO mv_block_mode_on_date(block_id, date, mode)
+  SELECT b.id, NEW.date,
+    (SELECT h.mode FROM block_mode_history h
+     WHERE h.block_id = b.id AND h.date_from <= NEW.date AND (h.date_to IS NULL OR NEW.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  FROM blocks b
+  WHERE NEW.source IN ('daily_readings','acid_levels','rvr_events','analyses','block_acidity_analyses','metal_analyses')
+    AND NOT EXISTS (SELECT 1 FROM mv_block_mode_on_date x WHERE x.block_id = b.id AND x.date = NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_asof_dates_ad AFTER DELETE ON asof_dates
+BEGIN
+  DELETE FROM mv_block_acidity_asof
+  WHERE date = OLD.date AND OLD.source IN ('daily_readings','acid_levels','analyses','rvr_events','downtimes','block_acidity_analyses','metal_analyses')
+    AND NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = OLD.date AND source IN ('daily_readings','acid_levels','analyses','rvr_events','downtimes','block_acidity_analyses','metal_analyses'));
+  DELETE FROM mv_block_metal_asof
+  WHERE date = OLD.date AND OLD.source IN ('daily_readings','acid_levels','rvr_events','downtimes','metal_analyses')
+    AND NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = OLD.date AND source IN ('daily_readings','acid_levels','rvr_events','downtimes','metal_analyses'));
+  DELETE FROM mv_well_metal_asof
+  WHERE date = OLD.date AND OLD.source IN ('daily_readings','rvr_events','metal_analyses')
+    AND NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = OLD.date AND source IN ('daily_readings','rvr_events','metal_analyses'));
+  DELETE FROM mv_well_mode_on_date
+  WHERE date = OLD.date AND OLD.source IN ('daily_readings','acid_levels','rvr_events','analyses','downtimes')
+    AND NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = OLD.date AND source IN ('daily_readings','acid_levels','rvr_events','analyses','downtimes'));
+  DELETE FROM mv_block_mode_on_date
+  WHERE date = OLD.date AND OLD.source IN ('daily_readings','acid_levels','rvr_events','analyses','block_acidity_analyses','metal_analyses')
+    AND NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = OLD.date AND source IN ('daily_readings','acid_levels','rvr_events','analyses','block_acidity_analyses','metal_analyses'));
+END;
+
+-- ---------------------------------------------------------------
+-- Даты таблиц-источников. Проверка в WHEN дешевле, чем оператор в теле,
+-- поэтому для массовых вставок в daily_readings это почти бесплатно.
+-- ---------------------------------------------------------------
+CREATE TRIGGER IF NOT EXISTS trg_daily_readings_dates_ai AFTER INSERT ON daily_readings
+WHEN NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'daily_readings')
+BEGIN
+  INSERT INTO asof_dates(date, source) VALUES(NEW.date, 'daily_readings');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_readings_dates_ad AFTER DELETE ON daily_readings
+WHEN NOT EXISTS (SELECT 1 FROM daily_readings WHERE date = OLD.date)
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'daily_readings';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_readings_dates_au AFTER UPDATE OF date ON daily_readings
+WHEN OLD.date IS NOT NEW.date
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'daily_readings'
+    AND NOT EXISTS (SELECT 1 FROM daily_readings WHERE date = OLD.date);
+  INSERT INTO asof_dates(date, source) SELECT NEW.date, 'daily_readings'
+  WHERE NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'daily_readings');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_acid_levels_dates_ai AFTER INSERT ON acid_levels
+WHEN NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'acid_levels')
+BEGIN
+  INSERT INTO asof_dates(date, source) VALUES(NEW.date, 'acid_levels');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_acid_levels_dates_ad AFTER DELETE ON acid_levels
+WHEN NOT EXISTS (SELECT 1 FROM acid_levels WHERE date = OLD.date)
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'acid_levels';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_acid_levels_dates_au AFTER UPDATE OF date ON acid_levels
+WHEN OLD.date IS NOT NEW.date
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'acid_levels'
+    AND NOT EXISTS (SELECT 1 FROM acid_levels WHERE date = OLD.date);
+  INSERT INTO asof_dates(date, source) SELECT NEW.date, 'acid_levels'
+  WHERE NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'acid_levels');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rvr_events_dates_ai AFTER INSERT ON rvr_events
+WHEN NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'rvr_events')
+BEGIN
+  INSERT INTO asof_dates(date, source) VALUES(NEW.date, 'rvr_events');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rvr_events_dates_ad AFTER DELETE ON rvr_events
+WHEN NOT EXISTS (SELECT 1 FROM rvr_events WHERE date = OLD.date)
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'rvr_events';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rvr_events_dates_au AFTER UPDATE OF date ON rvr_events
+WHEN OLD.date IS NOT NEW.date
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'rvr_events'
+    AND NOT EXISTS (SELECT 1 FROM rvr_events WHERE date = OLD.date);
+  INSERT INTO asof_dates(date, source) SELECT NEW.date, 'rvr_events'
+  WHERE NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'rvr_events');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analyses_dates_ai AFTER INSERT ON analyses
+WHEN NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'analyses')
+BEGIN
+  INSERT INTO asof_dates(date, source) VALUES(NEW.date, 'analyses');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analyses_dates_ad AFTER DELETE ON analyses
+WHEN NOT EXISTS (SELECT 1 FROM analyses WHERE date = OLD.date)
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'analyses';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analyses_dates_au AFTER UPDATE OF date ON analyses
+WHEN OLD.date IS NOT NEW.date
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'analyses'
+    AND NOT EXISTS (SELECT 1 FROM analyses WHERE date = OLD.date);
+  INSERT INTO asof_dates(date, source) SELECT NEW.date, 'analyses'
+  WHERE NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'analyses');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_downtimes_dates_ai AFTER INSERT ON downtimes
+WHEN NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'downtimes')
+BEGIN
+  INSERT INTO asof_dates(date, source) VALUES(NEW.date, 'downtimes');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_downtimes_dates_ad AFTER DELETE ON downtimes
+WHEN NOT EXISTS (SELECT 1 FROM downtimes WHERE date = OLD.date)
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'downtimes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_downtimes_dates_au AFTER UPDATE OF date ON downtimes
+WHEN OLD.date IS NOT NEW.date
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'downtimes'
+    AND NOT EXISTS (SELECT 1 FROM downtimes WHERE date = OLD.date);
+  INSERT INTO asof_dates(date, source) SELECT NEW.date, 'downtimes'
+  WHERE NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'downtimes');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_analyses_dates_ai AFTER INSERT ON block_acidity_analyses
+WHEN NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'block_acidity_analyses')
+BEGIN
+  INSERT INTO asof_dates(date, source) VALUES(NEW.date, 'block_acidity_analyses');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_analyses_dates_ad AFTER DELETE ON block_acidity_analyses
+WHEN NOT EXISTS (SELECT 1 FROM block_acidity_analyses WHERE date = OLD.date)
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'block_acidity_analyses';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_analyses_dates_au AFTER UPDATE OF date ON block_acidity_analyses
+WHEN OLD.date IS NOT NEW.date
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'block_acidity_analyses'
+    AND NOT EXISTS (SELECT 1 FROM block_acidity_analyses WHERE date = OLD.date);
+  INSERT INTO asof_dates(date, source) SELECT NEW.date, 'block_acidity_analyses'
+  WHERE NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'block_acidity_analyses');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_metal_analyses_dates_ai AFTER INSERT ON metal_analyses
+WHEN NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'metal_analyses')
+BEGIN
+  INSERT INTO asof_dates(date, source) VALUES(NEW.date, 'metal_analyses');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_metal_analyses_dates_ad AFTER DELETE ON metal_analyses
+WHEN NOT EXISTS (SELECT 1 FROM metal_analyses WHERE date = OLD.date)
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'metal_analyses';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_metal_analyses_dates_au AFTER UPDATE OF date ON metal_analyses
+WHEN OLD.date IS NOT NEW.date
+BEGIN
+  DELETE FROM asof_dates WHERE date = OLD.date AND source = 'metal_analyses'
+    AND NOT EXISTS (SELECT 1 FROM metal_analyses WHERE date = OLD.date);
+  INSERT INTO asof_dates(date, source) SELECT NEW.date, 'metal_analyses'
+  WHERE NOT EXISTS (SELECT 1 FROM asof_dates WHERE date = NEW.date AND source = 'metal_analyses');
+END;
+
+-- ---------------------------------------------------------------
+-- Значения анализов: пересчёт от даты пробы до следующей пробы
+-- ---------------------------------------------------------------
+-- Новая метрика кислотности → строки сетки по всем блокам и датам
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_metric_ai AFTER INSERT ON block_acidity_analyses
+WHEN NOT EXISTS (SELECT 1 FROM block_acidity_analyses WHERE metric_name = NEW.metric_name AND id <> NEW.id)
+BEGIN
+  INSERT INTO mv_block_acidity_asof(metric_name, block_id, date, value_asof)
+  SELECT NEW.metric_name, b.id, d.date,
+    (SELECT a.value FROM block_acidity_analyses a
+     WHERE a.block_id = b.id AND a.metric_name = NEW.metric_name AND a.date <= d.date
+     ORDER BY a.date DESC, a.id DESC LIMIT 1)
+  FROM blocks b JOIN (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','analyses','rvr_events','downtimes','block_acidity_analyses','metal_analyses')) d
+  WHERE NOT EXISTS (SELECT 1 FROM mv_block_acidity_asof x
+                    WHERE x.metric_name = NEW.metric_name AND x.block_id = b.id AND x.date = d.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_metric_ad AFTER DELETE ON block_acidity_analyses
+WHEN NOT EXISTS (SELECT 1 FROM block_acidity_analyses WHERE metric_name = OLD.metric_name)
+BEGIN
+  DELETE FROM mv_block_acidity_asof WHERE metric_name = OLD.metric_name;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_metric_au AFTER UPDATE OF metric_name ON block_acidity_analyses
+WHEN OLD.metric_name IS NOT NEW.metric_name
+BEGIN
+  DELETE FROM mv_block_acidity_asof WHERE metric_name = OLD.metric_name
+    AND NOT EXISTS (SELECT 1 FROM block_acidity_analyses WHERE metric_name = OLD.metric_name);
+  INSERT INTO mv_block_acidity_asof(metric_name, block_id, date, value_asof)
+  SELECT NEW.metric_name, b.id, d.date,
+    (SELECT a.value FROM block_acidity_analyses a
+     WHERE a.block_id = b.id AND a.metric_name = NEW.metric_name AND a.date <= d.date
+     ORDER BY a.date DESC, a.id DESC LIMIT 1)
+  FROM blocks b JOIN (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','analyses','rvr_events','downtimes','block_acidity_analyses','metal_analyses')) d
+  WHERE NOT EXISTS (SELECT 1 FROM mv_block_acidity_asof x
+                    WHERE x.metric_name = NEW.metric_name AND x.block_id = b.id AND x.date = d.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_asof_ai AFTER INSERT ON block_acidity_analyses
+BEGIN
+  UPDATE mv_block_acidity_asof
+  SET value_asof = (SELECT a.value FROM block_acidity_analyses a
+     WHERE a.block_id = mv_block_acidity_asof.block_id AND a.metric_name = mv_block_acidity_asof.metric_name AND a.date <= mv_block_acidity_asof.date
+     ORDER BY a.date DESC, a.id DESC LIMIT 1)
+  WHERE metric_name = NEW.metric_name AND block_id = NEW.block_id AND date >= NEW.date
+    AND date < COALESCE((SELECT MIN(a.date) FROM block_acidity_analyses a
+                         WHERE a.block_id = NEW.block_id AND a.metric_name = NEW.metric_name
+                           AND a.date > NEW.date), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_asof_ad AFTER DELETE ON block_acidity_analyses
+BEGIN
+  UPDATE mv_block_acidity_asof
+  SET value_asof = (SELECT a.value FROM block_acidity_analyses a
+     WHERE a.block_id = mv_block_acidity_asof.block_id AND a.metric_name = mv_block_acidity_asof.metric_name AND a.date <= mv_block_acidity_asof.date
+     ORDER BY a.date DESC, a.id DESC LIMIT 1)
+  WHERE metric_name = OLD.metric_name AND block_id = OLD.block_id AND date >= OLD.date
+    AND date < COALESCE((SELECT MIN(a.date) FROM block_acidity_analyses a
+                         WHERE a.block_id = OLD.block_id AND a.metric_name = OLD.metric_name
+                           AND a.date > OLD.date), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_acidity_asof_au AFTER UPDATE ON block_acidity_analyses
+BEGIN
+  UPDATE mv_block_acidity_asof
+  SET value_asof = (SELECT a.value FROM block_acidity_analyses a
+     WHERE a.block_id = mv_block_acidity_asof.block_id AND a.metric_name = mv_block_acidity_asof.metric_name AND a.date <= mv_block_acidity_asof.date
+     ORDER BY a.date DESC, a.id DESC LIMIT 1)
+  WHERE metric_name = OLD.metric_name AND block_id = OLD.block_id AND date >= OLD.date
+    AND date < COALESCE((SELECT MIN(a.date) FROM block_acidity_analyses a
+                         WHERE a.block_id = OLD.block_id AND a.metric_name = OLD.metric_name
+                           AND a.date > OLD.date), '9999-12-31');
+  UPDATE mv_block_acidity_asof
+  SET value_asof = (SELECT a.value FROM block_acidity_analyses a
+     WHERE a.block_id = mv_block_acidity_asof.block_id AND a.metric_name = mv_block_acidity_asof.metric_name AND a.date <= mv_block_acidity_asof.date
+     ORDER BY a.date DESC, a.id DESC LIMIT 1)
+  WHERE metric_name = NEW.metric_name AND block_id = NEW.block_id AND date >= NEW.date
+    AND date < COALESCE((SELECT MIN(a.date) FROM block_acidity_analyses a
+                         WHERE a.block_id = NEW.block_id AND a.metric_name = NEW.metric_name
+                           AND a.date > NEW.date), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_metal_analyses_asof_ai AFTER INSERT ON metal_analyses
+BEGIN
+  UPDATE mv_block_metal_asof
+  SET metal_gpl_asof = (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.block_id = mv_block_metal_asof.block_id AND ma.well_id IS NULL AND ma.date <= mv_block_metal_asof.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  WHERE NEW.well_id IS NULL AND block_id = NEW.block_id AND date >= NEW.date
+    AND date < COALESCE((SELECT MIN(ma.date) FROM metal_analyses ma
+                         WHERE ma.block_id = NEW.block_id AND ma.well_id IS NULL
+                           AND ma.date > NEW.date), '9999-12-31');
+
+  UPDATE mv_well_metal_asof
+  SET metal_gpl_asof = (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.well_id = mv_well_metal_asof.well_id AND ma.date <= mv_well_metal_asof.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  WHERE well_id = NEW.well_id AND date >= NEW.date
+    AND date < COALESCE((SELECT MIN(ma.date) FROM metal_analyses ma
+                         WHERE ma.well_id = NEW.well_id AND ma.date > NEW.date), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_metal_analyses_asof_ad AFTER DELETE ON metal_analyses
+BEGIN
+  UPDATE mv_block_metal_asof
+  SET metal_gpl_asof = (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.block_id = mv_block_metal_asof.block_id AND ma.well_id IS NULL AND ma.date <= mv_block_metal_asof.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  WHERE OLD.well_id IS NULL AND block_id = OLD.block_id AND date >= OLD.date
+    AND date < COALESCE((SELECT MIN(ma.date) FROM metal_analyses ma
+                         WHERE ma.block_id = OLD.block_id AND ma.well_id IS NULL
+                           AND ma.date > OLD.date), '9999-12-31');
+
+  UPDATE mv_well_metal_asof
+  SET metal_gpl_asof = (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.well_id = mv_well_metal_asof.well_id AND ma.date <= mv_well_metal_asof.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  WHERE well_id = OLD.well_id AND date >= OLD.date
+    AND date < COALESCE((SELECT MIN(ma.date) FROM metal_analyses ma
+                         WHERE ma.well_id = OLD.well_id AND ma.date > OLD.date), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_metal_analyses_asof_au AFTER UPDATE ON metal_analyses
+BEGIN
+  UPDATE mv_block_metal_asof
+  SET metal_gpl_asof = (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.block_id = mv_block_metal_asof.block_id AND ma.well_id IS NULL AND ma.date <= mv_block_metal_asof.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  WHERE OLD.well_id IS NULL AND block_id = OLD.block_id AND date >= OLD.date
+    AND date < COALESCE((SELECT MIN(ma.date) FROM metal_analyses ma
+                         WHERE ma.block_id = OLD.block_id AND ma.well_id IS NULL
+                           AND ma.date > OLD.date), '9999-12-31');
+
+  UPDATE mv_well_metal_asof
+  SET metal_gpl_asof = (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.well_id = mv_well_metal_asof.well_id AND ma.date <= mv_well_metal_asof.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  WHERE well_id = OLD.well_id AND date >= OLD.date
+    AND date < COALESCE((SELECT MIN(ma.date) FROM metal_analyses ma
+                         WHERE ma.well_id = OLD.well_id AND ma.date > OLD.date), '9999-12-31');
+  UPDATE mv_block_metal_asof
+  SET metal_gpl_asof = (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.block_id = mv_block_metal_asof.block_id AND ma.well_id IS NULL AND ma.date <= mv_block_metal_asof.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  WHERE NEW.well_id IS NULL AND block_id = NEW.block_id AND date >= NEW.date
+    AND date < COALESCE((SELECT MIN(ma.date) FROM metal_analyses ma
+                         WHERE ma.block_id = NEW.block_id AND ma.well_id IS NULL
+                           AND ma.date > NEW.date), '9999-12-31');
+
+  UPDATE mv_well_metal_asof
+  SET metal_gpl_asof = (SELECT ma.metal_gpl FROM metal_analyses ma
+     WHERE ma.well_id = mv_well_metal_asof.well_id AND ma.date <= mv_well_metal_asof.date
+     ORDER BY ma.date DESC, ma.id DESC LIMIT 1)
+  WHERE well_id = NEW.well_id AND date >= NEW.date
+    AND date < COALESCE((SELECT MIN(ma.date) FROM metal_analyses ma
+                         WHERE ma.well_id = NEW.well_id AND ma.date > NEW.date), '9999-12-31');
+END;
+
+-- ---------------------------------------------------------------
+-- История режимов: пересчёт в пределах интервала
+-- (после следующего открытого интервала новый интервал уже не может победить)
+-- ---------------------------------------------------------------
+CREATE TRIGGER IF NOT EXISTS trg_well_mode_history_asof_ai AFTER INSERT ON well_mode_history
+BEGIN
+  UPDATE mv_well_mode_on_date
+  SET mode = (SELECT h.mode FROM well_mode_history h
+     WHERE h.well_id = mv_well_mode_on_date.well_id AND h.date_from <= mv_well_mode_on_date.date AND (h.date_to IS NULL OR mv_well_mode_on_date.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  WHERE well_id = NEW.well_id AND date >= NEW.date_from
+    AND (NEW.date_to IS NULL OR date <= NEW.date_to)
+    AND date < COALESCE((SELECT MIN(h.date_from) FROM well_mode_history h
+                         WHERE h.well_id = NEW.well_id AND h.date_from > NEW.date_from
+                           AND h.date_to IS NULL), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_well_mode_history_asof_ad AFTER DELETE ON well_mode_history
+BEGIN
+  UPDATE mv_well_mode_on_date
+  SET mode = (SELECT h.mode FROM well_mode_history h
+     WHERE h.well_id = mv_well_mode_on_date.well_id AND h.date_from <= mv_well_mode_on_date.date AND (h.date_to IS NULL OR mv_well_mode_on_date.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  WHERE well_id = OLD.well_id AND date >= OLD.date_from
+    AND (OLD.date_to IS NULL OR date <= OLD.date_to)
+    AND date < COALESCE((SELECT MIN(h.date_from) FROM well_mode_history h
+                         WHERE h.well_id = OLD.well_id AND h.date_from > OLD.date_from
+                           AND h.date_to IS NULL), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_well_mode_history_asof_au AFTER UPDATE ON well_mode_history
+BEGIN
+  UPDATE mv_well_mode_on_date
+  SET mode = (SELECT h.mode FROM well_mode_history h
+     WHERE h.well_id = mv_well_mode_on_date.well_id AND h.date_from <= mv_well_mode_on_date.date AND (h.date_to IS NULL OR mv_well_mode_on_date.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  WHERE well_id = OLD.well_id AND date >= OLD.date_from
+    AND (OLD.date_to IS NULL OR date <= OLD.date_to)
+    AND date < COALESCE((SELECT MIN(h.date_from) FROM well_mode_history h
+                         WHERE h.well_id = OLD.well_id AND h.date_from > OLD.date_from
+                           AND h.date_to IS NULL), '9999-12-31');
+  UPDATE mv_well_mode_on_date
+  SET mode = (SELECT h.mode FROM well_mode_history h
+     WHERE h.well_id = mv_well_mode_on_date.well_id AND h.date_from <= mv_well_mode_on_date.date AND (h.date_to IS NULL OR mv_well_mode_on_date.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  WHERE well_id = NEW.well_id AND date >= NEW.date_from
+    AND (NEW.date_to IS NULL OR date <= NEW.date_to)
+    AND date < COALESCE((SELECT MIN(h.date_from) FROM well_mode_history h
+                         WHERE h.well_id = NEW.well_id AND h.date_from > NEW.date_from
+                           AND h.date_to IS NULL), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_mode_history_asof_ai AFTER INSERT ON block_mode_history
+BEGIN
+  UPDATE mv_block_mode_on_date
+  SET mode = (SELECT h.mode FROM block_mode_history h
+     WHERE h.block_id = mv_block_mode_on_date.block_id AND h.date_from <= mv_block_mode_on_date.date AND (h.date_to IS NULL OR mv_block_mode_on_date.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  WHERE block_id = NEW.block_id AND date >= NEW.date_from
+    AND (NEW.date_to IS NULL OR date <= NEW.date_to)
+    AND date < COALESCE((SELECT MIN(h.date_from) FROM block_mode_history h
+                         WHERE h.block_id = NEW.block_id AND h.date_from > NEW.date_from
+                           AND h.date_to IS NULL), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_mode_history_asof_ad AFTER DELETE ON block_mode_history
+BEGIN
+  UPDATE mv_block_mode_on_date
+  SET mode = (SELECT h.mode FROM block_mode_history h
+     WHERE h.block_id = mv_block_mode_on_date.block_id AND h.date_from <= mv_block_mode_on_date.date AND (h.date_to IS NULL OR mv_block_mode_on_date.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  WHERE block_id = OLD.block_id AND date >= OLD.date_from
+    AND (OLD.date_to IS NULL OR date <= OLD.date_to)
+    AND date < COALESCE((SELECT MIN(h.date_from) FROM block_mode_history h
+                         WHERE h.block_id = OLD.block_id AND h.date_from > OLD.date_from
+                           AND h.date_to IS NULL), '9999-12-31');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_block_mode_history_asof_au AFTER UPDATE ON block_mode_history
+BEGIN
+  UPDATE mv_block_mode_on_date
+  SET mode = (SELECT h.mode FROM block_mode_history h
+     WHERE h.block_id = mv_block_mode_on_date.block_id AND h.date_from <= mv_block_mode_on_date.date AND (h.date_to IS NULL OR mv_block_mode_on_date.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  WHERE block_id = OLD.block_id AND date >= OLD.date_from
+    AND (OLD.date_to IS NULL OR date <= OLD.date_to)
+    AND date < COALESCE((SELECT MIN(h.date_from) FROM block_mode_history h
+                         WHERE h.block_id = OLD.block_id AND h.date_from > OLD.date_from
+                           AND h.date_to IS NULL), '9999-12-31');
+  UPDATE mv_block_mode_on_date
+  SET mode = (SELECT h.mode FROM block_mode_history h
+     WHERE h.block_id = mv_block_mode_on_date.block_id AND h.date_from <= mv_block_mode_on_date.date AND (h.date_to IS NULL OR mv_block_mode_on_date.date <= h.date_to)
+     ORDER BY h.date_from DESC LIMIT 1)
+  WHERE block_id = NEW.block_id AND date >= NEW.date_from
+    AND (NEW.date_to IS NULL OR date <= NEW.date_to)
+    AND date < COALESCE((SELECT MIN(h.date_from) FROM block_mode_history h
+                         WHERE h.block_id = NEW.block_id AND h.date_from > NEW.date_from
+                           AND h.date_to IS NULL), '9999-12-31');
+END;
+
+-- ---------------------------------------------------------------
+-- Новые / удалённые блоки и скважины (у новой сущности ещё нет анализов и истории)
+-- ---------------------------------------------------------------
+CREATE TRIGGER IF NOT EXISTS trg_blocks_asof_ai AFTER INSERT ON blocks
+BEGIN
+  INSERT INTO mv_block_acidity_asof(metric_name, block_id, date, value_asof)
+  SELECT m.metric_name, NEW.id, d.date, NULL
+  FROM (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','analyses','rvr_events','downtimes','block_acidity_analyses','metal_analyses')) d JOIN (SELECT DISTINCT metric_name FROM block_acidity_analyses) m;
+
+  INSERT INTO mv_block_metal_asof(block_id, date, metal_gpl_asof)
+  SELECT NEW.id, d.date, NULL FROM (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','rvr_events','downtimes','metal_analyses')) d;
+
+  INSERT INTO mv_block_mode_on_date(block_id, date, mode)
+  SELECT NEW.id, d.date, NULL FROM (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','rvr_events','analyses','block_acidity_analyses','metal_analyses')) d;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blocks_asof_ad AFTER DELETE ON blocks
+BEGIN
+  DELETE FROM mv_block_acidity_asof WHERE block_id = OLD.id;
+  DELETE FROM mv_block_metal_asof   WHERE block_id = OLD.id;
+  DELETE FROM mv_block_mode_on_date WHERE block_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_wells_asof_ai AFTER INSERT ON wells
+BEGIN
+  INSERT INTO mv_well_metal_asof(well_id, date, metal_gpl_asof)
+  SELECT NEW.id, d.date, NULL FROM (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','rvr_events','metal_analyses')) d;
+
+  INSERT INTO mv_well_mode_on_date(well_id, date, mode)
+  SELECT NEW.id, d.date, NULL FROM (SELECT DISTINCT date FROM asof_dates WHERE source IN ('daily_readings','acid_levels','rvr_events','analyses','downtimes')) d;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_wells_asof_ad AFTER DELETE ON wells
+BEGIN
+  DELETE FROM mv_well_metal_asof   WHERE well_id = OLD.id;
+  DELETE FROM mv_well_mode_on_date WHERE well_id = OLD.id;
+END;
+
+-- ---------------------------------------------------------------
+-- VIEW — тонкие SELECT поверх материализованных таблиц (колонки как раньше)
+-- ---------------------------------------------------------------
+DROP VIEW IF EXISTS v_block_acidity_asof;
+CREATE VIEW v_block_acidity_asof AS
+SELECT date, block_id, metric_name, value_asof
+FROM mv_block_acidity_asof;
+
+DROP VIEW IF EXISTS v_block_metal_asof;
+CREATE VIEW v_block_metal_asof AS
+SELECT date, block_id, metal_gpl_asof
+FROM mv_block_metal_asof;
+
+DROP VIEW IF EXISTS v_well_metal_asof;
+CREATE VIEW v_well_metal_asof AS
+SELECT m.date, m.well_id, w.block_id, m.metal_gpl_asof
+FROM mv_well_metal_asof m
+JOIN wells w ON w.id = m.well_id;
+
+DROP VIEW IF EXISTS v_well_mode_on_date;
+CREATE VIEW v_well_mode_on_date AS
+SELECT m.well_id, m.date, COALESCE(m.mode, w.type) AS mode
+FROM mv_well_mode_on_date m
+JOIN wells w ON w.id = m.well_id;
+
+DROP VIEW IF EXISTS v_block_mode_on_date;
+CREATE VIEW v_block_mode_on_date AS
+SELECT block_id, date, mode
+FROM mv_block_mode_on_date;
@@ -0,0 +1,52 @@
+PRAGMA foreign_keys = ON;
+
+-- 013_daily_block_summary.sql
+-- Материализованная сводка по блоку за сутки (те же колонки, что у v_daily_block_summary).
+-- v_daily_block_summary агрегирует весь daily_readings на каждый запрос; таблица
+-- обновляется триггерами: при любой правке строки пересчитывается только её группа
+-- (date, block_id) — это десятки строк по индексу, а чтение сводки — поиск по PK.
+-- Сама v_daily_block_summary остаётся «живым» определением для сверки
+-- (python core/db/consistency.py).
+
+CREATE TABLE IF NOT EXISTS mv_daily_block_summary (
+  date             TEXT NOT NULL,
+  block_id         INTEGER NOT NULL,
+  wells_count      INTEGER NOT NULL,
+  pr_m3            REAL,
+  pr_hours         REAL,
+  pr_rate_m3ph     REAL,
+  vr_m3            REAL,
+  vr_hours         REAL,
+  injectivity_m3ph REAL,
+  pr_downtime_h    REAL,
+  vr_downtime_h    REAL,
+  PRIMARY KEY (date, block_id)
+) WITHOUT ROWID;
+
+INSERT INTO mv_daily_block_summary
+SELECT * FROM v_daily_block_summary
+WHERE NOT EXISTS (SELECT 1 FROM mv_daily_block_summary);
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_readings_summary_ai AFTER INSERT ON daily_readings
+BEGIN
+  DELETE FROM mv_daily_block_summary WHERE date = NEW.date AND block_id = NEW.block_id;
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = NEW.date AND block_id = NEW.block_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_readings_summary_ad AFTER DELETE ON daily_readings
+BEGIN
+  DELETE FROM mv_daily_block_summary WHERE date = OLD.date AND block_id = OLD.block_id;
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = OLD.date AND block_id = OLD.block_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_readings_summary_au AFTER UPDATE ON daily_readings
+BEGIN
+  DELETE FROM mv_daily_block_summary WHERE date = OLD.date AND block_id = OLD.block_id;
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = OLD.date AND block_id = OLD.block_id;
+  DELETE FROM mv_daily_block_summary WHERE date = NEW.date AND block_id = NEW.block_id;
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = NEW.date AND block_id = NEW.block_id;
+END;
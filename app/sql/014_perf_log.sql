@@ -0,0 +1,16 @@
+PRAGMA foreign_keys = ON;
+
+-- Периодические снимки статистики запросов DAO (Database.dump_perf_log / start_perf_log).
+CREATE TABLE IF NOT EXISTS perf_log (
+  id         INTEGER PRIMARY KEY AUTOINCREMENT,
+  ts         TEXT NOT NULL DEFAULT (datetime('now')),
+  template   TEXT NOT NULL,
+  count      INTEGER NOT NULL,
+  total_ms   REAL NOT NULL,
+  avg_ms     REAL NOT NULL,
+  p95_ms     REAL NOT NULL,
+  max_ms     REAL NOT NULL,
+  rows       INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_perf_log_ts ON perf_log(ts);
@@ -0,0 +1,84 @@
+PRAGMA foreign_keys = ON;
+
+-- 015_acid_reconciliation.sql
+-- Сверка склада кислоты с распределением по блокам (Database.reconcile_acid).
+-- v_acid_reconciliation группирует весь acid_levels/acid_distribution на каждый запрос;
+-- здесь результаты хранятся по дням, бакам и блокам вместе с нарастающим итогом,
+-- так что выборки за месяц/год читают сотни строк по PK.
+-- Расход склада считается как в compute_acid_distribution_range:
+--   begin + receipts + transfers_in - transfers_out + adjustments - end.
+-- Знак расхождения везде один: delta/imbalance > 0 — распределено меньше, чем израсходовано.
+
+INSERT INTO settings(key, value) VALUES
+  ('acid_recon.tolerance_t', '0.5'),    -- допуск суточного расхождения, т
+  ('acid_recon.tolerance_pct', '2'),    -- … или % от суточного расхода склада (берётся больший)
+  ('acid_recon.drift_t', '5')           -- порог нарастающего расхождения, т
+ON CONFLICT(key) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS acid_recon_daily (
+  date                     TEXT PRIMARY KEY,
+  warehouse_consumption_t  REAL NOT NULL,
+  distributed_t            REAL NOT NULL,
+  delta_t                  REAL NOT NULL,
+  cum_delta_t              REAL NOT NULL DEFAULT 0,
+  tolerance_t              REAL NOT NULL,
+  over_tolerance           INTEGER NOT NULL DEFAULT 0 CHECK (over_tolerance IN (0,1)),
+  drift                    INTEGER NOT NULL DEFAULT 0 CHECK (drift IN (0,1)),
+  computed_at              TEXT NOT NULL DEFAULT (datetime('now'))
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_acid_recon_daily_flags
+  ON acid_recon_daily(date) WHERE over_tolerance = 1 OR drift = 1;
+
+-- доля суточного расхождения на бак — пропорционально расходу бака
+CREATE TABLE IF NOT EXISTS acid_recon_tank (
+  date             TEXT NOT NULL,
+  tank_id          INTEGER NOT NULL REFERENCES acid_tanks(id) ON UPDATE CASCADE ON DELETE CASCADE,
+  consumption_t    REAL NOT NULL,
+  imbalance_t      REAL NOT NULL,
+  cum_imbalance_t  REAL NOT NULL DEFAULT 0,
+  PRIMARY KEY (date, tank_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_acid_recon_tank_tank_date ON acid_recon_tank(tank_id, date);
+
+-- блок: ожидаемое по VR-share (расход склада × доля VR блока) против фактически распределённого
+CREATE TABLE IF NOT EXISTS acid_recon_block (
+  date             TEXT NOT NULL,
+  block_id         INTEGER NOT NULL REFERENCES blocks(id) ON UPDATE CASCADE ON DELETE CASCADE,
+  expected_t       REAL NOT NULL,
+  distributed_t    REAL NOT NULL,
+  imbalance_t      REAL NOT NULL,
+  cum_imbalance_t  REAL NOT NULL DEFAULT 0,
+  PRIMARY KEY (date, block_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_acid_recon_block_block_date ON acid_recon_block(block_id, date);
+
+-- Сводки за месяц и год; cum_delta_t — нарастающий итог на последний день периода
+-- (голая колонка рядом с MAX(date) в SQLite берётся из строки максимума).
+CREATE VIEW IF NOT EXISTS v_acid_recon_monthly AS
+SELECT substr(date,1,7) AS period,
+       COUNT(*) AS days,
+       SUM(warehouse_consumption_t) AS warehouse_consumption_t,
+       SUM(distributed_t) AS distributed_t,
+       SUM(delta_t) AS delta_t,
+       SUM(over_tolerance) AS over_tolerance_days,
+       SUM(drift) AS drift_days,
+       MAX(date) AS last_date,
+       cum_delta_t
+FROM acid_recon_daily
+GROUP BY substr(date,1,7);
+
+CREATE VIEW IF NOT EXISTS v_acid_recon_yearly AS
+SELECT substr(date,1,4) AS period,
+       COUNT(*) AS days,
+       SUM(warehouse_consumption_t) AS warehouse_consumption_t,
+       SUM(distributed_t) AS distributed_t,
+       SUM(delta_t) AS delta_t,
+       SUM(over_tolerance) AS over_tolerance_days,
+       SUM(drift) AS drift_days,
+       MAX(date) AS last_date,
+       cum_delta_t
+FROM acid_recon_daily
+GROUP BY substr(date,1,4);
@@ -0,0 +1,41 @@
+PRAGMA foreign_keys = ON;
+
+-- 016_reading_validation.sql
+-- Проверка суточных показаний (Database.validate_daily_readings, core/db/validation.py).
+-- Найденные нарушения хранятся по строке и правилу; строки без нарушений
+-- переводятся draft → validated одним UPDATE.
+
+INSERT INTO settings(key, value) VALUES
+  ('validation.outlier.window_days', '14'),   -- окно скользящей медианы по скважине, дней
+  ('validation.outlier.factor', '3'),         -- выброс: ставка > factor × медиана или < медиана / factor
+  ('validation.outlier.min_points', '5')      -- меньше точек в окне — выбросы не ищем
+ON CONFLICT(key) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS daily_reading_issues (
+  reading_id   INTEGER NOT NULL REFERENCES daily_readings(id) ON UPDATE CASCADE ON DELETE CASCADE,
+  rule         TEXT NOT NULL,
+  date         TEXT NOT NULL,
+  well_id      INTEGER NOT NULL,
+  detail       TEXT,
+  value        REAL,
+  limit_value  REAL,
+  created_at   TEXT NOT NULL DEFAULT (datetime('now')),
+  PRIMARY KEY (reading_id, rule)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_daily_reading_issues_date ON daily_reading_issues(date, well_id);
+
+-- Сводка блока зависит только от числовых колонок: смена status/comment
+-- (массовое продвижение по статусам) больше не пересчитывает mv_daily_block_summary.
+DROP TRIGGER IF EXISTS trg_daily_readings_summary_au;
+CREATE TRIGGER trg_daily_readings_summary_au
+AFTER UPDATE OF date, block_id, well_id, pr_counter_prev_eff, pr_counter_curr, pr_hours, pr_downtime_h,
+                vr_volume_m3, vr_hours, vr_downtime_h ON daily_readings
+BEGIN
+  DELETE FROM mv_daily_block_summary WHERE date = OLD.date AND block_id = OLD.block_id;
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = OLD.date AND block_id = OLD.block_id;
+  DELETE FROM mv_daily_block_summary WHERE date = NEW.date AND block_id = NEW.block_id;
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = NEW.date AND block_id = NEW.block_id;
+END;
@@ -0,0 +1,23 @@
+PRAGMA foreign_keys = ON;
+
+-- 017_pr_counter_events.sql
+-- События счётчика PR, разрывающие непрерывность показаний (Database.add_pr_counter_event).
+-- pr_counter_prev_eff первой строки после события выводится из события, а не из
+-- предыдущего показания (Database.repair_pr_counters / derive_prev=True):
+--   replacement — новый счётчик, prev_eff = new_start (показание при установке);
+--   rollover    — переполнение разрядности, prev_eff = 0; остаток старого круга
+--                 (capacity − последнее показание) сохраняется в carry_m3,
+--                 т.к. prev_eff по схеме не может быть отрицательным.
+
+CREATE TABLE IF NOT EXISTS pr_counter_events (
+  id         INTEGER PRIMARY KEY AUTOINCREMENT,
+  well_id    INTEGER NOT NULL REFERENCES wells(id) ON UPDATE CASCADE ON DELETE CASCADE,
+  date       TEXT NOT NULL,
+  kind       TEXT NOT NULL CHECK (kind IN ('replacement','rollover')),
+  new_start  REAL NOT NULL DEFAULT 0 CHECK (new_start >= 0),
+  capacity   REAL CHECK (capacity IS NULL OR capacity > 0),
+  carry_m3   REAL,
+  note       TEXT,
+  created_at TEXT NOT NULL DEFAULT (datetime('now')),
+  UNIQUE(well_id, date)
+);
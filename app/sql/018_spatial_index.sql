@@ -0,0 +1,59 @@
+PRAGMA foreign_keys = ON;
+
+-- 018_spatial_index.sql
+-- Пространственный индекс (R-tree) скважин и контуров блоков:
+-- Database.block_at / wells_within / nearest_wells.
+-- R-tree хранит float32 с округлением границ наружу, поэтому он только отбирает
+-- кандидатов; точная проверка — по coord_x/coord_y и по разобранному WKT (core/db/geometry.py).
+
+-- Скважина — вырожденный прямоугольник в точке (coord_x, coord_y); id = wells.id.
+CREATE VIRTUAL TABLE IF NOT EXISTS wells_rtree USING rtree(id, min_x, max_x, min_y, max_y);
+
+DROP TRIGGER IF EXISTS trg_wells_rtree_ai;
+CREATE TRIGGER trg_wells_rtree_ai
+AFTER INSERT ON wells
+WHEN NEW.coord_x IS NOT NULL AND NEW.coord_y IS NOT NULL
+BEGIN
+  INSERT INTO wells_rtree(id, min_x, max_x, min_y, max_y)
+  VALUES (NEW.id, NEW.coord_x, NEW.coord_x, NEW.coord_y, NEW.coord_y);
+END;
+
+DROP TRIGGER IF EXISTS trg_wells_rtree_au;
+CREATE TRIGGER trg_wells_rtree_au
+AFTER UPDATE OF id, coord_x, coord_y ON wells
+BEGIN
+  DELETE FROM wells_rtree WHERE id = OLD.id;
+  INSERT INTO wells_rtree(id, min_x, max_x, min_y, max_y)
+  SELECT NEW.id, NEW.coord_x, NEW.coord_x, NEW.coord_y, NEW.coord_y
+  WHERE NEW.coord_x IS NOT NULL AND NEW.coord_y IS NOT NULL;
+END;
+
+DROP TRIGGER IF EXISTS trg_wells_rtree_ad;
+CREATE TRIGGER trg_wells_rtree_ad
+AFTER DELETE ON wells
+BEGIN
+  DELETE FROM wells_rtree WHERE id = OLD.id;
+END;
+
+INSERT OR REPLACE INTO wells_rtree(id, min_x, max_x, min_y, max_y)
+SELECT id, coord_x, coord_x, coord_y, coord_y FROM wells
+WHERE coord_x IS NOT NULL AND coord_y IS NOT NULL;
+
+-- Контур блока — габарит разобранного shape_wkt; id = blocks.id.
+-- WKT разбирается в Python: строки пишет DAO (create_block / set_block_shape /
+-- sync_spatial_index), триггеры только убирают устаревшие.
+CREATE VIRTUAL TABLE IF NOT EXISTS blocks_rtree USING rtree(id, min_x, max_x, min_y, max_y);
+
+DROP TRIGGER IF EXISTS trg_blocks_rtree_au;
+CREATE TRIGGER trg_blocks_rtree_au
+AFTER UPDATE OF id, shape_wkt ON blocks
+BEGIN
+  DELETE FROM blocks_rtree WHERE id = OLD.id;
+END;
+
+DROP TRIGGER IF EXISTS trg_blocks_rtree_ad;
+CREATE TRIGGER trg_blocks_rtree_ad
+AFTER DELETE ON blocks
+BEGIN
+  DELETE FROM blocks_rtree WHERE id = OLD.id;
+END;
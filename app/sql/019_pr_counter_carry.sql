@@ -0,0 +1,76 @@
+PRAGMA foreign_keys = ON;
+
+-- 019_pr_counter_carry.sql
+-- Учёт остатка старого круга при переполнении счётчика PR (pr_counter_events, 017).
+-- Показание в день rollover считается от prev_eff = 0, поэтому добыча за эти сутки —
+-- (capacity − последнее показание) + curr: carry_m3 события прибавляется к pr_m3
+-- строки той же скважины за дату события; значит, rollover ставится на дату
+-- первого показания нового круга (см. Database.add_pr_counter_event).
+-- Тот же расчёт — в Database.readings_to_arrays / summarize_readings и в проверке
+-- выбросов ставки PR (core/db/validation.py).
+
+DROP VIEW IF EXISTS v_daily_block_summary;
+CREATE VIEW v_daily_block_summary AS
+SELECT
+  dr.date,
+  dr.block_id,
+  COUNT(DISTINCT dr.well_id) AS wells_count,
+  SUM(MAX(0, dr.pr_counter_curr - dr.pr_counter_prev_eff) + COALESCE(e.carry_m3, 0)) AS pr_m3,
+  SUM(dr.pr_hours) AS pr_hours,
+  CASE WHEN SUM(dr.pr_hours) > 0
+       THEN SUM(MAX(0, dr.pr_counter_curr - dr.pr_counter_prev_eff) + COALESCE(e.carry_m3, 0)) / SUM(dr.pr_hours)
+       ELSE NULL END AS pr_rate_m3ph,
+  SUM(dr.vr_volume_m3) AS vr_m3,
+  SUM(dr.vr_hours) AS vr_hours,
+  CASE WHEN SUM(dr.vr_hours) > 0
+       THEN SUM(dr.vr_volume_m3) / SUM(dr.vr_hours)
+       ELSE NULL END AS injectivity_m3ph,
+  SUM(dr.pr_downtime_h) AS pr_downtime_h,
+  SUM(dr.vr_downtime_h) AS vr_downtime_h
+FROM daily_readings dr
+LEFT JOIN pr_counter_events e ON e.well_id = dr.well_id AND e.date = dr.date AND e.kind = 'rollover'
+GROUP BY dr.date, dr.block_id;
+
+-- mv_daily_block_summary (013): группы, где уже есть события rollover, пересчитать по новому VIEW
+DELETE FROM mv_daily_block_summary
+WHERE (date, block_id) IN (SELECT dr.date, dr.block_id FROM pr_counter_events e
+                           JOIN daily_readings dr ON dr.well_id = e.well_id AND dr.date = e.date);
+INSERT INTO mv_daily_block_summary
+SELECT v.* FROM v_daily_block_summary v
+WHERE (v.date, v.block_id) IN (SELECT dr.date, dr.block_id FROM pr_counter_events e
+                               JOIN daily_readings dr ON dr.well_id = e.well_id AND dr.date = e.date)
+  AND NOT EXISTS (SELECT 1 FROM mv_daily_block_summary m WHERE m.date = v.date AND m.block_id = v.block_id);
+
+-- правка события (carry_m3 пишет repair_pr_counters) пересчитывает группу его строки
+CREATE TRIGGER IF NOT EXISTS trg_pr_counter_events_summary_ai AFTER INSERT ON pr_counter_events
+BEGIN
+  DELETE FROM mv_daily_block_summary WHERE date = NEW.date
+    AND block_id IN (SELECT block_id FROM daily_readings WHERE well_id = NEW.well_id AND date = NEW.date);
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = NEW.date
+    AND block_id IN (SELECT block_id FROM daily_readings WHERE well_id = NEW.well_id AND date = NEW.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pr_counter_events_summary_ad AFTER DELETE ON pr_counter_events
+BEGIN
+  DELETE FROM mv_daily_block_summary WHERE date = OLD.date
+    AND block_id IN (SELECT block_id FROM daily_readings WHERE well_id = OLD.well_id AND date = OLD.date);
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = OLD.date
+    AND block_id IN (SELECT block_id FROM daily_readings WHERE well_id = OLD.well_id AND date = OLD.date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_pr_counter_events_summary_au
+AFTER UPDATE OF well_id, date, kind, carry_m3 ON pr_counter_events
+BEGIN
+  DELETE FROM mv_daily_block_summary WHERE date = OLD.date
+    AND block_id IN (SELECT block_id FROM daily_readings WHERE well_id = OLD.well_id AND date = OLD.date);
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = OLD.date
+    AND block_id IN (SELECT block_id FROM daily_readings WHERE well_id = OLD.well_id AND date = OLD.date);
+  DELETE FROM mv_daily_block_summary WHERE date = NEW.date
+    AND block_id IN (SELECT block_id FROM daily_readings WHERE well_id = NEW.well_id AND date = NEW.date);
+  INSERT INTO mv_daily_block_summary
+  SELECT * FROM v_daily_block_summary WHERE date = NEW.date
+    AND block_id IN (SELECT block_id FROM daily_readings WHERE well_id = NEW.well_id AND date = NEW.date);
+END;
@@ -0,0 +1,99 @@
+"""
+Бенчмарк as-of выборок (block_metal_asof / well_metal_asof / block_acidity_asof)
+на синтетических metal_analyses и block_acidity_analyses.
+
+Запуск:  python benchmarks/bench_asof_lookups.py [--sizes 10000,100000,1000000] [--lookups 2000]
+
+Для каждого размера печатает план запроса и среднее время одного вызова.
+При индексном поиске время растёт как O(log n): на 10k → 1M строк
+(в 100 раз больше данных) одиночный вызов дорожает на проценты, а не в разы.
+"""
+from __future__ import annotations
+import argparse, datetime as dt, glob, os, random, sqlite3, sys, tempfile, time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from core.db.dao import Database  # noqa: E402
+
+SQL_DIR = os.path.join(ROOT, "app", "sql")
+BLOCKS = 200
+WELLS_PER_BLOCK = 10
+START = dt.date(2015, 1, 1)
+
+def build_db(path: str, n_rows: int, seed: int = 42) -> None:
+    rnd = random.Random(seed)
+    con = sqlite3.connect(path)
+    for p in sorted(glob.glob(os.path.join(SQL_DIR, "*.sql"))):
+        with open(p, "r", encoding="utf-8") as f:
+            con.executescript(f.read())
+    con.executemany("INSERT INTO blocks(block_no) VALUES(?)", [(f"B{i}",) for i in range(BLOCKS)])
+    con.executemany(
+        "INSERT INTO wells(block_id, well_no, type) VALUES(?,?,?)",
+        [(b, f"W{w}", "VR") for b in range(1, BLOCKS + 1) for w in range(WELLS_PER_BLOCK)],
+    )
+
+    def metal_rows():
+        for _ in range(n_rows):
+            b = rnd.randint(1, BLOCKS)
+            w = None if rnd.random() < 0.3 else (b - 1) * WELLS_PER_BLOCK + rnd.randint(1, WELLS_PER_BLOCK)
+            d = START + dt.timedelta(days=rnd.randint(0, 3650))
+            yield (d.isoformat(), b, w, rnd.random() * 2)
+
+    con.executemany("INSERT INTO metal_analyses(date, block_id, well_id, metal_gpl) VALUES(?,?,?,?)", metal_rows())
+    con.executemany(
+        "INSERT OR IGNORE INTO block_acidity_analyses(date, block_id, metric_name, value) VALUES(?,?,?,?)",
+        (((START + dt.timedelta(days=rnd.randint(0, 3650))).isoformat(), rnd.randint(1, BLOCKS), "acid_ph",
+          rnd.random() * 5) for _ in range(n_rows // 4)),
+    )
+    con.commit()
+    con.execute("ANALYZE")
+    con.close()
+
+def bench(db: Database, lookups: int, seed: int = 7) -> dict[str, float]:
+    rnd = random.Random(seed)
+    args = [((START + dt.timedelta(days=rnd.randint(0, 3650))).isoformat(), rnd.randint(1, BLOCKS))
+            for _ in range(lookups)]
+    out = {}
+    for name, fn in (
+        ("block_metal_asof", lambda d, b: db.block_metal_asof(d, b)),
+        ("well_metal_asof", lambda d, b: db.well_metal_asof(d, b * WELLS_PER_BLOCK)),
+        ("block_acidity_asof", lambda d, b: db.block_acidity_asof(d, b, "acid_ph")),
+    ):
+        t0 = time.perf_counter()
+        for d, b in args:
+            fn(d, b)
+        out[name] = (time.perf_counter() - t0) / lookups * 1e6
+    return out
+
+def show_plans(path: str) -> None:
+    con = sqlite3.connect(path)
+    for sql in (
+        "SELECT metal_gpl FROM metal_analyses WHERE block_id=1 AND well_id IS NULL "
+        "AND substr(date,1,10) <= '2020-01-01' ORDER BY substr(date,1,10) DESC, id DESC LIMIT 1",
+        "SELECT metal_gpl FROM metal_analyses WHERE well_id=1 "
+        "AND substr(date,1,10) <= '2020-01-01' ORDER BY substr(date,1,10) DESC, id DESC LIMIT 1",
+    ):
+        for row in con.execute("EXPLAIN QUERY PLAN " + sql):
+            print("   plan:", row[3])
+    con.close()
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--lookups", type=int, default=2000)
+    a = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(x) for x in a.sizes.split(",")):
+            path = os.path.join(tmp, f"asof_{n}.db")
+            t0 = time.perf_counter()
+            build_db(path, n)
+            print(f"[bench] {n:>9} metal rows (build {time.perf_counter() - t0:.1f}s)")
+            show_plans(path)
+            with Database(path) as db:
+                for name, us in bench(db, a.lookups).items():
+                    print(f"   {name:<20} {us:8.1f} us/call")
+
+if __name__ == "__main__":
+    main()
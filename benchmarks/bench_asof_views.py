@@ -0,0 +1,110 @@
+"""
+Бенчмарк: исходные as-of VIEW (UNION дат × блоки/скважины + коррелированный подзапрос)
+против материализованных mv_* из 012_asof_materialized.sql.
+
+Запуск:  python benchmarks/bench_asof_views.py [--blocks 40] [--wells 8] [--years 5] [--repeat 3]
+
+Данные синтетические и детерминированные: суточные показания по каждой скважине
+за все годы, пробы металла/кислотности раз в неделю, смены режимов раз в квартал;
+грузятся по неделям, так что время сборки включает и работу триггеров mv_*.
+Исходные определения VIEW берутся прямо из ранних миграций (app/sql/00*.sql)
+и создаются как TEMP VIEW legacy_*, так что сравнение идёт на одной и той же БД.
+"""
+from __future__ import annotations
+import argparse, datetime as dt, glob, os, random, sqlite3, sys, tempfile, time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from core.db.migrate import SQL_DIR, legacy_view_sql  # noqa: E402
+
+VIEWS = ("v_block_acidity_asof", "v_block_metal_asof", "v_well_metal_asof",
+         "v_well_mode_on_date", "v_block_mode_on_date")
+
+def build_db(path: str, n_blocks: int, wells_per_block: int, years: int, seed: int = 1) -> int:
+    rnd = random.Random(seed)
+    con = sqlite3.connect(path)
+    for p in sorted(glob.glob(os.path.join(SQL_DIR, "*.sql"))):
+        with open(p, "r", encoding="utf-8") as f:
+            con.executescript(f.read())
+    con.executemany("INSERT INTO blocks(block_no) VALUES(?)", [(f"B{i}",) for i in range(n_blocks)])
+    con.executemany("INSERT INTO wells(block_id, well_no, type) VALUES(?,?,?)",
+                    [(b, f"W{w}", rnd.choice(["PR", "VR"]))
+                     for b in range(1, n_blocks + 1) for w in range(wells_per_block)])
+    n_wells = n_blocks * wells_per_block
+    start = dt.date(2020, 1, 1)
+    days = [(start + dt.timedelta(days=i)).isoformat() for i in range(365 * years)]
+
+    # Заполняем по неделям, как это происходит в работе: сначала суточные, потом лаборатория,
+    # раз в квартал — смена режимов. Так триггеры пересчитывают только «хвост» истории.
+    for i in range(0, len(days), 7):
+        week = days[i:i + 7]
+        con.executemany(
+            "INSERT INTO daily_readings(date, block_id, well_id, vr_volume_m3) VALUES(?,?,?,?)",
+            ((d, (w - 1) // wells_per_block + 1, w, rnd.random() * 10)
+             for d in week for w in range(1, n_wells + 1)),
+        )
+        d = week[0]
+        con.executemany(
+            "INSERT INTO metal_analyses(date, block_id, well_id, metal_gpl) VALUES(?,?,?,?)",
+            ((d, b, None if rnd.random() < 0.5 else (b - 1) * wells_per_block + 1, rnd.random())
+             for b in range(1, n_blocks + 1)),
+        )
+        con.executemany(
+            "INSERT INTO block_acidity_analyses(date, block_id, metric_name, value) VALUES(?,?,?,?)",
+            ((d, b, "acid_ph", rnd.random() * 5) for b in range(1, n_blocks + 1)),
+        )
+        if i % 91 == 0:
+            con.executemany("INSERT INTO well_mode_history(well_id, mode, date_from) VALUES(?,?,?)",
+                            ((w, rnd.choice(["PR", "VR"]), d) for w in range(1, n_wells + 1)))
+            con.executemany("INSERT INTO block_mode_history(block_id, mode, date_from) VALUES(?,?,?)",
+                            ((b, rnd.choice(["RUN", "STOP"]), d) for b in range(1, n_blocks + 1)))
+    con.commit()
+    con.execute("ANALYZE")
+    con.close()
+    return len(days) * n_wells
+
+def timed(con, sql: str, params=(), repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        con.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--blocks", type=int, default=40)
+    ap.add_argument("--wells", type=int, default=8)
+    ap.add_argument("--years", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=3)
+    a = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "asof_views.db")
+        t0 = time.perf_counter()
+        n = build_db(path, a.blocks, a.wells, a.years)
+        print(f"[bench] {a.blocks} blocks × {a.wells} wells × {a.years}y = {n} daily_readings "
+              f"(build incl. triggers {time.perf_counter() - t0:.1f}s)")
+
+        con = sqlite3.connect(path)
+        for name, body in legacy_view_sql(VIEWS).items():
+            con.execute(f"CREATE TEMP VIEW legacy_{name} AS {body}")
+        day = "2023-06-15"
+        cases = [
+            ("v_block_metal_asof", "date = ?", (day,)),
+            ("v_block_acidity_asof", "date = ? AND metric_name = 'acid_ph'", (day,)),
+            ("v_block_mode_on_date", "date = ?", (day,)),
+            ("v_well_metal_asof", "date = ?", (day,)),
+            ("v_well_mode_on_date", "date = ?", (day,)),
+            ("v_block_metal_asof", "block_id = 7 AND date BETWEEN '2023-01-01' AND '2023-12-31'", ()),
+        ]
+        print(f"   {'view / filter':<70} {'legacy ms':>10} {'mv ms':>8} {'x':>7}")
+        for view, where, params in cases:
+            old = timed(con, f"SELECT * FROM legacy_{view} WHERE {where}", params, a.repeat)
+            new = timed(con, f"SELECT * FROM {view} WHERE {where}", params, a.repeat)
+            print(f"   {view + ' WHERE ' + where:<70} {old:10.1f} {new:8.2f} {old / max(new, 1e-6):7.0f}")
+        con.close()
+
+if __name__ == "__main__":
+    main()
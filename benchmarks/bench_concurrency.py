@@ -0,0 +1,118 @@
+"""
+Стресс-тест конкурентного доступа: N потоков-писателей вставляют daily_readings,
+M потоков-читателей вызывают daily_block_summary.
+
+Запуск:  python benchmarks/bench_concurrency.py [--writers 4] [--readers 8] [--seconds 5]
+
+Сравниваются два профиля на отдельных файлах БД:
+  rollback   — журнал DELETE, общий пул (как было до WAL);
+  concurrent — PoolConfig.concurrent(): WAL, busy_timeout, повторы при SQLITE_BUSY,
+               read-only соединения для читателей.
+Для каждой роли печатаются пропускная способность (оп/с), p50/p99 задержки и число ошибок.
+"""
+from __future__ import annotations
+import argparse, datetime as dt, os, random, sys, tempfile, threading, time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from core.db.dao import Database, DaoError  # noqa: E402
+from core.db.migrate import migrate  # noqa: E402
+from core.db.pool import PoolConfig  # noqa: E402
+
+BLOCKS = 20
+WELLS_PER_WRITER = 50
+START = dt.date(2024, 1, 1)
+
+def prepare(path: str, writers: int) -> list[list[tuple[int, int]]]:
+    """Блоки и по WELLS_PER_WRITER скважин на писателя; возвращает [(block_id, well_id)] по писателям."""
+    migrate(path, verbose=False)
+    with Database(path) as db:
+        blocks = [db.create_block(f"B{i}") for i in range(BLOCKS)]
+        out = []
+        for w in range(writers):
+            out.append([(blocks[i % BLOCKS], db.create_well(blocks[i % BLOCKS], f"W{w}-{i}", "VR"))
+                        for i in range(WELLS_PER_WRITER)])
+        return out
+
+def percentile(xs: list[float], p: float) -> float:
+    if not xs:
+        return float("nan")
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+def run(path: str, cfg: PoolConfig, wells: list[list[tuple[int, int]]], readers: int, seconds: float) -> dict:
+    db = Database(path, pool_config=cfg)
+    stop = time.perf_counter() + seconds
+    lat: dict[str, list[float]] = {"write": [], "read": []}
+    errors = {"write": 0, "read": 0}
+    lock = threading.Lock()
+
+    def writer(my_wells):
+        local, errs, day = [], 0, 0
+        while time.perf_counter() < stop:
+            date = (START + dt.timedelta(days=day)).isoformat()
+            for block_id, well_id in my_wells:
+                t0 = time.perf_counter()
+                try:
+                    db.insert_daily_reading({"date": date, "block_id": block_id, "well_id": well_id,
+                                             "vr_volume_m3": 10.0, "vr_hours": 20.0})
+                    local.append(time.perf_counter() - t0)
+                except DaoError:
+                    errs += 1
+                if time.perf_counter() >= stop:
+                    break
+            day += 1
+        with lock:
+            lat["write"].extend(local)
+            errors["write"] += errs
+
+    def reader(seed):
+        rnd, local, errs = random.Random(seed), [], 0
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            try:
+                db.daily_block_summary((START + dt.timedelta(days=rnd.randint(0, 30))).isoformat(),
+                                       rnd.randint(1, BLOCKS))
+                local.append(time.perf_counter() - t0)
+            except DaoError:
+                errs += 1
+        with lock:
+            lat["read"].extend(local)
+            errors["read"] += errs
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in wells]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db.close()
+    return {role: {"ops": len(xs) / seconds, "p50_ms": percentile(xs, 0.50) * 1000,
+                   "p99_ms": percentile(xs, 0.99) * 1000, "errors": errors[role]}
+            for role, xs in lat.items()}
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+
+    profiles = {
+        "rollback": PoolConfig(size=args.writers + args.readers, journal_mode="DELETE", synchronous="FULL"),
+        "concurrent": PoolConfig.concurrent(writers=args.writers, readers=args.readers),
+    }
+    print(f"{'profile':>10} | {'role':>5} | {'ops/s':>8} | {'p50, ms':>8} | {'p99, ms':>8} | {'errors':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, cfg in profiles.items():
+            path = os.path.join(tmp, f"{name}.db")
+            wells = prepare(path, args.writers)
+            res = run(path, cfg, wells, args.readers, args.seconds)
+            for role in ("write", "read"):
+                r = res[role]
+                print(f"{name:>10} | {role:>5} | {r['ops']:>8.0f} | {r['p50_ms']:>8.2f} | "
+                      f"{r['p99_ms']:>8.2f} | {r['errors']:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Сравнение режимов row_mode (dict / row / typed) на выборке daily_readings.
+
+Запуск:  python benchmarks/bench_row_modes.py [--rows 500000]
+
+Для каждого режима печатает время list_daily_readings() за весь период
+и пиковую память результата (tracemalloc). Ожидаемо: typed (dataclass со
+__slots__) заметно легче словарей, sqlite3.Row — самый быстрый в построении.
+"""
+from __future__ import annotations
+import argparse, datetime as dt, gc, glob, os, random, sqlite3, sys, tempfile, time, tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from core.db.dao import Database  # noqa: E402
+
+SQL_DIR = os.path.join(ROOT, "app", "sql")
+BLOCKS = 50
+WELLS_PER_BLOCK = 20
+START = dt.date(2020, 1, 1)
+
+def build_db(path: str, n_rows: int, seed: int = 42) -> None:
+    rnd = random.Random(seed)
+    con = sqlite3.connect(path)
+    for p in sorted(glob.glob(os.path.join(SQL_DIR, "*.sql"))):
+        with open(p, "r", encoding="utf-8") as f:
+            con.executescript(f.read())
+    con.executemany("INSERT INTO blocks(block_no) VALUES(?)", [(f"B{i}",) for i in range(BLOCKS)])
+    con.executemany(
+        "INSERT INTO wells(block_id, well_no, type) VALUES(?,?,?)",
+        [(b, f"W{w}", "VR") for b in range(1, BLOCKS + 1) for w in range(WELLS_PER_BLOCK)],
+    )
+    n_wells = BLOCKS * WELLS_PER_BLOCK
+
+    def rows():
+        for i in range(n_rows):
+            w = i % n_wells + 1
+            d = START + dt.timedelta(days=i // n_wells)
+            yield (d.isoformat(), (w - 1) // WELLS_PER_BLOCK + 1, w, rnd.random() * 100, rnd.random() * 24)
+
+    con.executemany(
+        "INSERT INTO daily_readings(date, block_id, well_id, vr_volume_m3, vr_hours) VALUES(?,?,?,?,?)", rows()
+    )
+    con.commit()
+    con.close()
+
+def bench(path: str, mode: str) -> tuple[float, float, int]:
+    with Database(path, row_mode=mode) as db:
+        db.list_blocks()  # прогрев пула
+        gc.collect()
+        t0 = time.perf_counter()
+        n = len(db.list_daily_readings("0000-01-01", "9999-12-31"))
+        elapsed = time.perf_counter() - t0
+        # память — отдельным проходом: tracemalloc сильно искажает время
+        gc.collect()
+        tracemalloc.start()
+        rows = db.list_daily_readings("0000-01-01", "9999-12-31")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del rows
+    return elapsed, peak / 2**20, n
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=500_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        t0 = time.perf_counter()
+        build_db(path, args.rows)
+        print(f"build: {args.rows} daily_readings in {time.perf_counter() - t0:.1f}s")
+        print(f"{'mode':>6} | {'rows':>8} | {'time, s':>8} | {'peak, MiB':>9}")
+        for mode in ("dict", "row", "typed"):
+            elapsed, peak, n = bench(path, mode)
+            print(f"{mode:>6} | {n:>8} | {elapsed:>8.2f} | {peak:>9.1f}")
+
+if __name__ == "__main__":
+    main()
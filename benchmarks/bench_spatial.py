@@ -0,0 +1,98 @@
+"""
+Пространственные запросы на 10k скважин: R-tree (018) против полного перебора.
+
+Запуск:  python benchmarks/bench_spatial.py [--scale wells10k] [--calls 500] [--radius 50] [--k 5]
+
+Полигон — polygon_gen (сетка блоков с контурами WKT, скважины по 5 в ряд).
+Для каждого запроса печатается среднее время вызова в микросекундах:
+  block_at       — blocks_rtree + точка-в-полигоне против перебора всех разобранных контуров;
+  wells_within   — wells_rtree против полного скана wells с расстоянием;
+  nearest_wells  — k ближайших VR к PR-скважине: расширяющийся радиус против ORDER BY ... LIMIT k.
+Ответы обоих вариантов сверяются.
+"""
+from __future__ import annotations
+import argparse, os, random, sys, tempfile, time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from benchmarks.polygon_gen import SCALES, generate  # noqa: E402
+from core.db.dao import Database  # noqa: E402
+from core.db.geometry import parse_wkt  # noqa: E402
+
+SCAN_WITHIN_SQL = """
+SELECT id, (coord_x - :x) * (coord_x - :x) + (coord_y - :y) * (coord_y - :y) AS d2 FROM wells
+WHERE d2 <= :r * :r ORDER BY d2, id
+"""
+SCAN_NEAREST_SQL = """
+SELECT id, (coord_x - :x) * (coord_x - :x) + (coord_y - :y) * (coord_y - :y) AS d2 FROM wells
+WHERE type = 'VR' AND id <> :id ORDER BY d2, id LIMIT :k
+"""
+
+
+def timed(fn, args_list) -> tuple[float, list]:
+    out = [fn(*a) for a in args_list[:5]]  # прогрев
+    t0 = time.perf_counter()
+    out = [fn(*a) for a in args_list]
+    return (time.perf_counter() - t0) / len(args_list) * 1e6, out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", choices=sorted(SCALES), default="wells10k")
+    ap.add_argument("--calls", type=int, default=500)
+    ap.add_argument("--radius", type=float, default=50.0)
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        counts = generate(path, SCALES[args.scale])
+        print(f"[spatial] {args.scale}: {counts['blocks']} blocks, {counts['wells']} wells")
+        with Database(path) as db:
+            t0 = time.perf_counter()
+            synced = db.sync_spatial_index()
+            print(f"[spatial] blocks_rtree sync: {synced['indexed']} shapes in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+            con = db.connect()
+            wells = con.execute("SELECT id, type, coord_x, coord_y FROM wells ORDER BY id").fetchall()
+            shapes = [(r["id"], parse_wkt(r["shape_wkt"])) for r in con.execute("SELECT id, shape_wkt FROM blocks")]
+            rnd = random.Random(7)
+            lo_x = min(w["coord_x"] for w in wells) - 20
+            hi_x = max(w["coord_x"] for w in wells) + 20
+            lo_y = min(w["coord_y"] for w in wells) - 20
+            hi_y = max(w["coord_y"] for w in wells) + 20
+            points = [(rnd.uniform(lo_x, hi_x), rnd.uniform(lo_y, hi_y)) for _ in range(args.calls)]
+            pr_wells = [(w["id"],) for w in rnd.sample([w for w in wells if w["type"] == "PR"], args.calls)]
+
+            def scan_block_at(x, y):
+                return next((bid for bid, s in shapes if s is not None and s.contains(x, y)), None)
+
+            def scan_within(x, y):
+                return [r["id"] for r in con.execute(SCAN_WITHIN_SQL, {"x": x, "y": y, "r": args.radius})]
+
+            def scan_nearest(well_id):
+                w = wells[well_id - wells[0]["id"]]
+                return [r["id"] for r in con.execute(
+                    SCAN_NEAREST_SQL, {"x": w["coord_x"], "y": w["coord_y"], "id": well_id, "k": args.k})]
+
+            cases = {
+                "block_at": (lambda x, y: db.block_at(x, y), scan_block_at, points),
+                f"wells_within[r={args.radius:g}]": (
+                    lambda x, y: [h["id"] for h in db.wells_within(x, y, args.radius)], scan_within, points),
+                f"nearest_wells[k={args.k},VR]": (
+                    lambda w: [h["id"] for h in db.nearest_wells(w, args.k)], scan_nearest, pr_wells),
+            }
+            print(f"{'query':<28}{'rtree':>12}{'scan':>12}{'speedup':>10}   (us/call)")
+            for name, (indexed, scan, arglist) in cases.items():
+                t_idx, got = timed(indexed, arglist)
+                t_scan, want = timed(scan, arglist)
+                # nearest: при равных расстояниях порядок совпадает (ORDER BY d2, id)
+                assert got == want, f"{name}: rtree and scan results differ"
+                print(f"{name:<28}{t_idx:>12.1f}{t_scan:>12.1f}{t_scan / t_idx:>9.1f}x")
+            con.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Накладные расходы на вызов DAO: подготовка операторов и сборка текста SQL.
+
+Запуск:  python benchmarks/bench_statements.py [--scale small] [--calls 2000]
+
+Сравниваются три конфигурации Database на одном полигоне (polygon_gen):
+  connect   — pooled=False: новое соединение на каждый вызов, кэш операторов не живёт;
+  no-cache  — пул, но cached_statements=0: каждый вызов заново готовит оператор;
+  cached    — пул и cached_statements (PoolConfig, по умолчанию 256): оператор
+              готовится один раз на соединение.
+Для каждой печатается среднее время вызова горячих методов в микросекундах.
+Отдельно — стоимость сборки текста INSERT daily_readings «как раньше»
+(split/join на каждый вызов) против готовой константы.
+"""
+from __future__ import annotations
+import argparse, itertools, os, sys, tempfile, time, timeit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from benchmarks.polygon_gen import SCALES, generate  # noqa: E402
+from core.db import dao  # noqa: E402
+from core.db.dao import Database  # noqa: E402
+from core.db.pool import PoolConfig  # noqa: E402
+
+CONFIGS = {
+    "connect": {"pooled": False},
+    "no-cache": {"pool_config": PoolConfig(cached_statements=0)},
+    "cached": {"pool_config": PoolConfig()},
+}
+
+
+def legacy_insert_sql() -> str:
+    fields = dao._DR_FIELDS
+    placeholders = ",".join("?" for _ in fields.split(","))
+    return f"INSERT INTO daily_readings({fields}) VALUES({placeholders})"
+
+
+def calls(db: Database, counter) -> dict:
+    day = "2021-06-15"
+    return {
+        "daily_block_summary": lambda: db.daily_block_summary(day, 1),
+        "block_metal_asof": lambda: db.block_metal_asof(day, 1),
+        "list_daily_readings[day,block]": lambda: db.list_daily_readings(day, day, 1),
+        "insert_daily_reading": lambda: db.insert_daily_reading(
+            {"date": f"2100-01-01 {next(counter):08d}", "block_id": 1, "well_id": 1, "vr_volume_m3": 1.0}),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small")
+    ap.add_argument("--calls", type=int, default=2000)
+    args = ap.parse_args(argv)
+
+    n = 200_000
+    old = timeit.timeit(legacy_insert_sql, number=n) / n * 1e6
+    new = timeit.timeit(lambda: dao._DR_INSERT_SQL, number=n) / n * 1e6
+    print(f"[sql] build INSERT daily_readings: per-call {old:.2f} us, constant {new:.2f} us")
+    assert legacy_insert_sql() == dao._DR_INSERT_SQL
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate(path, SCALES[args.scale])
+        counter = itertools.count()
+        results: dict[str, dict[str, float]] = {}
+        for name, kw in CONFIGS.items():
+            with Database(path, cache=False, **kw) as db:
+                for op, fn in calls(db, counter).items():
+                    fn()  # прогрев
+                    t0 = time.perf_counter()
+                    for _ in range(args.calls):
+                        fn()
+                    results.setdefault(op, {})[name] = (time.perf_counter() - t0) / args.calls * 1e6
+        print(f"{'operation':<32}" + "".join(f"{c:>12}" for c in CONFIGS) + "   (us/call)")
+        for op, row in results.items():
+            print(f"{op:<32}" + "".join(f"{row[c]:>12.1f}" for c in CONFIGS))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Детерминированный генератор синтетического полигона для бенчмарков.
+
+    from polygon_gen import SCALES, generate
+    counts = generate("/tmp/bench.db", SCALES["small"])
+
+Создаёт схему (core/db/migrate.py) и заполняет: блоки (сетка контуров WKT), скважины (PR/VR),
+историю режимов скважин и блоков с переключениями, суточные показания за
+несколько лет, анализы (metal_analyses, block_acidity_analyses), простои,
+баки ССК с градуировкой и суточными уровнями. Данные пишутся в хронологическом
+порядке — так триггеры материализованных таблиц (012/013) работают с конца ряда.
+Одинаковые scale и seed дают бит-в-бит одинаковые таблицы (created_at тоже
+задаётся явно: дата начала полигона или дата показания, а не время генерации).
+"""
+from __future__ import annotations
+import datetime as dt, math, os, random, sqlite3, sys
+from dataclasses import asdict, dataclass
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.db.migrate import migrate  # noqa: E402
+
+
+@dataclass(frozen=True)
+class Scale:
+    blocks: int
+    wells_per_block: int
+    days: int
+    tanks: int = 2
+    calib_points: int = 300
+    start: str = "2021-01-01"
+    seed: int = 42
+
+
+SCALES: dict[str, Scale] = {
+    "tiny": Scale(blocks=3, wells_per_block=4, days=30, tanks=1, calib_points=50),
+    "small": Scale(blocks=10, wells_per_block=10, days=365),
+    "medium": Scale(blocks=30, wells_per_block=15, days=2 * 365, tanks=3),
+    "large": Scale(blocks=60, wells_per_block=20, days=3 * 365, tanks=4),
+    # только справочник: 400 блоков × 25 скважин для пространственных запросов (bench_spatial.py)
+    "wells10k": Scale(blocks=400, wells_per_block=25, days=1, tanks=1, calib_points=50),
+}
+
+
+def generate(path: str, scale: Scale) -> dict[str, int]:
+    """Строит БД по пути path (файл не должен существовать); возвращает число строк по таблицам."""
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    migrate(path, verbose=False)
+    rnd = random.Random(scale.seed)
+    start = dt.date.fromisoformat(scale.start)
+    days = [(start + dt.timedelta(days=i)).isoformat() for i in range(scale.days)]
+
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA foreign_keys = ON")
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA synchronous = OFF")
+    try:
+        # --- блоки и скважины -----------------------------------------
+        # блоки — сетка смежных прямоугольников, скважины — по 5 в ряд с шагом 20 м
+        cols = max(1, math.isqrt(scale.blocks - 1) + 1) if scale.blocks else 1
+        well_rows = (scale.wells_per_block + 4) // 5
+
+        def origin(b: int) -> tuple[float, float]:
+            return (b % cols) * 100.0, (b // cols) * well_rows * 20.0
+
+        def shape(b: int) -> str:
+            x0, y0 = origin(b)
+            x1, y1 = x0 - 10, y0 - 10
+            x2, y2 = x0 + 90, y0 + well_rows * 20.0 - 10
+            return f"POLYGON(({x1:g} {y1:g}, {x2:g} {y1:g}, {x2:g} {y2:g}, {x1:g} {y2:g}, {x1:g} {y1:g}))"
+
+        con.executemany(
+            "INSERT INTO blocks(block_no, flank, vl, cell, area_m2, horizon_power, ore_mass_t, regime, shape_wkt, "
+            "created_at) VALUES(?,?,?,?,?,?,?,?,?,?)",
+            [(f"B{b:03d}", "NS"[b % 2], f"VL{b // 10}", f"C{b % 10}", rnd.uniform(5e3, 2e4),
+              rnd.uniform(3, 12), rnd.uniform(1e5, 5e5), "ISL", shape(b), scale.start) for b in range(scale.blocks)],
+        )
+        block_ids = [r[0] for r in con.execute("SELECT id FROM blocks ORDER BY id")]
+        wells: list[tuple[int, int, str]] = []   # (well_id, block_id, type)
+        for bi, block_id in enumerate(block_ids):
+            for w in range(scale.wells_per_block):
+                wtype = "PR" if w % 3 == 0 else "VR"
+                cur = con.execute(
+                    "INSERT INTO wells(block_id, well_no, type, current_mode, depth_m, coord_x, coord_y, coord_z, "
+                    "created_at) VALUES(?,?,?,?,?,?,?,?,?)",
+                    (block_id, f"{bi:03d}-{w:03d}", wtype, wtype, rnd.uniform(200, 450),
+                     origin(bi)[0] + (w % 5) * 20.0, origin(bi)[1] + (w // 5) * 20.0, 0.0, scale.start),
+                )
+                wells.append((cur.lastrowid, block_id, wtype))
+
+        # --- история режимов (до показаний: триггерам пересчитывать нечего) ---
+        well_modes = []
+        for well_id, _, wtype in wells:
+            switches = sorted(rnd.sample(range(30, scale.days), k=min(rnd.randint(0, 2), max(scale.days - 30, 0))))
+            mode, frm = wtype, scale.start
+            for sw in switches:
+                to = (start + dt.timedelta(days=sw - 1)).isoformat()
+                well_modes.append((well_id, mode, frm, to))
+                mode, frm = ("VR" if mode == "PR" else "PR"), (start + dt.timedelta(days=sw)).isoformat()
+            well_modes.append((well_id, mode, frm, None))
+        con.executemany("INSERT INTO well_mode_history(well_id, mode, date_from, date_to) VALUES(?,?,?,?)",
+                        well_modes)
+        con.executemany("INSERT INTO block_mode_history(block_id, mode, date_from) VALUES(?,?,?)",
+                        [(b, "VR", scale.start) for b in block_ids])
+
+        # --- баки и градуировка -------------------------------------------
+        tank_ids, calib = [], {}
+        for t in range(scale.tanks):
+            height = 300 + 50 * t
+            cur = con.execute("INSERT INTO acid_tanks(name, capacity_t, height_cm) VALUES(?,?,?)",
+                              (f"SSK-{t + 1}", height * 0.25, height))
+            tank_id = cur.lastrowid
+            step = max(1, height // scale.calib_points)
+            points = [(cm, round(cm * 0.25 + 0.0004 * cm * cm, 3)) for cm in range(0, height + 1, step)]
+            con.executemany("INSERT INTO tank_calibration(tank_id, cm, tons) VALUES(?,?,?)",
+                            [(tank_id, cm, tons) for cm, tons in points])
+            tank_ids.append(tank_id)
+            calib[tank_id] = dict(points)
+
+        # --- суточные данные в хронологическом порядке ----------------------
+        counters = {well_id: rnd.uniform(1e4, 5e4) for well_id, _, t in wells}
+        mode_of = {well_id: wtype for well_id, _, wtype in wells}
+        switches_by_day: dict[str, list[tuple[int, str]]] = {}
+        for well_id, mode, frm, _ in well_modes:
+            switches_by_day.setdefault(frm, []).append((well_id, mode))
+        level_cm = {t: 200 for t in tank_ids}
+
+        for day in days:
+            for well_id, mode in switches_by_day.get(day, ()):
+                mode_of[well_id] = mode
+            rows, downtimes = [], []
+            for well_id, block_id, _ in wells:
+                down = rnd.choice((0.0,) * 18 + (1.0, 2.0, 4.0, 24.0))
+                hours = 24.0 - down
+                if down:
+                    downtimes.append((day, block_id, well_id, down, "maintenance"))
+                if mode_of[well_id] == "PR":
+                    prev = counters[well_id]
+                    counters[well_id] = prev + hours * rnd.uniform(4.0, 9.0)
+                    rows.append((day, block_id, well_id, prev, counters[well_id], hours, down,
+                                 0.0, 0.0, 0.0))
+                else:
+                    rows.append((day, block_id, well_id, 0.0, 0.0, 0.0, 0.0,
+                                 hours * rnd.uniform(5.0, 8.0), hours, down))
+            con.executemany(
+                "INSERT INTO daily_readings(date, block_id, well_id, pr_counter_prev_eff, pr_counter_curr, "
+                "pr_hours, pr_downtime_h, vr_volume_m3, vr_hours, vr_downtime_h, created_at) "
+                "VALUES(?,?,?,?,?,?,?,?,?,?,?)",
+                [r + (day,) for r in rows],
+            )
+            con.executemany("INSERT INTO downtimes(date, block_id, well_id, hours, reason) VALUES(?,?,?,?,?)",
+                            downtimes)
+
+            # лаборатория: раз в неделю по блоку, по скважинам — выборочно
+            if dt.date.fromisoformat(day).weekday() == 0:
+                con.executemany(
+                    "INSERT INTO block_acidity_analyses(date, block_id, metric_name, value) VALUES(?,?,?,?)",
+                    [(day, b, "acid_ph", rnd.uniform(1.2, 2.5)) for b in block_ids],
+                )
+                con.executemany(
+                    "INSERT INTO metal_analyses(date, block_id, well_id, metal_gpl) VALUES(?,?,?,?)",
+                    [(day, b, None, rnd.uniform(0.02, 0.12)) for b in block_ids]
+                    + [(day, b, w, rnd.uniform(0.01, 0.2)) for w, b, _ in wells if rnd.random() < 0.2],
+                )
+
+            # уровни баков: расход 5–25 см в сутки, долив при опустошении
+            levels = []
+            for t in tank_ids:
+                begin = level_cm[t]
+                end = max(0, begin - rnd.randint(5, 25))
+                receipts = 0.0
+                if end < 40:
+                    top = max(calib[t])
+                    receipts = calib[t][min(calib[t], key=lambda cm: abs(cm - top + 20))] - \
+                        calib[t][min(calib[t], key=lambda cm: abs(cm - end))]
+                    end = min(calib[t], key=lambda cm: abs(cm - top + 20))
+                begin = min(calib[t], key=lambda cm: abs(cm - begin))
+                end = min(calib[t], key=lambda cm: abs(cm - end))
+                levels.append((day, t, calib[t][begin], calib[t][end], begin, end, max(receipts, 0.0)))
+                level_cm[t] = end
+            con.executemany(
+                "INSERT INTO acid_levels(date, tank_id, level_begin_t, level_end_t, level_begin_cm, level_end_cm, "
+                "receipts_t) VALUES(?,?,?,?,?,?,?)",
+                levels,
+            )
+            con.commit()
+        con.execute("ANALYZE")
+        con.commit()
+
+        tables = ("blocks", "wells", "well_mode_history", "block_mode_history", "daily_readings", "downtimes",
+                  "metal_analyses", "block_acidity_analyses", "acid_tanks", "tank_calibration", "acid_levels")
+        return {t: con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables}
+    finally:
+        con.close()
+
+
+def describe(scale: Scale) -> dict:
+    return asdict(scale)
+
+
+if __name__ == "__main__":
+    import argparse, time
+    ap = argparse.ArgumentParser(description="Сгенерировать синтетический полигон.")
+    ap.add_argument("path")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small")
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    counts = generate(args.path, SCALES[args.scale])
+    print(f"[gen] {args.scale}: {counts} in {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,264 @@
+"""
+Набор бенчмарков DAO и VIEW на синтетическом полигоне (benchmarks/polygon_gen.py).
+
+Запуск:  python benchmarks/run_suite.py [--scales tiny,small] [--rounds 5] [--out report.json]
+                                        [--only list_] [--compare prev.json] [--threshold 0.25]
+
+Для каждого масштаба строится временная БД, затем каждый публичный метод
+Database и каждая VIEW (SELECT COUNT(*)) прогоняются rounds раз после одного
+прогрева. Отчёт — JSON в формате, близком к pytest-benchmark: machine_info,
+commit_info и benchmarks[{name, group, params, stats}], где stats содержит
+min/max/mean/stddev/median/iqr/rounds/ops (секунды, ops — вызовов в секунду).
+
+Сначала идут чтения, затем записи; записи идемпотентны (upsert, пересчёт,
+повторная загрузка той же градуировки) или пишут новые ключи на каждый раунд
+(create_block, insert_daily_reading в будущие даты), так что чтения
+меряются на исходных данных.
+
+--compare сравнивает mean с прошлым отчётом; код возврата 1, если какой-то
+бенчмарк стал медленнее более чем на threshold (доля, по умолчанию 25%).
+"""
+from __future__ import annotations
+import argparse, datetime as dt, itertools, json, os, platform, sqlite3, statistics, subprocess, sys, \
+    tempfile, time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from benchmarks.polygon_gen import SCALES, describe, generate  # noqa: E402
+from core.db import arrays  # noqa: E402
+from core.db.dao import Database  # noqa: E402
+
+
+def view_names(path: str) -> list[str]:
+    con = sqlite3.connect(path)
+    try:
+        return [r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='view' ORDER BY name")]
+    finally:
+        con.close()
+
+
+def fixtures(path: str) -> dict:
+    """Аргументы для вызовов, взятые из сгенерированных данных."""
+    con = sqlite3.connect(path)
+    try:
+        q = lambda sql: con.execute(sql).fetchone()  # noqa: E731
+        first, last = q("SELECT MIN(date), MAX(date) FROM daily_readings")
+        mid = (dt.date.fromisoformat(first) + (dt.date.fromisoformat(last) - dt.date.fromisoformat(first)) / 2)
+        block_ids = [r[0] for r in con.execute("SELECT id FROM blocks ORDER BY id")]
+        block_id, block_no = q("SELECT id, block_no FROM blocks ORDER BY id LIMIT 1")
+        well_ids = [r[0] for r in con.execute("SELECT id FROM wells WHERE block_id=? ORDER BY id", (block_id,))]
+        pr_well, x, y = q("SELECT id, coord_x, coord_y FROM wells WHERE type = 'PR' ORDER BY id LIMIT 1")
+        tank_id, tank_name = q("SELECT id, name FROM acid_tanks ORDER BY id LIMIT 1")
+        calib = [tuple(r) for r in con.execute("SELECT cm, tons FROM tank_calibration WHERE tank_id=? ORDER BY cm",
+                                               (tank_id,))]
+        level = dict(zip(("date", "tank_id", "level_begin_t", "level_end_t", "level_begin_cm", "level_end_cm",
+                          "receipts_t"),
+                         q("SELECT date, tank_id, level_begin_t, level_end_t, level_begin_cm, level_end_cm, "
+                           "receipts_t FROM acid_levels ORDER BY date DESC LIMIT 1")))
+        cols = [r[1] for r in con.execute("PRAGMA table_info(daily_readings)") if r[1] != "id"]
+        readings = [dict(zip(cols, r)) for r in
+                    con.execute(f"SELECT {','.join(cols)} FROM daily_readings WHERE date=?", (last,))]
+    finally:
+        con.close()
+    week_ago = (dt.date.fromisoformat(last) - dt.timedelta(days=6)).isoformat()
+    month = [(dt.date.fromisoformat(last) - dt.timedelta(days=i)).isoformat() for i in range(30)]
+    return {"first": first, "last": last, "mid": mid.isoformat(), "week_ago": week_ago, "month": month,
+            "block_ids": block_ids, "block_id": block_id, "block_no": block_no, "well_ids": well_ids,
+            "well_id": well_ids[0], "pr_well": pr_well, "point": (x, y), "tank_id": tank_id, "tank_name": tank_name, "calib": calib,
+            "level": level, "readings": readings}
+
+
+def cases(db: Database, f: dict) -> list[tuple[str, str, object]]:
+    """[(имя, группа, вызов без аргументов)]: сначала чтения, потом записи."""
+    seq = itertools.count(1)
+    future = dt.date.fromisoformat(f["last"]) + dt.timedelta(days=3650)
+    cms = [cm for cm, _ in f["calib"]][::5]
+    drain = lambda it: sum(1 for _ in it)  # noqa: E731
+
+    def next_day() -> str:
+        return (future + dt.timedelta(days=next(seq))).isoformat()
+
+    scratch: dict = {}
+
+    def scratch_well() -> int:
+        if "well" not in scratch:
+            scratch["well"] = db.create_well(f["block_id"], f"bench-{os.getpid()}", "VR")
+        return scratch["well"]
+
+    reads = [
+        ("get_block_by_no", lambda: db.get_block_by_no(f["block_no"])),
+        ("list_blocks", db.list_blocks),
+        ("iter_blocks", lambda: drain(db.iter_blocks())),
+        ("list_wells_by_block", lambda: db.list_wells_by_block(f["block_id"])),
+        ("iter_wells_by_block", lambda: drain(db.iter_wells_by_block(f["block_id"]))),
+        ("mode_of_well_on", lambda: db.mode_of_well_on(f["well_id"], f["mid"])),
+        ("modes_of_wells_on", lambda: db.modes_of_wells_on(f["mid"])),
+        ("mode_of_block_on", lambda: db.mode_of_block_on(f["block_id"], f["mid"])),
+        ("list_daily_readings[week]", lambda: db.list_daily_readings(f["week_ago"], f["last"])),
+        ("list_daily_readings[block,all]", lambda: db.list_daily_readings(f["first"], f["last"], f["block_id"])),
+        ("iter_daily_readings[all]", lambda: drain(db.iter_daily_readings(f["first"], f["last"]))),
+        ("readings_to_arrays[all]", lambda: db.readings_to_arrays(f["first"], f["last"])),
+        ("daily_block_summary", lambda: db.daily_block_summary(f["mid"], f["block_id"])),
+        ("check_daily_block_summary", db.check_daily_block_summary),
+        ("block_acidity_asof", lambda: db.block_acidity_asof(f["mid"], f["block_id"], "acid_ph")),
+        ("block_metal_asof", lambda: db.block_metal_asof(f["mid"], f["block_id"])),
+        ("well_metal_asof", lambda: db.well_metal_asof(f["mid"], f["well_id"])),
+        ("metal_asof_many[month]", lambda: db.metal_asof_many(f["block_ids"], f["month"])),
+        ("acidity_asof_many[month]", lambda: db.acidity_asof_many(f["block_ids"], f["month"])),
+        ("acid_reconciliation[month]", lambda: db.acid_reconciliation(f["first"], f["last"], "month")),
+        ("acid_reconciliation_blocks[block]", lambda: db.acid_reconciliation_blocks(
+            f["first"], f["last"], f["block_id"])),
+        ("block_at", lambda: db.block_at(*f["point"])),
+        ("wells_within[r=50]", lambda: db.wells_within(*f["point"], 50.0)),
+        ("nearest_wells[k=5,VR]", lambda: db.nearest_wells(f["pr_well"], 5)),
+        ("get_tank_id", lambda: db.get_tank_id(f["tank_name"])),
+        ("levels_cm_to_tons[linear]", lambda: db.levels_cm_to_tons(f["tank_id"], cms)),
+        ("levels_cm_to_tons[pchip]", lambda: db.levels_cm_to_tons(f["tank_id"], cms, "pchip")),
+    ]
+    writes = [
+        ("create_block", lambda: db.create_block(f"bench-{os.getpid()}-{next(seq)}")),
+        ("create_well", lambda: db.create_well(f["block_id"], f"bench-{os.getpid()}-{next(seq)}", "VR")),
+        ("add_well_mode_interval", lambda: db.add_well_mode_interval(scratch_well(), "VR", next_day())),
+        ("add_block_mode_interval", lambda: db.add_block_mode_interval(f["block_id"], "VR", next_day())),
+        ("insert_daily_reading", lambda: db.insert_daily_reading(
+            {**f["readings"][0], "date": next_day()})),
+        ("insert_daily_readings_bulk[upsert,day]", lambda: db.insert_daily_readings_bulk(
+            f["readings"], upsert=True)),
+        ("insert_block_acidity", lambda: db.insert_block_acidity(next_day(), f["block_id"], "acid_ph", 1.8)),
+        ("insert_metal_analysis", lambda: db.insert_metal_analysis(next_day(), f["block_id"], 0.05)),
+        ("insert_tank", lambda: db.insert_tank(f["tank_name"])),
+        ("load_tank_calibration", lambda: db.load_tank_calibration(f["tank_id"], f["calib"])),
+        ("insert_acid_level", lambda: db.insert_acid_level(f["level"])),
+        ("insert_acid_level[from_cm]", lambda: db.insert_acid_level(f["level"], from_cm=True)),
+        ("compute_and_store_acid_distribution_vr_share",
+         lambda: db.compute_and_store_acid_distribution_vr_share(f["last"])),
+        ("reconcile_acid[all]", lambda: db.reconcile_acid(f["first"], f["last"])),
+        ("validate_daily_readings[day]", lambda: db.validate_daily_readings(f["last"])),
+        ("validate_daily_readings[month]", lambda: db.validate_daily_readings(f["month"][-1], f["last"])),
+        ("compute_acid_distribution_range[month]",
+         lambda: db.compute_acid_distribution_range(f["month"][-1], f["last"])),
+    ]
+    if arrays.np is None:
+        reads = [(n, fn) for n, fn in reads if not n.startswith("readings_to_arrays")]
+    return [(n, "dao.read", fn) for n, fn in reads] + [(n, "dao.write", fn) for n, fn in writes]
+
+
+def measure(fn, rounds: int) -> dict:
+    fn()  # прогрев: пул соединений, кэши, страницы SQLite
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    mean = statistics.fmean(times)
+    q = statistics.quantiles(times, n=4) if len(times) > 1 else [times[0]] * 3
+    return {"min": min(times), "max": max(times), "mean": mean,
+            "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "median": statistics.median(times), "iqr": q[2] - q[0], "rounds": rounds,
+            "ops": 1.0 / mean if mean else 0.0}
+
+
+def run_scale(name: str, rounds: int, only: str | None, workdir: str) -> list[dict]:
+    scale = SCALES[name]
+    path = os.path.join(workdir, f"polygon_{name}.db")
+    t0 = time.perf_counter()
+    counts = generate(path, scale)
+    print(f"[suite] {name}: generated {counts['daily_readings']} readings in {time.perf_counter() - t0:.1f}s")
+    params = {"scale": name, **describe(scale), "rows": counts}
+    out = []
+
+    def emit(bench: str, group: str, fn) -> None:
+        if only and only not in bench:
+            return
+        stats = measure(fn, rounds)
+        out.append({"name": f"{bench}[{name}]", "fullname": bench, "group": group, "params": params,
+                    "stats": stats})
+        print(f"[suite] {name:>6} {bench:<48} mean {stats['mean'] * 1000:9.3f} ms  "
+              f"± {stats['stddev'] * 1000:.3f}")
+
+    with Database(path) as db:
+        f = fixtures(path)
+        db.compute_acid_distribution_range(f["first"], f["last"])
+        db.reconcile_acid(f["first"], f["last"])
+        for bench, group, fn in [c for c in cases(db, f) if c[1] == "dao.read"]:
+            emit(bench, group, fn)
+        con = sqlite3.connect(path)
+        try:
+            for view in view_names(path):
+                emit(view, "view", lambda v=view: con.execute(f"SELECT COUNT(*) FROM {v}").fetchone())
+        finally:
+            con.close()
+        for bench, group, fn in [c for c in cases(db, f) if c[1] == "dao.write"]:
+            emit(bench, group, fn)
+    return out
+
+
+def git_commit() -> dict:
+    def git(*args) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    return {"id": git("rev-parse", "HEAD"), "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def compare(report: dict, prev_path: str, threshold: float) -> int:
+    with open(prev_path, "r", encoding="utf-8") as fh:
+        prev = {b["name"]: b["stats"] for b in json.load(fh)["benchmarks"]}
+    regressions = 0
+    for b in report["benchmarks"]:
+        old = prev.get(b["name"])
+        if old is None or not old["mean"]:
+            continue
+        ratio = b["stats"]["mean"] / old["mean"]
+        mark = ""
+        if ratio > 1.0 + threshold:
+            mark, regressions = "  REGRESSION", regressions + 1
+        print(f"[compare] {b['name']:<56} {old['mean'] * 1000:9.3f} -> {b['stats']['mean'] * 1000:9.3f} ms"
+              f"  x{ratio:.2f}{mark}")
+    print(f"[compare] {regressions} regression(s) over {threshold:.0%} vs {prev_path}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Бенчмарки DAO и VIEW на синтетическом полигоне.")
+    ap.add_argument("--scales", default="tiny,small", help=f"через запятую из {sorted(SCALES)}")
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--only", help="подстрока имени бенчмарка")
+    ap.add_argument("--out", help="путь JSON-отчёта")
+    ap.add_argument("--compare", help="прошлый JSON-отчёт для сравнения")
+    ap.add_argument("--threshold", type=float, default=0.25)
+    args = ap.parse_args(argv)
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        ap.error(f"unknown scale(s): {', '.join(unknown)}")
+    if args.rounds < 1:
+        ap.error("--rounds must be >= 1")
+
+    benchmarks = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in scales:
+            benchmarks += run_scale(name, args.rounds, args.only, workdir)
+    report = {
+        "machine_info": {"python_version": platform.python_version(), "sqlite_version": sqlite3.sqlite_version,
+                         "platform": platform.platform(), "processor": platform.processor(),
+                         "cpu_count": os.cpu_count()},
+        "commit_info": git_commit(),
+        "datetime": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "version": 1,
+        "benchmarks": benchmarks,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"[suite] {len(benchmarks)} benchmarks -> {args.out}")
+    if args.compare:
+        return compare(report, args.compare, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+from __future__ import annotations
+import sqlite3
+
+try:
+    import numpy as np
+except ImportError:  # numpy — необязательная зависимость, нужна только аналитике
+    np = None
+
+# -------------------------------------------------------------------
+# Колоночная выгрузка суточных показаний в NumPy и векторные метрики
+# -------------------------------------------------------------------
+# Порядок колонок совпадает с SELECT в Database.readings_to_arrays.
+# pr_carry_m3 — не колонка daily_readings, а carry_m3 события rollover за ту же дату.
+READING_COLUMNS = ("date", "block_id", "well_id", "pr_counter_prev_eff", "pr_counter_curr",
+                   "pr_hours", "pr_downtime_h", "vr_volume_m3", "vr_hours", "vr_downtime_h", "pr_carry_m3")
+_FLOAT_COLUMNS = READING_COLUMNS[3:]
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for columnar readings export (pip install numpy)")
+    return np
+
+
+def _raw_dtype():
+    # дата приходит числом дней от 1970-01-01 (см. запрос) — в datetime64[D] без разбора строк
+    return np.dtype([("date", "i8"), ("block_id", "i4"), ("well_id", "i4")]
+                    + [(c, "f8") for c in _FLOAT_COLUMNS])
+
+
+def empty_columns() -> dict:
+    require_numpy()
+    return {name: np.empty(0, dtype=dt) for name, dt in _column_dtypes().items()}
+
+
+def _column_dtypes() -> dict:
+    return {"date": np.dtype("datetime64[D]"), "block_id": np.dtype("i4"), "well_id": np.dtype("i4"),
+            **{c: np.dtype("f8") for c in _FLOAT_COLUMNS}}
+
+
+def columns_from_cursor(cur: sqlite3.Cursor, batch_size: int = 10000) -> dict:
+    """
+    Колонки {имя: ndarray} из курсора с row_factory=None и колонками READING_COLUMNS
+    (числовые — без NULL, см. COALESCE в запросе). Строки забираются пачками
+    fetchmany и превращаются в массив одним np.array на пачку — без dict на строку.
+    """
+    require_numpy()
+    raw_dtype = _raw_dtype()
+    chunks = []
+    while True:
+        batch = cur.fetchmany(batch_size)
+        if not batch:
+            break
+        chunks.append(np.array(batch, dtype=raw_dtype))
+    if not chunks:
+        return empty_columns()
+    raw = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    cols = {name: np.ascontiguousarray(raw[name]) for name in READING_COLUMNS}
+    cols["date"] = cols["date"].view("datetime64[D]")
+    return cols
+
+
+def concat_columns(parts: list[dict]) -> dict:
+    """Склеивает выгрузки (например, по чанкам block_id) и восстанавливает порядок (date, well_id)."""
+    require_numpy()
+    parts = [p for p in parts if len(p["date"])]
+    if not parts:
+        return empty_columns()
+    if len(parts) == 1:
+        return parts[0]
+    cols = {name: np.concatenate([p[name] for p in parts]) for name in READING_COLUMNS}
+    order = np.lexsort((cols["well_id"], cols["date"]))
+    return {name: arr[order] for name, arr in cols.items()}
+
+
+def summarize_readings(cols: dict, by=("date", "block_id")) -> dict:
+    """
+    Те же метрики, что v_daily_block_summary, по произвольной группировке.
+
+    by — имена колонок cols (("date", "block_id") — как во VIEW; ("block_id",) —
+    за весь период; () — одна общая строка) или словарь {имя: массив ключа}
+    той же длины, например {"month": cols["date"].astype("datetime64[M]")}.
+    Возвращает колонки: ключи группировки, wells_count, pr_m3, pr_hours,
+    pr_rate_m3ph, vr_m3, vr_hours, injectivity_m3ph, pr_downtime_h, vr_downtime_h.
+    Ставки там, где часов нет (во VIEW — NULL), равны nan. Группы упорядочены по ключам.
+    """
+    require_numpy()
+    keys = dict(by) if isinstance(by, dict) else {name: cols[name] for name in by}
+    n = len(cols["well_id"])
+    for name, arr in keys.items():
+        if len(arr) != n:
+            raise ValueError(f"grouping key {name!r} has {len(arr)} values, expected {n}")
+
+    out = {}
+    group = np.zeros(n, dtype=np.int64)
+    size = 1
+    if keys:
+        # каждый ключ → номера его уникальных значений; составной ключ — смешанная система счисления
+        levels = []
+        for name, arr in keys.items():
+            uniq, inv = np.unique(np.asarray(arr), return_inverse=True)
+            levels.append(uniq)
+            group = group * len(uniq) + inv.reshape(-1)
+        present, group = np.unique(group, return_inverse=True)
+        group = group.reshape(-1)
+        size = len(present)
+        for name, uniq in zip(reversed(keys), reversed(levels)):
+            out[name] = uniq[present % len(uniq)]
+            present = present // len(uniq)
+        out = {name: out[name] for name in keys}
+
+    def total(values):
+        return np.bincount(group, weights=values, minlength=size)
+
+    wells = cols["well_id"].astype(np.int64)
+    radix = int(wells.max()) + 1 if n else 1
+    out["wells_count"] = np.bincount(np.unique(group * radix + wells) // radix, minlength=size)
+    out["pr_m3"] = total(np.maximum(0.0, cols["pr_counter_curr"] - cols["pr_counter_prev_eff"])
+                         + cols["pr_carry_m3"])
+    out["pr_hours"] = total(cols["pr_hours"])
+    out["vr_m3"] = total(cols["vr_volume_m3"])
+    out["vr_hours"] = total(cols["vr_hours"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["pr_rate_m3ph"] = np.where(out["pr_hours"] > 0, out["pr_m3"] / out["pr_hours"], np.nan)
+        out["injectivity_m3ph"] = np.where(out["vr_hours"] > 0, out["vr_m3"] / out["vr_hours"], np.nan)
+    out["pr_downtime_h"] = total(cols["pr_downtime_h"])
+    out["vr_downtime_h"] = total(cols["vr_downtime_h"])
+    return out
@@ -0,0 +1,149 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from .dao import Database
+from .pool import PoolConfig
+
+# -------------------------------------------------------------------
+# Асинхронный фасад над Database для asyncio (HTTP/API слой)
+# -------------------------------------------------------------------
+# Чтения без побочных эффектов: одинаковые одновременные вызовы сливаются в один.
+_READS = frozenset({
+    "get_block_by_no", "list_blocks", "list_wells_by_block", "list_daily_readings",
+    "mode_of_well_on", "modes_of_wells_on", "mode_of_block_on",
+    "daily_block_summary", "block_acidity_asof", "block_metal_asof", "well_metal_asof",
+    "metal_asof_many", "acidity_asof_many", "get_tank_id", "levels_cm_to_tons", "readings_to_arrays",
+    "acid_reconciliation", "acid_reconciliation_tanks", "acid_reconciliation_blocks", "list_reading_issues",
+    "list_pr_counter_events", "block_at", "wells_within", "nearest_wells",
+})
+_NOT_EXPOSED = frozenset({"connect", "close"})
+_UNHASHABLE = object()
+
+
+def _freeze(value):
+    """Хэшируемый ключ аргументов (списки → кортежи); _UNHASHABLE — слияния не будет."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+    if isinstance(value, (list, tuple)):
+        items = tuple(_freeze(v) for v in value)
+        return _UNHASHABLE if any(i is _UNHASHABLE for i in items) else (type(value).__name__, items)
+    return _UNHASHABLE
+
+
+class AsyncDatabase:
+    """
+    async-версии методов Database: await adb.list_blocks(), await adb.insert_daily_reading(...).
+
+    Каждый вызов выполняется целиком в одном потоке ограниченного пула
+    (max_workers); пул соединений Database того же размера, поэтому у каждого
+    потока своё соединение и вызов — одна транзакция.
+    Одинаковые одновременные чтения (_READS, равные аргументы) выполняются один
+    раз, результат получают все ожидающие (объект общий — не изменяйте его).
+    Любая запись сбрасывает слияние, чтобы последующие чтения видели её.
+    iter_* доступны как асинхронные генераторы (страницы по chunk строк).
+
+    Отмена корутины не обрывает транзакцию: начатый в потоке вызов доходит до
+    commit/rollback, не начатый — не выполняется вовсе. Для нескольких
+    операций в одной транзакции — run_in_transaction(fn), fn(db) синхронна.
+    """
+
+    def __init__(self, db_path: str | None = None, *, max_workers: int = 8,
+                 pool_config: PoolConfig | None = None, **db_kwargs) -> None:
+        if max_workers <= 0:
+            raise ValueError("max_workers must be > 0")
+        self.db = Database(db_path, pool_config=pool_config or PoolConfig(size=max_workers), **db_kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dao")
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.coalesced = 0  # сколько вызовов обслужено чужим запросом
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # контекст корутины (в т.ч. Database.audit_user) переносится в поток
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+    async def _read(self, name: str, fn, args: tuple, kwargs: dict):
+        key = (name, _freeze(args), _freeze(tuple(sorted(kwargs.items()))))
+        if any(k is _UNHASHABLE for k in key):
+            return await self._call(fn, *args, **kwargs)
+        fut = self._inflight.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+            self._inflight[key] = fut
+
+            def forget(done, key=key):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            fut.add_done_callback(forget)
+        else:
+            self.coalesced += 1
+        # shield: отмена одного из ожидающих не отменяет общий запрос
+        return await asyncio.shield(fut)
+
+    async def _write(self, fn, args: tuple, kwargs: dict):
+        self._inflight.clear()
+        try:
+            return await self._call(fn, *args, **kwargs)
+        finally:
+            self._inflight.clear()
+
+    async def _iter(self, fn, args: tuple, kwargs: dict, chunk: int):
+        # генераторы Database берут соединение на страницу, их можно продвигать из разных потоков
+        it = await self._call(fn, *args, **kwargs)
+        while True:
+            rows = await self._call(lambda: list(itertools.islice(it, chunk)))
+            if not rows:
+                return
+            for row in rows:
+                yield row
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name in _NOT_EXPOSED:
+            raise AttributeError(name)
+        fn = getattr(self.db, name)
+        if not callable(fn):
+            return fn
+
+        if name.startswith("iter_"):
+            def gen(*args, chunk: int = 1000, **kwargs):
+                return self._iter(fn, args, kwargs, chunk)
+            wrapper = gen
+        elif name in _READS:
+            async def wrapper(*args, **kwargs):
+                return await self._read(name, fn, args, kwargs)
+        else:
+            async def wrapper(*args, **kwargs):
+                return await self._write(fn, args, kwargs)
+        functools.update_wrapper(wrapper, fn)
+        setattr(self, name, wrapper)
+        return wrapper
+
+    def audit_user(self, user_id: int | None):
+        """with adb.audit_user(uid): await adb.create_block(...) — записи аудита от имени uid."""
+        return self.db.audit_user(user_id)
+
+    async def run_in_transaction(self, fn, *args, **kwargs):
+        """fn(db, *args, **kwargs) целиком в одном потоке и одной транзакции (commit/rollback там же)."""
+        def body():
+            with self.db._conn():
+                return fn(self.db, *args, **kwargs)
+        return await self._write(body, (), {})
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+        self.db.close()
+
+    async def __aenter__(self) -> "AsyncDatabase":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+# -------------------------------------------------------------------
+# Журнал аудита: очередь в памяти + фоновая пакетная запись в audit_log
+# -------------------------------------------------------------------
+log = logging.getLogger("core.db.audit")
+
+# пользователь, от имени которого идут записи (Database.audit_user)
+current_user: contextvars.ContextVar[int | None] = contextvars.ContextVar("audit_user", default=None)
+
+_INSERT_SQL = "INSERT INTO audit_log(ts, user_id, action, entity, entity_id, payload) VALUES(?,?,?,?,?,?)"
+_STOP = object()
+
+
+@dataclass
+class AuditConfig:
+    enabled: bool = True
+    batch_size: int = 500           # записей в одной транзакции
+    flush_interval_s: float = 1.0   # максимальная задержка записи в БД
+    max_queue: int = 10000          # граница очереди: дальше — ожидание (backpressure)
+    put_timeout_s: float = 5.0      # сколько ждать места в очереди, потом запись теряется (dropped)
+    busy_retries: int = 5           # повторы пакета при SQLITE_BUSY/LOCKED
+    max_list: int = 20              # длинные списки в payload заменяются на {"count": n}
+
+
+def compact(value, max_list: int = 20, depth: int = 0):
+    """
+    Копия аргумента/результата для payload: скаляры как есть, dict/list/tuple —
+    рекурсивно (длинные списки — {"count": n}), прочее (генераторы, файлы,
+    объекты) — имя типа: итератор нельзя прочитать, не отняв его у вызова.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if depth >= 4:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        return {str(k): compact(v, max_list, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if len(value) > max_list:
+            return {"count": len(value)}
+        return [compact(v, max_list, depth + 1) for v in value]
+    return f"<{type(value).__name__}>"
+
+
+class AuditWriter:
+    """
+    Ставит записи аудита в ограниченную очередь и пишет их отдельным потоком
+    со своим соединением: пакет — одна транзакция, по batch_size записей или
+    раз в flush_interval_s. Полная очередь задерживает пишущий вызов DAO
+    (до put_timeout_s), а не БД. flush() ждёт записи всего, что поставлено
+    до него; close() (и выход интерпретатора) дописывает очередь до конца.
+    Внешние ключи в соединении писателя не включены: неизвестный user_id
+    не должен стоить записи аудита.
+    """
+
+    def __init__(self, db_path: str, config: AuditConfig | None = None) -> None:
+        self.db_path = db_path
+        self.config = config or AuditConfig()
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, self.config.max_queue))
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.queued = self.written = self.dropped = self.failed = self.batches = 0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def record(self, action: str, entity: str, entity_id: int | None = None, payload=None,
+               user_id: int | None = None) -> bool:
+        """Ставит запись в очередь; False — писатель закрыт или очередь не освободилась за put_timeout_s."""
+        if self._closed:
+            self._count("dropped")
+            return False
+        if self._thread is None:
+            self._start()
+        item = (time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+                current_user.get() if user_id is None else user_id, action, entity, entity_id, payload)
+        try:
+            self._queue.put(item, timeout=self.config.put_timeout_s)
+        except queue.Full:
+            self._count("dropped")
+            log.warning("audit queue full for %.1fs, record dropped: %s %s", self.config.put_timeout_s,
+                        action, entity)
+            return False
+        self._count("queued")
+        return True
+
+    def _count(self, name: str, n: int = 1) -> None:
+        # счётчики меняют и вызывающие потоки, и писатель
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Дождаться записи всего, что поставлено до вызова; False — не успели за timeout."""
+        if self._thread is None or self._closed:
+            return True
+        done = threading.Event()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._queue.put(done, timeout=timeout)  # очередь может быть полна — ждём не дольше timeout
+        except queue.Full:
+            return False
+        return done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def close(self, timeout: float | None = None) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"queued": self.queued, "written": self.written, "dropped": self.dropped,
+                    "failed": self.failed, "batches": self.batches, "pending": self._queue.qsize()}
+
+    def _run(self) -> None:
+        con = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            batch: list[tuple] = []
+            deadline = 0.0
+            while True:
+                wait = None if not batch else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=wait)
+                except queue.Empty:
+                    item = None  # истёк flush_interval_s
+                if isinstance(item, tuple):
+                    if not batch:
+                        deadline = time.monotonic() + self.config.flush_interval_s
+                    batch.append(item)
+                    if len(batch) < self.config.batch_size:
+                        continue
+                self._write(con, batch)
+                batch = []
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is _STOP:
+                    return
+        finally:
+            con.close()
+
+    def _write(self, con: sqlite3.Connection, batch: list[tuple]) -> None:
+        if not batch:
+            return
+        rows = [(ts, user_id, action, entity, entity_id,
+                 None if payload is None else json.dumps(payload, ensure_ascii=False, default=str))
+                for ts, user_id, action, entity, entity_id, payload in batch]
+        attempt = 0
+        while True:
+            try:
+                with con:
+                    con.executemany(_INSERT_SQL, rows)
+                with self._lock:
+                    self.written += len(rows)
+                    self.batches += 1
+                return
+            except sqlite3.OperationalError as e:
+                busy = "locked" in str(e) or "busy" in str(e)
+                if not busy or attempt >= self.config.busy_retries:
+                    break
+                time.sleep(0.05 * (2 ** attempt))
+                attempt += 1
+            except sqlite3.Error as e:
+                log.error("audit batch of %d failed: %s", len(rows), e)
+                break
+        self._count("failed", len(rows))
+        log.error("audit batch of %d records lost", len(rows))
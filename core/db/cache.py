@@ -0,0 +1,112 @@
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+# -------------------------------------------------------------------
+# Read-through кэш справочных выборок DAO (LRU + TTL на тип сущности)
+# -------------------------------------------------------------------
+# сущность → (максимум ключей, TTL в секундах)
+DEFAULT_LIMITS: dict[str, tuple[int, float]] = {
+    "blocks": (1024, 300.0),   # get_block_by_no / list_blocks
+    "wells": (1024, 300.0),    # list_wells_by_block
+    "tanks": (256, 600.0),     # get_tank_id / insert_tank
+    "modes": (2, 300.0),       # индексы интервалов режимов (скважины, блоки)
+}
+
+_MISSING = object()
+
+
+@dataclass
+class CacheConfig:
+    enabled: bool = True
+    limits: dict[str, tuple[int, float]] = field(default_factory=dict)  # переопределения DEFAULT_LIMITS
+
+    def limit(self, entity: str) -> tuple[int, float]:
+        return self.limits.get(entity, DEFAULT_LIMITS[entity])
+
+
+class LRUCache:
+    """Ограниченный LRU со сроком жизни записей; потокобезопасен, считает попадания/промахи."""
+
+    def __init__(self, maxsize: int, ttl: float, clock=time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0   # растёт при каждом invalidate()
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires, value = item
+                if expires > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, generation: int | None = None) -> None:
+        """generation — значение self.generation до загрузки value; если с тех пор был сброс, не сохраняем."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=_MISSING) -> None:
+        with self._lock:
+            self._generation += 1
+            if key is _MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+
+class EntityCache:
+    """Набор LRUCache по типам сущностей из DEFAULT_LIMITS."""
+
+    def __init__(self, config: CacheConfig | None = None) -> None:
+        self.config = config or CacheConfig()
+        self._caches = {e: LRUCache(*self.config.limit(e)) for e in DEFAULT_LIMITS}
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def get(self, entity: str, key, default=_MISSING):
+        return self._caches[entity].get(key, default)
+
+    def generation(self, entity: str) -> int:
+        return self._caches[entity].generation
+
+    def put(self, entity: str, key, value, generation: int | None = None) -> None:
+        self._caches[entity].put(key, value, generation)
+
+    def invalidate(self, entity: str | None = None, key=_MISSING) -> None:
+        for name, cache in self._caches.items():
+            if entity is None or name == entity:
+                cache.invalidate(key)
+
+    def stats(self) -> dict[str, dict]:
+        return {name: cache.stats() for name, cache in self._caches.items()}
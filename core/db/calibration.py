@@ -0,0 +1,173 @@
+from __future__ import annotations
+import bisect
+import csv
+import threading
+
+# -------------------------------------------------------------------
+# Калибровочные таблицы баков: см → тонны
+# -------------------------------------------------------------------
+METHODS = ("linear", "pchip")
+
+
+class CalibrationTable:
+    """
+    Градуировочная таблица одного бака: отсортированные по cm точки (cm, tons).
+    Между точками — линейная интерполяция или монотонный кубический сплайн
+    Эрмита (PCHIP, Fritsch–Carlson: без «выбросов» между точками, т.е. объём
+    не убывает с уровнем, если не убывает сама таблица). За пределами
+    [первая точка; последняя точка] значение не определено — None.
+    """
+
+    __slots__ = ("cms", "tons", "_slopes")
+
+    def __init__(self, points) -> None:
+        pts = sorted((float(cm), float(t)) for cm, t in points)
+        self.cms = [cm for cm, _ in pts]
+        self.tons = [t for _, t in pts]
+        self._slopes: list[float] | None = None
+
+    def __len__(self) -> int:
+        return len(self.cms)
+
+    def tons_at(self, cm: float | None, method: str = "linear") -> float | None:
+        if cm is None or not self.cms:
+            return None
+        xs, ys = self.cms, self.tons
+        x = float(cm)
+        i = bisect.bisect_left(xs, x)
+        if i < len(xs) and xs[i] == x:
+            return ys[i]
+        if i == 0 or i == len(xs):
+            return None
+        k = i - 1
+        h = xs[i] - xs[k]
+        t = (x - xs[k]) / h
+        if method == "linear":
+            return ys[k] + (ys[i] - ys[k]) * t
+        if method != "pchip":
+            raise ValueError(f"unknown interpolation method: {method!r}")
+        m = self._pchip_slopes()
+        t2, t3 = t * t, t * t * t
+        return ((2 * t3 - 3 * t2 + 1) * ys[k] + (t3 - 2 * t2 + t) * h * m[k]
+                + (-2 * t3 + 3 * t2) * ys[i] + (t3 - t2) * h * m[i])
+
+    def _pchip_slopes(self) -> list[float]:
+        if self._slopes is not None:
+            return self._slopes
+        xs, ys = self.cms, self.tons
+        n = len(xs)
+        hs = [xs[k + 1] - xs[k] for k in range(n - 1)]
+        ds = [(ys[k + 1] - ys[k]) / hs[k] for k in range(n - 1)]
+        if n == 2:
+            self._slopes = [ds[0], ds[0]]
+            return self._slopes
+        m = [0.0] * n
+        for k in range(1, n - 1):
+            d0, d1 = ds[k - 1], ds[k]
+            if d0 * d1 > 0:
+                w1, w2 = 2 * hs[k] + hs[k - 1], hs[k] + 2 * hs[k - 1]
+                m[k] = (w1 + w2) / (w1 / d0 + w2 / d1)
+        m[0] = _pchip_end(hs[0], hs[1], ds[0], ds[1])
+        m[-1] = _pchip_end(hs[-1], hs[-2], ds[-1], ds[-2])
+        self._slopes = m
+        return m
+
+
+def _pchip_end(h0: float, h1: float, d0: float, d1: float) -> float:
+    """Наклон на краю таблицы (трёхточечная формула с сохранением формы)."""
+    m = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+    if m * d0 <= 0:
+        return 0.0
+    if d0 * d1 <= 0 and abs(m) > abs(3 * d0):
+        return 3 * d0
+    return m
+
+
+def read_calibration_csv(path) -> list[tuple[str, str]]:
+    """
+    CSV градуировки: две колонки cm, tons; заголовок необязателен.
+    Разделитель ';' (тогда допускается десятичная запятая) или ','.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        text = f.read()
+    first = text.lstrip().split("\n", 1)[0]
+    delim = ";" if ";" in first else ","
+    out = []
+    for n, rec in enumerate(csv.reader(text.splitlines(), delimiter=delim), start=1):
+        if not rec or not "".join(rec).strip():
+            continue
+        if len(rec) < 2:
+            raise ValueError(f"{path}:{n}: expected 'cm{delim}tons', got {rec!r}")
+        cm, tons = (c.strip().replace(",", ".") if delim == ";" else c.strip() for c in rec[:2])
+        if not out and n == 1 and not cm.lstrip("+-").replace(".", "", 1).isdigit():
+            continue  # заголовок
+        out.append((cm, tons))
+    return out
+
+
+def validate_calibration(points) -> list[tuple[int, float]]:
+    """
+    Точки (cm, tons) / {"cm", "tons"} → [(cm, tons)] по возрастанию cm.
+    cm — целые ≥ 0 без повторов, tons ≥ 0 и не убывают; иначе ValueError.
+    """
+    rows = []
+    for i, p in enumerate(points):
+        try:
+            cm, tons = (p["cm"], p["tons"]) if isinstance(p, dict) else p
+            cm_f, tons = float(cm), float(tons)
+        except (TypeError, ValueError, KeyError) as e:
+            raise ValueError(f"calibration point #{i}: invalid value {p!r} ({e})") from None
+        if not cm_f.is_integer() or cm_f < 0:
+            raise ValueError(f"calibration point #{i}: cm must be a non-negative integer, got {cm!r}")
+        if tons < 0:
+            raise ValueError(f"calibration point #{i}: tons must be >= 0, got {tons!r}")
+        rows.append((int(cm_f), tons))
+    if not rows:
+        raise ValueError("calibration table is empty")
+    rows.sort()
+    for (cm0, t0), (cm1, t1) in zip(rows, rows[1:]):
+        if cm1 == cm0:
+            raise ValueError(f"duplicate calibration point at cm={cm1}")
+        if t1 < t0:
+            raise ValueError(f"calibration is not monotonic: {t0} t at {cm0} cm > {t1} t at {cm1} cm")
+    return rows
+
+
+class CalibrationCache:
+    """
+    Таблицы tank_calibration, загруженные по одной на бак при первом обращении.
+    invalidate(tank_id) вызывается DAO после любой записи в калибровку бака
+    (и ещё раз после фиксации внешней транзакции).
+    """
+
+    def __init__(self) -> None:
+        self._tables: dict[int, CalibrationTable] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self, tank_id: int | None = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if tank_id is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(tank_id, None)
+
+    def get(self, con, tank_id: int, cached: bool = True) -> CalibrationTable:
+        """
+        Таблица бака. cached=False — прочитать через con мимо кэша (внутри пишущей
+        транзакции: там могут быть незафиксированные точки). Загруженная таблица
+        сохраняется, только если за время загрузки не было invalidate().
+        """
+        if cached:
+            table = self._tables.get(tank_id)
+            if table is not None:
+                return table
+        generation = self._generation
+        rows = con.execute("SELECT cm, tons FROM tank_calibration WHERE tank_id = ? ORDER BY cm", (tank_id,))
+        table = CalibrationTable((r["cm"], r["tons"]) for r in rows)
+        if cached:
+            with self._lock:
+                if self._generation == generation:
+                    self._tables[tank_id] = table
+        return table
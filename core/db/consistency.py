@@ -0,0 +1,28 @@
+from __future__ import annotations
+import argparse, os, sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.db.dao import Database, DEFAULT_DB  # noqa: E402
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Сверка материализованных сводок с исходными VIEW.")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    ap.add_argument("--rebuild", action="store_true", help="перестроить таблицу после сверки")
+    ap.add_argument("--limit", type=int, default=20, help="сколько расхождений печатать")
+    args = ap.parse_args(argv)
+
+    with Database(args.db) as db:
+        diffs = db.check_daily_block_summary(rebuild=args.rebuild)
+    print(f"[check] mv_daily_block_summary: {len(diffs)} mismatches")
+    for d in diffs[:args.limit]:
+        print(f"[check]   {d['date']} block={d['block_id']} {d['column']}: "
+              f"stored={d['stored']!r} expected={d['expected']!r}")
+    if args.rebuild:
+        print("[check] mv_daily_block_summary rebuilt")
+    return 1 if diffs and not args.rebuild else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
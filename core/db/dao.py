@@ -1,6 +1,30 @@
 from __future__ import annotations
+import bisect
+import itertools
+import inspect
+import logging
+import math
 import os
+import dataclasses
+import functools
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from . import arrays as _arrays
+from .audit import AuditConfig, AuditWriter, compact as _audit_compact, current_user as _audit_user
+from .cache import CacheConfig, EntityCache
+from .calibration import METHODS as CALIB_METHODS, CalibrationCache, read_calibration_csv, validate_calibration
+from .geometry import GeometryCache, parse_wkt
+from .intervals import ModeIntervalIndex
+from .perf import InstrumentedConnection, PerfConfig, PerfRecorder, log as perf_log
+from .pool import ConnectionPool, PoolConfig, PoolTimeoutError
+from .rows import ROW_MODES, typed_rows
+from . import validation as _validation
+from core.models.block import Block
+from core.models.readings import DailyReading
+from core.models.well import Well
 
 # -------------------------------------------------------------------
 # Пути и базовые настройки
@@ -29,6 +53,9 @@ class ForeignKeyError(DaoError):
 class MissingTableError(DaoError):
     """Таблица/представление не существует (нет миграции)."""
 
+class BusyError(DaoError):
+    """БД заблокирована другим соединением (SQLITE_BUSY) и повторы не помогли."""
+
 def _map_integrity_error(e: sqlite3.IntegrityError) -> DaoError:
     msg = str(e)
     if "UNIQUE constraint failed" in msg:
@@ -41,8 +68,300 @@ def _map_operational_error(e: sqlite3.OperationalError) -> DaoError:
     msg = str(e)
     if "no such table" in msg or "no such view" in msg:
         return MissingTableError(msg)
+    if "database is locked" in msg or "database is busy" in msg or "database table is locked" in msg:
+        return BusyError(msg)
     return DaoError(msg)
 
+# Тексты горячих запросов собираются один раз при импорте: одинаковая строка SQL
+# попадает в кэш подготовленных операторов соединения (cached_statements, см. PoolConfig),
+# а долгоживущие соединения пула держат этот кэш между вызовами.
+_DR_FIELDS = ("date, block_id, well_id, pr_counter_prev_eff, pr_counter_curr, pr_hours, pr_downtime_h, "
+              "vr_volume_m3, vr_hours, vr_downtime_h, rvr_type_id, comment, status")
+_DR_COLUMNS = tuple(f.strip() for f in _DR_FIELDS.split(","))
+_DR_INSERT_SQL = f"INSERT INTO daily_readings({_DR_FIELDS}) VALUES({','.join('?' * len(_DR_COLUMNS))})"
+_DR_UPSERT_SQL = _DR_INSERT_SQL + " ON CONFLICT(date, well_id) DO UPDATE SET " + ", ".join(
+    f"{f}=excluded.{f}" for f in _DR_COLUMNS if f not in ("date", "well_id")
+)
+_DR_LIST_SQL = "SELECT * FROM daily_readings WHERE date BETWEEN ? AND ? ORDER BY date, well_id"
+_DR_LIST_BLOCK_SQL = "SELECT * FROM daily_readings WHERE date BETWEEN ? AND ? AND block_id = ? ORDER BY date, well_id"
+_DR_BOUNDS_SQL = "SELECT MIN(id) AS lo, MAX(id) AS hi FROM daily_readings WHERE date BETWEEN ? AND ?"
+_DR_BOUNDS_BLOCK_SQL = _DR_BOUNDS_SQL + " AND block_id = ?"
+# pr_carry_m3 — остаток старого круга в день переполнения счётчика (019, как во VIEW)
+_DR_ARRAYS_SQL = (
+    "SELECT CAST(julianday(substr(dr.date,1,10)) - 2440587.5 AS INTEGER), dr.block_id, dr.well_id, "
+    + ", ".join("COALESCE(e.carry_m3, 0.0)" if c == "pr_carry_m3" else f"COALESCE(dr.{c}, 0.0)"
+                for c in _arrays.READING_COLUMNS[3:])
+    + " FROM daily_readings dr LEFT JOIN pr_counter_events e"
+      " ON e.well_id = dr.well_id AND e.date = dr.date AND e.kind = 'rollover'"
+      " WHERE dr.date BETWEEN ? AND ?{blocks} ORDER BY dr.date, dr.well_id"
+)
+
+def _daily_reading_values(dr: dict) -> tuple:
+    return (
+        dr.get("date"), dr.get("block_id"), dr.get("well_id"),
+        dr.get("pr_counter_prev_eff", 0.0), dr.get("pr_counter_curr", 0.0),
+        dr.get("pr_hours", 0.0), dr.get("pr_downtime_h", 0.0),
+        dr.get("vr_volume_m3", 0.0), dr.get("vr_hours", 0.0), dr.get("vr_downtime_h", 0.0),
+        dr.get("rvr_type_id"), dr.get("comment"), dr.get("status", "draft"),
+    )
+
+_IN_CHUNK = 500
+
+@functools.lru_cache(maxsize=256)
+def _in_sql(sql: str, n: int) -> str:
+    """sql с {ids} → n плейсхолдеров; одна и та же строка для каждого полного чанка."""
+    return sql.format(ids=",".join("?" * n))
+
+@functools.lru_cache(maxsize=64)
+def _keyset_sql(table: str, where: str, bounded: bool) -> str:
+    return (f"SELECT * FROM {table} WHERE {where} AND id > ?"
+            + (" AND id <= ?" if bounded else "") + " ORDER BY id LIMIT ?")
+
+_NOT_CACHED = object()
+
+# -------------------------------------------------------------------
+# Непрерывность счётчика PR: pr_counter_prev_eff из предыдущего показания
+# -------------------------------------------------------------------
+# Последнее ненулевое показание скважины до даты — поиск по idx_daily_readings_well_date
+# (нулевые — сутки в VR, счётчик PR не снимался).
+_PRC_PREV_SQL = ("SELECT date, pr_counter_curr FROM daily_readings "
+                 "WHERE well_id = ? AND date < ? AND pr_counter_curr > 0 ORDER BY date DESC LIMIT 1")
+_PRC_LATER_SQL = "SELECT 1 FROM daily_readings WHERE well_id = ? AND date > ? LIMIT 1"
+# Последнее событие счётчика в (дата предыдущего показания; дата]
+_PRC_EVENT_SQL = ("SELECT kind, new_start FROM pr_counter_events "
+                  "WHERE well_id = ? AND date <= ? AND date > ? ORDER BY date DESC LIMIT 1")
+
+# Пересчёт периода одним проходом: к строкам [d1; d2] добавляется последнее ненулевое
+# показание каждой скважины до d1, предыдущее ненулевое значение берётся окнами
+# (SUM считает группы «ненулевое + следующие нулевые», LAG — значение прошлой группы),
+# событие между предыдущим показанием и строкой заменяет его (replacement → new_start,
+# rollover → 0). Обновляются только строки, где значение действительно меняется.
+_PRC_REPAIR_TEMPLATE = """
+WITH seed AS (
+    SELECT (SELECT p.id FROM daily_readings p
+            WHERE p.well_id = w.id AND p.date < ? AND p.pr_counter_curr > 0
+            ORDER BY p.date DESC LIMIT 1) AS id
+    FROM wells w WHERE 1 = 1{wells_w}
+),
+src AS (
+    SELECT id, well_id, date, pr_counter_prev_eff AS prev_eff, COALESCE(pr_counter_curr, 0) AS curr,
+           1 AS in_range
+    FROM daily_readings WHERE date >= ? AND date <= ?{wells}
+    UNION ALL
+    SELECT dr.id, dr.well_id, dr.date, dr.pr_counter_prev_eff, dr.pr_counter_curr, 0
+    FROM seed JOIN daily_readings dr ON dr.id = seed.id
+),
+grp AS (
+    SELECT *, SUM(curr > 0) OVER (PARTITION BY well_id ORDER BY date) AS g FROM src
+),
+val AS (
+    SELECT *, MAX(CASE WHEN curr > 0 THEN curr END) OVER (PARTITION BY well_id, g) AS g_curr,
+              MAX(CASE WHEN curr > 0 THEN date END) OVER (PARTITION BY well_id, g) AS g_date
+    FROM grp
+),
+lagged AS (
+    SELECT *, LAG(g_curr) OVER w AS prev_curr, LAG(g_date) OVER w AS prev_date
+    FROM val WINDOW w AS (PARTITION BY well_id ORDER BY date)
+),
+derived AS (
+    SELECT l.id, CASE e.kind WHEN 'replacement' THEN e.new_start WHEN 'rollover' THEN 0
+                             ELSE COALESCE(l.prev_curr, l.prev_eff) END AS prev_eff
+    FROM lagged l
+    LEFT JOIN pr_counter_events e ON e.id = (
+        SELECT e2.id FROM pr_counter_events e2
+        WHERE e2.well_id = l.well_id AND e2.date <= l.date AND (l.prev_date IS NULL OR e2.date > l.prev_date)
+        ORDER BY e2.date DESC LIMIT 1)
+    WHERE l.in_range AND l.curr > 0
+)
+UPDATE daily_readings SET pr_counter_prev_eff = d.prev_eff
+FROM derived d
+WHERE daily_readings.id = d.id AND daily_readings.pr_counter_prev_eff IS NOT d.prev_eff
+RETURNING daily_readings.id
+"""
+_PRC_REPAIR_SQL = _PRC_REPAIR_TEMPLATE.replace("{wells_w}", "").replace("{wells}", "")
+_PRC_REPAIR_WELLS_SQL = (_PRC_REPAIR_TEMPLATE.replace("{wells_w}", " AND w.id IN ({ids})")
+                         .replace("{wells}", " AND well_id IN ({ids})"))
+# Остаток старого круга при переполнении: capacity − последнее показание до события
+_PRC_CARRY_TEMPLATE = """
+UPDATE pr_counter_events SET carry_m3 = MAX(0, capacity - COALESCE((
+    SELECT p.pr_counter_curr FROM daily_readings p
+    WHERE p.well_id = pr_counter_events.well_id AND p.date < pr_counter_events.date AND p.pr_counter_curr > 0
+    ORDER BY p.date DESC LIMIT 1), capacity))
+WHERE kind = 'rollover' AND capacity IS NOT NULL AND date >= ? AND date <= ?{wells}
+"""
+_PRC_CARRY_SQL = _PRC_CARRY_TEMPLATE.replace("{wells}", "")
+_PRC_CARRY_WELLS_SQL = _PRC_CARRY_TEMPLATE.replace("{wells}", " AND well_id IN ({ids})")
+_PRC_OPEN_END = "9999-12-31"
+
+# -------------------------------------------------------------------
+# Пространственные запросы: R-tree отбирает кандидатов, точная проверка — здесь
+# -------------------------------------------------------------------
+spatial_log = logging.getLogger("core.db.spatial")
+
+_BLOCKS_AT_SQL = ("SELECT id FROM blocks_rtree "
+                  "WHERE min_x <= ? AND max_x >= ? AND min_y <= ? AND max_y >= ? ORDER BY id")
+_BLOCKS_UNINDEXED_SQL = ("SELECT id, shape_wkt FROM blocks b WHERE shape_wkt IS NOT NULL AND shape_wkt <> '' "
+                         "AND NOT EXISTS (SELECT 1 FROM blocks_rtree r WHERE r.id = b.id)")
+_WELLS_EXTENT_SQL = ("SELECT COUNT(*) AS n, MIN(min_x) AS min_x, MAX(max_x) AS max_x, "
+                     "MIN(min_y) AS min_y, MAX(max_y) AS max_y FROM wells_rtree")
+_WELLS_WITHIN_TEMPLATE = """
+SELECT w.id, w.block_id, w.well_no, w.type, w.coord_x, w.coord_y,
+       (w.coord_x - :x) * (w.coord_x - :x) + (w.coord_y - :y) * (w.coord_y - :y) AS d2
+FROM wells_rtree r JOIN wells w ON w.id = r.id
+WHERE r.min_x <= :x + :r AND r.max_x >= :x - :r AND r.min_y <= :y + :r AND r.max_y >= :y - :r
+  AND d2 <= :r * :r{type}
+ORDER BY d2, w.id
+"""
+_WELLS_WITHIN_SQL = _WELLS_WITHIN_TEMPLATE.format(type="")
+_WELLS_WITHIN_TYPE_SQL = _WELLS_WITHIN_TEMPLATE.format(type=" AND w.type = :type")
+
+def _well_hit(row: dict) -> dict:
+    hit = dict(row)
+    hit["distance_m"] = math.sqrt(hit.pop("d2"))
+    return hit
+
+# -------------------------------------------------------------------
+# Сверка склада кислоты: SQL собирается один раз (см. reconcile_acid)
+# -------------------------------------------------------------------
+recon_log = logging.getLogger("core.db.recon")
+
+_RECON_GRAINS = {"day": ("acid_recon_daily", 10), "month": ("v_acid_recon_monthly", 7),
+                 "year": ("v_acid_recon_yearly", 4)}
+
+_RECON_CONSUMPTION = ("(COALESCE(level_begin_t,0) + COALESCE(receipts_t,0) + COALESCE(transfers_in_t,0)"
+                      " - COALESCE(transfers_out_t,0) + COALESCE(adjustments_t,0) - COALESCE(level_end_t,0))")
+
+_RECON_INSERT_SQL = (
+    f"""
+    INSERT INTO acid_recon_daily(date, warehouse_consumption_t, distributed_t, delta_t, tolerance_t, over_tolerance)
+    WITH cons AS (
+        SELECT date, SUM({_RECON_CONSUMPTION}) AS cons_t FROM acid_levels
+        WHERE date BETWEEN :d1 AND :d2 GROUP BY date
+    ),
+    dist AS (
+        SELECT date, SUM(acid_tons) AS dist_t FROM acid_distribution
+        WHERE date BETWEEN :d1 AND :d2 GROUP BY date
+    ),
+    days AS (SELECT date FROM cons UNION SELECT date FROM dist),
+    day AS (
+        SELECT d.date, COALESCE(c.cons_t, 0) AS cons_t, COALESCE(s.dist_t, 0) AS dist_t,
+               MAX(:tolerance_t, :tolerance_pct / 100.0 * ABS(COALESCE(c.cons_t, 0))) AS tol_t
+        FROM days d LEFT JOIN cons c ON c.date = d.date LEFT JOIN dist s ON s.date = d.date
+    )
+    SELECT date, cons_t, dist_t, cons_t - dist_t, tol_t, ABS(cons_t - dist_t) > tol_t FROM day
+    """,
+    f"""
+    INSERT INTO acid_recon_tank(date, tank_id, consumption_t, imbalance_t)
+    WITH tank AS (
+        SELECT date, tank_id, SUM({_RECON_CONSUMPTION}) AS cons_t FROM acid_levels
+        WHERE date BETWEEN :d1 AND :d2 GROUP BY date, tank_id
+    ),
+    tank_day AS (
+        SELECT date, tank_id, cons_t,
+               SUM(cons_t) OVER (PARTITION BY date) AS day_cons_t,
+               COUNT(*) OVER (PARTITION BY date) AS tanks
+        FROM tank
+    )
+    SELECT t.date, t.tank_id, t.cons_t,
+           r.delta_t * CASE WHEN t.day_cons_t <> 0 THEN t.cons_t / t.day_cons_t ELSE 1.0 / t.tanks END
+    FROM tank_day t JOIN acid_recon_daily r ON r.date = t.date
+    """,
+    """
+    INSERT INTO acid_recon_block(date, block_id, expected_t, distributed_t, imbalance_t)
+    WITH vr AS (
+        SELECT date, block_id, COALESCE(vr_m3, 0) AS vr_m3,
+               SUM(COALESCE(vr_m3, 0)) OVER (PARTITION BY date) AS total_vr
+        FROM mv_daily_block_summary WHERE date BETWEEN :d1 AND :d2
+    ),
+    keys AS (
+        SELECT date, block_id FROM acid_distribution WHERE date BETWEEN :d1 AND :d2
+        UNION SELECT date, block_id FROM vr WHERE vr_m3 > 0
+    ),
+    blk AS (
+        SELECT k.date, k.block_id,
+               CASE WHEN r.warehouse_consumption_t > 0 AND v.total_vr > 0
+                    THEN r.warehouse_consumption_t * v.vr_m3 / v.total_vr ELSE 0 END AS expected_t,
+               COALESCE(ad.acid_tons, 0) AS distributed_t
+        FROM keys k
+        LEFT JOIN vr v ON v.date = k.date AND v.block_id = k.block_id
+        LEFT JOIN acid_distribution ad ON ad.date = k.date AND ad.block_id = k.block_id
+        LEFT JOIN acid_recon_daily r ON r.date = k.date
+    )
+    SELECT date, block_id, expected_t, distributed_t, expected_t - distributed_t FROM blk
+    """,
+)
+
+# Нарастающие итоги от date_from до конца таблицы, продолжая последнее значение до date_from.
+_RECON_CUMULATIVE_SQL = (
+    """
+    UPDATE acid_recon_daily SET cum_delta_t = c.cum, drift = ABS(c.cum) > :drift_t
+    FROM (
+        SELECT date, SUM(delta_t) OVER (ORDER BY date)
+               + COALESCE((SELECT p.cum_delta_t FROM acid_recon_daily p WHERE p.date < :d1
+                           ORDER BY p.date DESC LIMIT 1), 0) AS cum
+        FROM acid_recon_daily WHERE date >= :d1
+    ) AS c
+    WHERE acid_recon_daily.date = c.date
+    """,
+    """
+    UPDATE acid_recon_tank SET cum_imbalance_t = c.cum
+    FROM (
+        SELECT t.date, t.tank_id, SUM(t.imbalance_t) OVER (PARTITION BY t.tank_id ORDER BY t.date)
+               + COALESCE((SELECT p.cum_imbalance_t FROM acid_recon_tank p
+                           WHERE p.tank_id = t.tank_id AND p.date < :d1
+                           ORDER BY p.date DESC LIMIT 1), 0) AS cum
+        FROM acid_recon_tank t WHERE t.date >= :d1
+    ) AS c
+    WHERE acid_recon_tank.date = c.date AND acid_recon_tank.tank_id = c.tank_id
+    """,
+    """
+    UPDATE acid_recon_block SET cum_imbalance_t = c.cum
+    FROM (
+        SELECT b.date, b.block_id, SUM(b.imbalance_t) OVER (PARTITION BY b.block_id ORDER BY b.date)
+               + COALESCE((SELECT p.cum_imbalance_t FROM acid_recon_block p
+                           WHERE p.block_id = b.block_id AND p.date < :d1
+                           ORDER BY p.date DESC LIMIT 1), 0) AS cum
+        FROM acid_recon_block b WHERE b.date >= :d1
+    ) AS c
+    WHERE acid_recon_block.date = c.date AND acid_recon_block.block_id = c.block_id
+    """,
+)
+
+def _setting_float(con: sqlite3.Connection, key: str, default: float, override: float | None = None) -> float:
+    """Числовая настройка из settings; override (аргумент вызова) важнее, default — если ключа нет."""
+    if override is not None:
+        return float(override)
+    row = con.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return default
+    try:
+        return float(row["value"])
+    except (TypeError, ValueError):
+        raise ValidationError(f"setting {key} must be a number, got {row['value']!r}")
+
+def _detach(value):
+    """Копия закэшированного результата, чтобы вызывающий не испортил кэш."""
+    if isinstance(value, list):
+        return [_detach(v) for v in value]
+    if isinstance(value, dict):
+        return dict(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.replace(value)
+    return value
+
+def _asof_grid_args(block_ids, dates) -> tuple[list[int], list[str]]:
+    ids = sorted({int(b) for b in block_ids})
+    days = sorted({str(d)[:10] for d in dates})
+    return ids, days
+
+def _asof_pick(series: tuple[list, list] | None, day: str):
+    """Последнее значение с датой ≤ day; серия отсортирована по (day, id)."""
+    if not series:
+        return None
+    days, values = series
+    i = bisect.bisect_right(days, day)
+    return values[i - 1] if i else None
+
 def _require_non_empty(name: str, value: str) -> str:
     s = (value or "").strip()
     if not s:
@@ -62,27 +381,352 @@ def _require_positive_int(name: str, value: int) -> int:
 # Класс доступа к БД
 # -------------------------------------------------------------------
 class Database:
-    """Простой DAO поверх SQLite. Без внешних зависимостей."""
-
-    def __init__(self, db_path: str | None = None) -> None:
+    """
+    Простой DAO поверх SQLite. Без внешних зависимостей.
+
+    По умолчанию методы берут соединения из пула (WAL, synchronous=NORMAL,
+    настраиваемые cache_size/mmap_size — см. PoolConfig); pooled=False включает
+    прежний режим «новое соединение на каждый вызов».
+    Пул закрывается через close() или при выходе из with Database(...) as db.
+
+    Для многопользовательской работы — PoolConfig.concurrent(): чтения (отчёты,
+    as-of, list_*/iter_*) идут через отдельные read-only соединения и в WAL
+    не мешают вводу данных; оператор, упавший на SQLITE_BUSY в начале
+    транзакции, повторяется с экспоненциальной паузой (busy_retries/busy_backoff).
+
+    row_mode задаёт, что возвращают list_*/get_* методы: "dict" (по умолчанию),
+    "row" (sqlite3.Row) или "typed" (dataclass из core.models со __slots__).
+
+    Справочные выборки (блоки, скважины блока, id баков, интервалы режимов)
+    кэшируются в LRU с TTL (см. core/db/cache.py) и сбрасываются записями DAO;
+    cache=False отключает кэш, cache=CacheConfig(...) задаёт лимиты.
+    Изменения в обход DAO видны после TTL или invalidate_cache().
+
+    instrument=True (или PerfConfig) включает учёт всех операторов по шаблонам:
+    stats(), лог медленных с планом (логгер core.db.perf), снимки в perf_log.
+
+    Изменяющие методы (_AUDITED) пишут audit_log через фоновую очередь (core/db/audit.py):
+    пакетами, без лишних commit в вызове; внутри внешней транзакции — только после её
+    фиксации. Пользователь — audit_user(uid); audit=False выключает, AuditConfig настраивает.
+    close() дописывает очередь; flush_audit() — дождаться записи, не закрывая.
+    """
+
+    def __init__(self, db_path: str | None = None, *, pooled: bool = True,
+                 pool_config: PoolConfig | None = None, row_mode: str = "dict",
+                 cache: CacheConfig | bool = True, instrument: PerfConfig | bool = False,
+                 audit: AuditConfig | bool = True) -> None:
+        if row_mode not in ROW_MODES:
+            raise ValidationError(f"row_mode must be one of {ROW_MODES}, got {row_mode!r}")
         self.db_path = db_path or DEFAULT_DB
+        self.pooled = pooled
+        self.row_mode = row_mode
+        perf_cfg = instrument if isinstance(instrument, PerfConfig) else PerfConfig(enabled=bool(instrument))
+        self._perf = PerfRecorder(perf_cfg) if perf_cfg.enabled else None
+        self._perf_stop: threading.Event | None = None
+        conn_kw = {"factory": InstrumentedConnection, "on_open": self._attach_perf} if self._perf else {}
+
+        cfg = pool_config or PoolConfig()
+        self._cached_statements = int(cfg.cached_statements)
+        self._busy_retries = max(0, int(cfg.busy_retries))
+        self._busy_backoff = float(cfg.busy_backoff)
+        self._pool = ConnectionPool(self.db_path, cfg, _row_factory, **conn_kw) if pooled else None
+        self._read_pool = None
+        if pooled and cfg.read_size > 0:
+            self._read_pool = ConnectionPool(self.db_path, cfg, _row_factory, readonly=True, **conn_kw)
+            with self._pool.acquire():  # режим журнала (WAL) задаёт пишущее соединение — до читателей
+                pass
+        self._well_modes = ModeIntervalIndex("well_mode_history", "well_id")
+        self._block_modes = ModeIntervalIndex("block_mode_history", "block_id")
+        self._mode_indexes = {i.table: i for i in (self._well_modes, self._block_modes)}
+        self._calib = CalibrationCache()
+        self._geometry = GeometryCache()
+        self._cache = EntityCache(cache if isinstance(cache, CacheConfig) else CacheConfig(enabled=bool(cache)))
+        self._local = threading.local()
+        audit_cfg = audit if isinstance(audit, AuditConfig) else AuditConfig(enabled=bool(audit))
+        self._audit = AuditWriter(self.db_path, audit_cfg) if audit_cfg.enabled else None
 
     def connect(self) -> sqlite3.Connection:
-        con = sqlite3.connect(self.db_path)
+        """Отдельное (не пуловое) соединение; закрывать его должен вызывающий."""
+        factory = InstrumentedConnection if self._perf is not None else sqlite3.Connection
+        con = sqlite3.connect(self.db_path, factory=factory, cached_statements=self._cached_statements)
         con.row_factory = _row_factory
         con.execute("PRAGMA foreign_keys = ON;")
+        self._attach_perf(con)
         return con
 
+    def _attach_perf(self, con: sqlite3.Connection) -> None:
+        if self._perf is not None:
+            con.perf = self._perf
+
+    @contextmanager
+    def _conn(self, readonly: bool = False):
+        """
+        Соединение для одного вызова DAO: из пула или одноразовое.
+        readonly=True — из пула читателей, если он настроен и поток не держит
+        пишущее соединение (иначе читаем в своей же транзакции, видя свои изменения).
+        """
+        pool = self._pool
+        if readonly and self._read_pool is not None and pool.held() is None:
+            pool = self._read_pool
+        if pool is not None:
+            outermost = pool is self._pool and pool.held() is None
+            try:
+                with pool.acquire() as con:
+                    yield con
+            except PoolTimeoutError as e:
+                raise DaoError(str(e))
+            except BaseException:
+                if outermost:
+                    self._local.audit = None  # транзакция откатилась — записей не было
+                raise
+            else:
+                if outermost:
+                    self._flush_audit()
+            finally:
+                if outermost:
+                    self._flush_invalidations()
+            return
+        con = self.connect()
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    # ----------------------------------------------------------------
+    # Кэш справочных данных
+    # ----------------------------------------------------------------
+    def _in_write_tx(self) -> bool:
+        return self._pool is not None and self._pool.held() is not None
+
+    def _cached(self, entity: str, key, load):
+        """
+        Read-through: значение из кэша или load() с сохранением.
+        Внутри пишущей транзакции кэш не читается и не пополняется —
+        там могут быть ещё не зафиксированные изменения. Если за время load()
+        сущность сбросили (чужой commit), прочитанное значение в кэш не кладём.
+        """
+        if not self._cache.enabled or self._in_write_tx():
+            return load()
+        value = self._cache.get(entity, key, _NOT_CACHED)
+        if value is _NOT_CACHED:
+            generation = self._cache.generation(entity)
+            value = load()
+            self._cache.put(entity, key, value, generation)
+        return _detach(value)
+
+    def _invalidate(self, entity: str, *key) -> None:
+        """
+        Сброс записи (или всей сущности) после записи в БД. Если запись сделана
+        внутри внешней транзакции, сброс повторяется после её завершения:
+        другой поток мог успеть закэшировать ещё старое значение.
+        """
+        self._drop(entity, key)
+        if self._in_write_tx():
+            pending = getattr(self._local, "pending", None)
+            if pending is None:
+                pending = self._local.pending = []
+            pending.append((entity, key))
+
+    def _drop(self, entity: str, key: tuple) -> None:
+        """Собственно сброс: записи EntityCache и связанные in-process индексы."""
+        if entity == "calibration":
+            self._calib.invalidate(*key)
+            return
+        if entity == "geometry":
+            self._geometry.invalidate(*key)
+            return
+        self._cache.invalidate(entity, *key)
+        if entity == "wells":
+            self._geometry.invalidate_wells()
+        if entity == "modes":  # индекс интервалов мог перечитаться до фиксации
+            self._mode_indexes[key[0]].invalidate()
+
+    def _flush_invalidations(self) -> None:
+        pending = getattr(self._local, "pending", None)
+        if pending:
+            self._local.pending = None
+            for entity, key in pending:
+                self._drop(entity, key)
+
+    def invalidate_cache(self, entity: str | None = None) -> None:
+        """Сбросить кэш (целиком или по сущности), если данные менялись в обход DAO."""
+        self._cache.invalidate(entity)
+        if entity in (None, "modes"):
+            self._well_modes.invalidate()
+            self._block_modes.invalidate()
+        if entity in (None, "geometry"):
+            self._geometry.invalidate()
+        if entity in (None, "calibration"):
+            self._calib.invalidate()
+
+    def cache_stats(self) -> dict[str, dict]:
+        """{сущность: {"size", "hits", "misses", "evictions"}}."""
+        return self._cache.stats()
+
+    # ----------------------------------------------------------------
+    # Аудит изменяющих вызовов (audit_log, см. core/db/audit.py и _AUDITED)
+    # ----------------------------------------------------------------
+    @contextmanager
+    def audit_user(self, user_id: int | None):
+        """Записи аудита внутри блока with идут от имени user_id (contextvar: видно и в AsyncDatabase)."""
+        token = _audit_user.set(user_id)
+        try:
+            yield
+        finally:
+            _audit_user.reset(token)
+
+    def flush_audit(self, timeout: float | None = None) -> bool:
+        """Дождаться записи в audit_log всего, что уже в очереди."""
+        return self._audit.flush(timeout) if self._audit is not None else True
+
+    def audit_stats(self) -> dict[str, int]:
+        """{"queued", "written", "dropped", "failed", "batches", "pending"}; пустой, если аудит выключен."""
+        return self._audit.stats() if self._audit is not None else {}
+
+    def _record_audit(self, item: tuple) -> None:
+        # внутри внешней транзакции — только после её фиксации (см. _conn)
+        if self._in_write_tx():
+            pending = getattr(self._local, "audit", None)
+            if pending is None:
+                pending = self._local.audit = []
+            pending.append(item)
+        else:
+            self._audit.record(*item)
+
+    def _flush_audit(self) -> None:
+        pending = getattr(self._local, "audit", None)
+        if pending:
+            self._local.audit = None
+            for item in pending:
+                self._audit.record(*item)
+
+    # ----------------------------------------------------------------
+    # Статистика запросов
+    # ----------------------------------------------------------------
+    def stats(self, reset: bool = False) -> dict[str, dict]:
+        """
+        Снимок по шаблонам операторов: {sql: {"count", "total_ms", "avg_ms", "p95_ms",
+        "max_ms", "rows"}}; пустой, если инструментирование выключено.
+        """
+        return self._perf.snapshot(reset) if self._perf is not None else {}
+
+    def dump_perf_log(self, reset: bool = True) -> int:
+        """Записывает текущий снимок stats() в perf_log (014) и по умолчанию обнуляет счётчики."""
+        snap = self.stats(reset)
+        if not snap:
+            return 0
+        rows = [(t, s["count"], s["total_ms"], s["avg_ms"], s["p95_ms"], s["max_ms"], s["rows"])
+                for t, s in snap.items()]
+        with self._conn() as con:
+            try:
+                con.executemany(
+                    "INSERT INTO perf_log(template, count, total_ms, avg_ms, p95_ms, max_ms, rows) "
+                    "VALUES(?,?,?,?,?,?,?)", rows)
+            except sqlite3.OperationalError as e:
+                raise _map_operational_error(e)
+        return len(rows)
+
+    def start_perf_log(self, interval_s: float = 60.0) -> None:
+        """Фоновый поток, раз в interval_s сбрасывающий статистику в perf_log; останавливается close()."""
+        if self._perf is None:
+            raise ValidationError("instrumentation is disabled (Database(instrument=True))")
+        if self._perf_stop is not None:
+            return
+        stop = self._perf_stop = threading.Event()
+
+        def loop() -> None:
+            while not stop.wait(interval_s):
+                try:
+                    self.dump_perf_log()
+                except DaoError as e:
+                    perf_log.warning("perf_log dump failed: %s", e)
+        threading.Thread(target=loop, name="perf-log", daemon=True).start()
+
+    def close(self) -> None:
+        if self._audit is not None:
+            self._audit.close()  # дописать очередь аудита до закрытия
+        if self._perf_stop is not None:
+            self._perf_stop.set()
+            self._perf_stop = None
+        if self._pool is not None:
+            self._pool.close()
+        if self._read_pool is not None:
+            self._read_pool.close()
+
+    def __enter__(self) -> "Database":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
     # Унифицированный запуск запросов с аккуратной обработкой ошибок
     def _exec(self, con: sqlite3.Connection, sql: str, params=()):
+        # Повторять безопасно только первый оператор транзакции: откат ничего
+        # не теряет. Внутри начатой транзакции BusyError уходит вызывающему.
+        fresh = not con.in_transaction
+        attempt = 0
+        while True:
+            try:
+                return con.execute(sql, params)
+            except sqlite3.IntegrityError as e:
+                raise _map_integrity_error(e)
+            except sqlite3.OperationalError as e:
+                err = _map_operational_error(e)
+                if not (isinstance(err, BusyError) and fresh and attempt < self._busy_retries):
+                    raise err
+                if con.in_transaction:
+                    con.rollback()
+                time.sleep(self._busy_backoff * (2 ** attempt))
+                attempt += 1
+            except sqlite3.Error as e:
+                raise DaoError(str(e))
+
+    def _select(self, con: sqlite3.Connection, sql: str, params=(), model: type | None = None):
+        """
+        SELECT для публичных list_*/get_* методов с учётом row_mode.
+        Внутренняя логика DAO по-прежнему работает со словарями через _exec.
+        """
+        cur = con.cursor()
+        if self.row_mode == "typed" and model is not None:
+            cur.row_factory = None
+        elif self.row_mode == "row":
+            cur.row_factory = sqlite3.Row
         try:
-            return con.execute(sql, params)
-        except sqlite3.IntegrityError as e:
-            raise _map_integrity_error(e)
+            cur.execute(sql, params)
         except sqlite3.OperationalError as e:
             raise _map_operational_error(e)
         except sqlite3.Error as e:
             raise DaoError(str(e))
+        if cur.row_factory is None:
+            return typed_rows(cur, model)
+        return cur
+
+    def _iter_keyset(self, table: str, where: str, params: tuple, model: type,
+                     batch_size: int, id_from: int = 0, id_to: int | None = None):
+        """
+        Потоковая выборка страницами по batch_size строк с keyset-пагинацией по id
+        (WHERE id > последний_id ORDER BY id LIMIT n) — без OFFSET и без удержания
+        соединения между страницами: генератор можно прервать в любой момент.
+        """
+        batch_size = _require_positive_int("batch_size", batch_size)
+        sql = _keyset_sql(table, where, id_to is not None)
+
+        def pages():
+            last = id_from
+            while True:
+                args = params + (last,) + ((id_to,) if id_to is not None else ()) + (batch_size,)
+                with self._conn(readonly=True) as con:
+                    page = list(self._select(con, sql, args, model))
+                if not page:
+                    return
+                yield from page
+                if len(page) < batch_size:
+                    return
+                tail = page[-1]
+                last = tail.id if isinstance(tail, model) else tail["id"]
+
+        return pages()
 
     # ----------------------------------------------------------------
     # Blocks
@@ -113,20 +757,33 @@ class Database:
             }
         except Exception as e:
             raise ValidationError(f"Invalid block parameters: {e}")
+        shape = self._parse_shape(params["shape_wkt"])
 
-        with self.connect() as con:
+        with self._conn() as con:
             cur = self._exec(con, sql, params)
-            return cur.lastrowid
-
-
-    def get_block_by_no(self, block_no: str) -> dict | None:
-        with self.connect() as con:
-            cur = con.execute("SELECT * FROM blocks WHERE block_no = ?", (block_no,))
-            return cur.fetchone()
-
-    def list_blocks(self) -> list[dict]:
-        with self.connect() as con:
-            return list(con.execute("SELECT * FROM blocks ORDER BY id"))
+            block_id = cur.lastrowid
+            self._index_block_shape(con, block_id, shape)
+        self._invalidate("blocks")
+        self._invalidate("geometry", block_id)
+        return block_id
+
+
+    def get_block_by_no(self, block_no: str) -> dict | Block | None:
+        def load():
+            with self._conn(readonly=True) as con:
+                rows = self._select(con, "SELECT * FROM blocks WHERE block_no = ?", (block_no,), Block)
+                return next(iter(rows), None)
+        return self._cached("blocks", ("no", block_no), load)
+
+    def list_blocks(self) -> list[dict] | list[Block]:
+        def load():
+            with self._conn(readonly=True) as con:
+                return list(self._select(con, "SELECT * FROM blocks ORDER BY id", (), Block))
+        return self._cached("blocks", ("all",), load)
+
+    def iter_blocks(self, batch_size: int = 1000):
+        """Как list_blocks(), но потоково (страницы по batch_size)."""
+        return self._iter_keyset("blocks", "1", (), Block, batch_size)
 
     # ----------------------------------------------------------------
     # Wells
@@ -169,14 +826,137 @@ class Database:
         except Exception as e:
             raise ValidationError(f"Invalid well parameters: {e}")
 
-        with self.connect() as con:
+        with self._conn() as con:
             cur = self._exec(con, sql, params)
-            return cur.lastrowid
+            well_id = cur.lastrowid
+        self._invalidate("wells", block_id)
+        return well_id
 
 
-    def list_wells_by_block(self, block_id: int) -> list[dict]:
-        with self.connect() as con:
-            return list(con.execute("SELECT * FROM wells WHERE block_id=? ORDER BY id", (block_id,)))
+    def list_wells_by_block(self, block_id: int) -> list[dict] | list[Well]:
+        def load():
+            with self._conn(readonly=True) as con:
+                return list(self._select(con, "SELECT * FROM wells WHERE block_id=? ORDER BY id", (block_id,), Well))
+        return self._cached("wells", block_id, load)
+
+    def iter_wells_by_block(self, block_id: int, batch_size: int = 1000):
+        """Как list_wells_by_block(), но потоково (страницы по batch_size)."""
+        return self._iter_keyset("wells", "block_id = ?", (block_id,), Well, batch_size)
+
+    # ----------------------------------------------------------------
+    # Пространственные запросы (wells_rtree / blocks_rtree, 018)
+    # ----------------------------------------------------------------
+    @staticmethod
+    def _parse_shape(shape_wkt):
+        try:
+            return parse_wkt(shape_wkt)
+        except ValueError as e:
+            raise ValidationError(f"Invalid shape_wkt: {e}")
+
+    def _index_block_shape(self, con: sqlite3.Connection, block_id: int, shape) -> None:
+        if shape is not None:
+            self._exec(con, "INSERT OR REPLACE INTO blocks_rtree(id, min_x, max_x, min_y, max_y) VALUES(?,?,?,?,?)",
+                       (block_id, *shape.bbox))
+
+    def set_block_shape(self, block_id: int, shape_wkt: str | None) -> None:
+        """Новый контур блока (WKT POLYGON/MULTIPOLYGON; пустой — убрать из индекса)."""
+        shape = self._parse_shape(shape_wkt)
+        with self._conn() as con:
+            cur = self._exec(con, "UPDATE blocks SET shape_wkt = ? WHERE id = ?", (shape_wkt or "", block_id))
+            if cur.rowcount == 0:
+                raise ValidationError(f"block {block_id} does not exist")
+            self._index_block_shape(con, block_id, shape)
+        self._invalidate("blocks")
+        self._invalidate("geometry", block_id)
+
+    def sync_spatial_index(self) -> dict:
+        """
+        Дописывает в blocks_rtree контуры, которых там нет: блоки, загруженные
+        в обход DAO, и правки shape_wkt сырым SQL (триггер 018 убирает старый габарит).
+        Вызывается сам при первом пространственном запросе и после invalidate_cache().
+        Возвращает {"indexed", "invalid": [block_id, ...]} — битые WKT в индекс не попадают.
+        """
+        indexed, invalid = 0, []
+        with self._conn() as con:
+            for r in self._exec(con, _BLOCKS_UNINDEXED_SQL).fetchall():
+                try:
+                    shape = parse_wkt(r["shape_wkt"])
+                except ValueError as e:
+                    spatial_log.warning("block %s: invalid shape_wkt skipped: %s", r["id"], e)
+                    invalid.append(r["id"])
+                    continue
+                self._index_block_shape(con, r["id"], shape)
+                indexed += shape is not None
+        if not self._in_write_tx():  # во внешней транзакции индекс ещё может откатиться
+            self._geometry.synced = True
+        return {"indexed": indexed, "invalid": invalid}
+
+    def block_at(self, x: float, y: float) -> int | None:
+        """Блок, контур которого содержит точку (при перекрытии — с меньшим id); None — вне блоков."""
+        if not self._geometry.synced:
+            self.sync_spatial_index()
+        cached = not self._in_write_tx()
+        with self._conn(readonly=True) as con:
+            for r in self._exec(con, _BLOCKS_AT_SQL, (x, x, y, y)).fetchall():
+                shape = self._geometry.get(con, r["id"], cached)
+                if shape is not None and shape.contains(x, y):
+                    return r["id"]
+        return None
+
+    def wells_within(self, x: float, y: float, radius: float, well_type: str | None = None) -> list[dict]:
+        """
+        Скважины не дальше radius от точки, по возрастанию расстояния:
+        [{"id", "block_id", "well_no", "type", "coord_x", "coord_y", "distance_m"}].
+        """
+        if radius < 0:
+            raise ValidationError("radius must be >= 0.")
+        with self._conn(readonly=True) as con:
+            return [_well_hit(r) for r in self._wells_within(con, x, y, radius, well_type)]
+
+    def _wells_within(self, con: sqlite3.Connection, x: float, y: float, r: float, well_type: str | None):
+        if well_type is None:
+            return self._exec(con, _WELLS_WITHIN_SQL, {"x": x, "y": y, "r": r}).fetchall()
+        return self._exec(con, _WELLS_WITHIN_TYPE_SQL, {"x": x, "y": y, "r": r, "type": well_type}).fetchall()
+
+    def nearest_wells(self, well_id: int, k: int = 5, well_type: str | None = "VR",
+                      date: str | None = None) -> list[dict]:
+        """
+        k ближайших к скважине well_id скважин (сама не входит) — по умолчанию VR
+        для PR-скважины. С date отбор по режиму на дату (интервалы режимов,
+        без интервала — wells.type), иначе по wells.type; well_type=None — любые.
+        Радиус поиска по R-tree растёт вдвое, пока не наберётся k; последний
+        проход — без ограничения, так что ответ точен при любом габарите.
+        """
+        k = _require_positive_int("k", k)
+        with self._conn(readonly=True) as con:
+            origin = self._exec(con, "SELECT coord_x, coord_y FROM wells WHERE id = ?", (well_id,)).fetchone()
+            if origin is None:
+                raise ValidationError(f"well {well_id} does not exist")
+            x, y = origin["coord_x"], origin["coord_y"]
+            if x is None or y is None:
+                raise ValidationError(f"well {well_id} has no coordinates.")
+            extent = self._geometry.wells_extent if not self._in_write_tx() else None
+            if extent is None:
+                extent = self._exec(con, _WELLS_EXTENT_SQL).fetchone()
+                if not self._in_write_tx():
+                    self._geometry.wells_extent = extent
+            if not extent["n"]:
+                return []
+            width, height = extent["max_x"] - extent["min_x"], extent["max_y"] - extent["min_y"]
+            reach = math.hypot(width, height)
+            # радиус, в котором при равномерной плотности ожидается ~2k скважин
+            r = max(math.sqrt(2 * (k + 1) * max(width * height, 1.0) / (math.pi * extent["n"])), 1.0)
+            by_type = well_type if date is None else None
+            while True:
+                if r >= reach:
+                    r = math.inf
+                hits = [h for h in self._wells_within(con, x, y, r, by_type) if h["id"] != well_id]
+                if date is not None and well_type is not None:
+                    modes = self.modes_of_wells_on(date, [h["id"] for h in hits])
+                    hits = [h for h in hits if (modes[h["id"]] or h["type"]) == well_type]
+                if len(hits) >= k or r == math.inf:
+                    return [_well_hit(h) for h in hits[:k]]
+                r *= 2
 
     # ----------------------------------------------------------------
     # Modes (well / block)
@@ -184,90 +964,394 @@ class Database:
     def add_well_mode_interval(self, well_id: int, mode: str, date_from: str,
                                date_to: str | None = None, note: str | None = None):
         sql = "INSERT INTO well_mode_history(well_id, mode, date_from, date_to, note) VALUES(?,?,?,?,?)"
-        with self.connect() as con:
+        with self._conn() as con:
             self._exec(con, sql, (well_id, mode, date_from, date_to, note))
+        self._invalidate("modes", self._well_modes.table)
 
     def mode_of_well_on(self, well_id: int, date: str) -> str | None:
         """
         Режим скважины на дату (включительно) без view.
         Сравниваем даты как ISO-текст; поддерживает значения с временем.
+        Ответ берётся из in-process индекса интервалов (см. core/db/intervals.py).
         """
-        sql = """
-        SELECT mode
-        FROM well_mode_history
-        WHERE well_id = ?
-        AND substr(date_from,1,10) <= ?
-        AND (date_to IS NULL OR substr(date_to,1,10) >= ?)
-        ORDER BY substr(date_from,1,10) DESC, id DESC
-        LIMIT 1
-        """
-        with self.connect() as con:
-            row = con.execute(sql, (well_id, date, date)).fetchone()
-            return row["mode"] if row else None
-
-
-
-
+        return self._well_modes.mode_on(self._mode_index(self._well_modes), well_id, date)
 
+    def modes_of_wells_on(self, date: str, well_ids=None) -> dict[int, str | None]:
+        """
+        Режимы всех скважин на дату: {well_id: mode}.
+        Без well_ids — только скважины, у которых есть интервал на эту дату;
+        с well_ids — ровно эти ключи, None там, где режима нет.
+        """
+        return self._well_modes.modes_on(self._mode_index(self._well_modes), date, well_ids)
 
     def add_block_mode_interval(self, block_id: int, mode: str, date_from: str,
                                 date_to: str | None = None, note: str | None = None):
         sql = "INSERT INTO block_mode_history(block_id, mode, date_from, date_to, note) VALUES(?,?,?,?,?)"
-        with self.connect() as con:
+        with self._conn() as con:
             self._exec(con, sql, (block_id, mode, date_from, date_to, note))
+        self._invalidate("modes", self._block_modes.table)
 
     def mode_of_block_on(self, block_id: int, date: str) -> str | None:
-        sql = """
-        SELECT mode
-        FROM block_mode_history
-        WHERE block_id = ?
-        AND substr(date_from,1,10) <= ?
-        AND (date_to IS NULL OR substr(date_to,1,10) >= ?)
-        ORDER BY substr(date_from,1,10) DESC, id DESC
-        LIMIT 1
-        """
-        with self.connect() as con:
-            row = con.execute(sql, (block_id, date, date)).fetchone()
-            return row["mode"] if row else None
-
-
-
-
+        return self._block_modes.mode_on(self._mode_index(self._block_modes), block_id, date)
+
+    def invalidate_mode_index(self) -> None:
+        """Сбросить индексы режимов, если история менялась в обход DAO (другой процесс, ручной SQL)."""
+        self.invalidate_cache("modes")
+
+    def _mode_index(self, index: ModeIntervalIndex) -> dict:
+        cacheable = self._cache.enabled and not self._in_write_tx()
+        if cacheable:
+            data = self._cache.get("modes", index.table, _NOT_CACHED)
+            if data is not _NOT_CACHED:
+                return data
+            index.invalidate()  # истёк TTL или сброс — перечитать историю
+            generation = self._cache.generation("modes")
+        data = index.snapshot()
+        if data is None:
+            with self._conn(readonly=True) as con:
+                data = index.ensure(con)
+        # устаревшую загрузку (индекс сбросили, пока она шла) в кэш на весь TTL не кладём
+        if cacheable and index.snapshot() is data:
+            self._cache.put("modes", index.table, data, generation)
+        return data
 
     # ----------------------------------------------------------------
     # Daily readings
     # ----------------------------------------------------------------
-    def insert_daily_reading(self, dr: dict) -> int:
+    def insert_daily_reading(self, dr: dict, *, derive_prev: bool = False) -> int:
         """
         Вставка суточных показаний по скважине.
         Часть полей имеет дефолт 0.0, чтобы упрощать ввод.
+        derive_prev=True — pr_counter_prev_eff берётся из последнего ненулевого показания
+        скважины до этой даты (или из события счётчика между ними, см. add_pr_counter_event);
+        переданное значение остаётся только для первого показания скважины. Если строка
+        вставлена в середину истории, следующие показания скважины пересчитываются.
         """
-        fields = ("date, block_id, well_id, pr_counter_prev_eff, pr_counter_curr, pr_hours, pr_downtime_h, "
-                  "vr_volume_m3, vr_hours, vr_downtime_h, rvr_type_id, comment, status")
-        placeholders = ",".join("?" for _ in fields.split(","))
-        sql = f"INSERT INTO daily_readings({fields}) VALUES({placeholders})"
-        values = (
-            dr.get("date"), dr.get("block_id"), dr.get("well_id"),
-            dr.get("pr_counter_prev_eff", 0.0), dr.get("pr_counter_curr", 0.0),
-            dr.get("pr_hours", 0.0), dr.get("pr_downtime_h", 0.0),
-            dr.get("vr_volume_m3", 0.0), dr.get("vr_hours", 0.0), dr.get("vr_downtime_h", 0.0),
-            dr.get("rvr_type_id"), dr.get("comment"), dr.get("status", "draft"),
-        )
-        with self.connect() as con:
-            cur = self._exec(con, sql, values)
+        with self._conn() as con:
+            if derive_prev and dr.get("pr_counter_curr") and dr.get("well_id") is not None:
+                dr = {**dr, "pr_counter_prev_eff": self._derive_prev_eff(con, dr)}
+            cur = self._exec(con, _DR_INSERT_SQL, _daily_reading_values(dr))
+            if derive_prev and self._exec(con, _PRC_LATER_SQL, (dr["well_id"], dr["date"])).fetchone():
+                self._repair_pr_counters(con, dr["date"], _PRC_OPEN_END, [dr["well_id"]])
             return cur.lastrowid
 
+    def _derive_prev_eff(self, con: sqlite3.Connection, dr: dict) -> float:
+        """Эффективное предыдущее показание для одной строки: два поиска по индексу (well_id, date)."""
+        cur = con.cursor()
+        cur.row_factory = None
+        prev = cur.execute(_PRC_PREV_SQL, (dr["well_id"], dr["date"])).fetchone()
+        event = cur.execute(_PRC_EVENT_SQL, (dr["well_id"], dr["date"], prev[0] if prev else "")).fetchone()
+        if event is not None:
+            return event[1] if event[0] == "replacement" else 0.0
+        if prev is not None:
+            return prev[1]
+        return dr.get("pr_counter_prev_eff", 0.0)
+
+    def repair_pr_counters(self, date_from: str, date_to: str | None = None, well_ids=None) -> int:
+        """
+        Пересчитывает pr_counter_prev_eff за период (date_to=None — до конца истории)
+        из предыдущего ненулевого показания скважины с учётом событий счётчика —
+        один оконный проход вместо поиска на каждую строку; для дозагрузки задним числом
+        и после правки показаний. Первое показание скважины и сутки без счётчика не трогает.
+        Возвращает число изменённых строк.
+        """
+        date_to = date_to or _PRC_OPEN_END
+        if date_from > date_to:
+            raise ValidationError("date_from must be <= date_to.")
+        with self._conn() as con:
+            return self._repair_pr_counters(con, date_from, date_to, well_ids)
+
+    def _repair_pr_counters(self, con: sqlite3.Connection, date_from: str, date_to: str, well_ids=None) -> int:
+        if well_ids is None:
+            self._exec(con, _PRC_CARRY_SQL, (date_from, date_to))
+            return len(self._exec(con, _PRC_REPAIR_SQL, (date_from, date_from, date_to)).fetchall())
+        updated = 0
+        ids = sorted({int(w) for w in well_ids})
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            self._exec(con, _in_sql(_PRC_CARRY_WELLS_SQL, len(chunk)), (date_from, date_to, *chunk))
+            updated += len(self._exec(con, _in_sql(_PRC_REPAIR_WELLS_SQL, len(chunk)),
+                                      (date_from, *chunk, date_from, date_to, *chunk)).fetchall())
+        return updated
+
+    def add_pr_counter_event(self, well_id: int, date: str, kind: str, new_start: float = 0.0,
+                             capacity: float | None = None, note: str | None = None) -> int:
+        """
+        Событие счётчика PR: 'replacement' (замена, new_start — показание нового счётчика)
+        или 'rollover' (переполнение, capacity — разрядность: остаток старого круга
+        пишется в carry_m3 и входит в pr_m3 показания за эту дату, поэтому date —
+        день первого показания нового круга). Показания скважины с этой даты сразу пересчитываются.
+        """
+        if kind not in ("replacement", "rollover"):
+            raise ValidationError("kind must be 'replacement' or 'rollover'.")
+        date = _require_non_empty("date", date)
+        with self._conn() as con:
+            cur = self._exec(con, "INSERT INTO pr_counter_events(well_id, date, kind, new_start, capacity, note) "
+                                  "VALUES(?,?,?,?,?,?)", (well_id, date, kind, new_start, capacity, note))
+            self._repair_pr_counters(con, date, _PRC_OPEN_END, [well_id])
+            return cur.lastrowid
+
+    def list_pr_counter_events(self, well_id: int | None = None) -> list[dict]:
+        sql, params = "SELECT * FROM pr_counter_events", ()
+        if well_id is not None:
+            sql, params = sql + " WHERE well_id = ?", (well_id,)
+        with self._conn(readonly=True) as con:
+            return list(self._exec(con, sql + " ORDER BY well_id, date", params))
+
+    def insert_daily_readings_bulk(self, rows, batch_size: int = 1000, upsert: bool = False,
+                                   derive_prev: bool = False) -> dict:
+        """
+        Потоковая массовая загрузка суточных показаний.
+        rows — любой итерируемый источник dict (список, генератор, чтение файла);
+        строки забираются пачками по batch_size и пишутся одним executemany,
+        каждая пачка — отдельная транзакция. Внутри чужой транзакции (вложенный
+        _conn(), run_in_transaction) пачки — только savepoint'ы, фиксирует внешний уровень.
+        upsert=True — при совпадении UNIQUE(date, well_id) обновляем строку.
+        Если пачка падает, она откатывается до savepoint и перезаливается построчно,
+        чтобы плохие строки попали в отчёт, а хорошие — в БД.
+        derive_prev=True — после загрузки pr_counter_prev_eff загруженных скважин
+        пересчитывается с самой ранней даты одним проходом (repair_pr_counters).
+        Возвращает {"total", "ok", "failed", "errors": [{"index", "row", "error"}]}.
+        """
+        batch_size = _require_positive_int("batch_size", batch_size)
+        sql = _DR_UPSERT_SQL if upsert else _DR_INSERT_SQL
+
+        report = {"total": 0, "ok": 0, "failed": 0, "errors": []}
+
+        def fail(idx, row, err) -> None:
+            report["failed"] += 1
+            report["errors"].append({"index": idx, "row": row, "error": err})
+
+        it = enumerate(rows)
+        touched: dict[int, str] = {}
+        # фиксировать пачки можно только в своей транзакции: commit во вложенном
+        # вызове зафиксировал бы и прежние записи вызывающего
+        owns_tx = self._pool is None or self._pool.held() is None
+        with self._conn() as con:
+            if not owns_tx and not con.in_transaction:
+                con.execute("BEGIN")  # иначе RELEASE первой пачки сам зафиксирует её
+            while True:
+                batch = list(itertools.islice(it, batch_size))
+                if not batch:
+                    break
+                report["total"] += len(batch)
+                prepared = []
+                for idx, dr in batch:
+                    try:
+                        if not dr.get("date") or dr.get("well_id") is None:
+                            raise ValidationError("date and well_id are required.")
+                        prepared.append((idx, dr, _daily_reading_values(dr)))
+                        if derive_prev and dr["date"] < touched.get(dr["well_id"], _PRC_OPEN_END):
+                            touched[dr["well_id"]] = dr["date"]
+                    except Exception as e:
+                        fail(idx, dr, str(e))
+
+                con.execute("SAVEPOINT dr_bulk")
+                try:
+                    con.executemany(sql, [v for _, _, v in prepared])
+                    report["ok"] += len(prepared)
+                except sqlite3.Error:
+                    con.execute("ROLLBACK TO dr_bulk")
+                    for idx, dr, values in prepared:
+                        try:
+                            self._exec(con, sql, values)
+                            report["ok"] += 1
+                        except DaoError as e:
+                            fail(idx, dr, f"{type(e).__name__}: {e}")
+                con.execute("RELEASE dr_bulk")
+                if owns_tx:
+                    con.commit()
+            if touched:
+                self._repair_pr_counters(con, min(touched.values()), _PRC_OPEN_END, list(touched))
+                if owns_tx:
+                    con.commit()
+        return report
+
+    def list_daily_readings(self, date_from: str, date_to: str,
+                            block_id: int | None = None) -> list[dict] | list[DailyReading]:
+        """Суточные показания за период [date_from; date_to], опционально по одному блоку."""
+        if block_id is None:
+            sql, params = _DR_LIST_SQL, (date_from, date_to)
+        else:
+            sql, params = _DR_LIST_BLOCK_SQL, (date_from, date_to, block_id)
+        with self._conn(readonly=True) as con:
+            return list(self._select(con, sql, params, DailyReading))
+
+    def iter_daily_readings(self, date_from: str, date_to: str, block_id: int | None = None,
+                            batch_size: int = 1000):
+        """
+        Потоковый вариант list_daily_readings() для выгрузок за годы: память постоянна.
+        Порядок — по id (порядок загрузки), а не по (date, well_id).
+        Диапазон id берётся один раз по индексу дат, дальше страницы идут
+        range-scan'ом по rowid; '+' у колонок не даёт планировщику уйти
+        в индекс с последующей сортировкой на каждой странице.
+        """
+        where, params, bounds_sql = "+date BETWEEN ? AND ?", (date_from, date_to), _DR_BOUNDS_SQL
+        if block_id is not None:
+            where += " AND +block_id = ?"
+            params += (block_id,)
+            bounds_sql = _DR_BOUNDS_BLOCK_SQL
+        with self._conn(readonly=True) as con:
+            bounds = self._exec(con, bounds_sql, params).fetchone()
+        if bounds["lo"] is None:
+            return iter(())
+        return self._iter_keyset("daily_readings", where, params, DailyReading, batch_size,
+                                 id_from=bounds["lo"] - 1, id_to=bounds["hi"])
+
+    def readings_to_arrays(self, date_from: str, date_to: str, block_ids=None,
+                           batch_size: int = 10000) -> dict:
+        """
+        Суточные показания за период колонками NumPy (нужен numpy):
+        {"date": datetime64[D], "block_id"/"well_id": int32, счётчики/объёмы/часы: float64},
+        порядок строк — (date, well_id). NULL в числовых колонках → 0.0 (как их считает SUM во VIEW).
+        Метрики v_daily_block_summary по любой группировке — core.db.arrays.summarize_readings.
+        """
+        _arrays.require_numpy()
+        batch_size = _require_positive_int("batch_size", batch_size)
+        params = (date_from, date_to)
+        with self._conn(readonly=True) as con:
+            if block_ids is None:
+                return self._array_query(con, _DR_ARRAYS_SQL.format(blocks=""), params, batch_size)
+            ids = sorted({int(b) for b in block_ids})
+            sql = _DR_ARRAYS_SQL.format(blocks=" AND dr.block_id IN ({ids})")
+            parts = []
+            for i in range(0, len(ids), _IN_CHUNK):
+                chunk = ids[i:i + _IN_CHUNK]
+                parts.append(self._array_query(con, _in_sql(sql, len(chunk)), (*params, *chunk), batch_size))
+            return _arrays.concat_columns(parts)
+
+    def _array_query(self, con: sqlite3.Connection, sql: str, params: tuple, batch_size: int) -> dict:
+        cur = con.cursor()
+        cur.row_factory = None  # кортежи: без dict на строку
+        try:
+            cur.execute(sql, params)
+        except sqlite3.OperationalError as e:
+            raise _map_operational_error(e)
+        try:
+            return _arrays.columns_from_cursor(cur, batch_size)
+        finally:
+            cur.close()
+
+    def validate_daily_readings(self, date_from: str, date_to: str | None = None, *, promote: bool = True,
+                                **overrides) -> dict:
+        """
+        Проверка суточных показаний за день (date_to=None) или период, целиком набором:
+        часы + простой ≤ лимита (settings validation.*.max_hours_per_day), счётчик PR
+        не меньше эффективного предыдущего и показания прошлых суток, VR только
+        в режиме VR на эту дату, ставки PR/VR без выбросов против скользящей медианы
+        скважины (validation.outlier.*). Правила — один SQL с оконной LAG и один
+        проход по истории (core/db/validation.py), без запросов на строку.
+        Нарушения периода перезаписываются в daily_reading_issues. promote=True:
+        draft без нарушений → validated, validated с нарушениями → draft (оба — одним UPDATE).
+        overrides — поля ValidationConfig (pr_max_hours, window_days, outlier_factor, ...).
+        Возвращает {"checked", "issues", "by_rule", "validated", "demoted"}.
+        """
+        date_to = date_to or date_from
+        if date_from > date_to:
+            raise ValidationError("date_from must be <= date_to.")
+        unknown = set(overrides) - {f.name for f in dataclasses.fields(_validation.ValidationConfig)}
+        if unknown:
+            raise ValidationError(f"unknown validation options: {sorted(unknown)}")
+        with self._conn() as con:
+            try:
+                cfg = _validation.ValidationConfig.from_settings(con, **overrides)
+            except ValueError as e:
+                raise ValidationError(str(e))
+            params = {"d1": date_from, "d2": date_to, "lo": _validation.lookback(date_from, cfg.window_days),
+                      "pr_max": cfg.pr_max_hours, "vr_max": cfg.vr_max_hours}
+            cur = con.cursor()
+            cur.row_factory = None
+            issues = cur.execute(_validation.CHECK_SQL, params).fetchall()
+            issues += _validation.outlier_issues(cur.execute(_validation.HISTORY_SQL, params), date_from, cfg)
+            self._exec(con, "DELETE FROM daily_reading_issues WHERE date BETWEEN ? AND ?", (date_from, date_to))
+            con.executemany(
+                "INSERT INTO daily_reading_issues(reading_id, rule, date, well_id, detail, value, limit_value) "
+                "VALUES(?,?,?,?,?,?,?)", issues)
+            checked = self._exec(con, "SELECT COUNT(*) AS n FROM daily_readings WHERE date BETWEEN ? AND ?",
+                                 (date_from, date_to)).fetchone()["n"]
+            validated = demoted = 0
+            if promote:
+                cur = self._exec(con, """
+                UPDATE daily_readings
+                SET status = CASE status WHEN 'draft' THEN 'validated' ELSE 'draft' END
+                WHERE date BETWEEN :d1 AND :d2
+                AND (
+                    (status = 'draft' AND NOT EXISTS
+                        (SELECT 1 FROM daily_reading_issues i WHERE i.reading_id = daily_readings.id))
+                    OR (status = 'validated' AND EXISTS
+                        (SELECT 1 FROM daily_reading_issues i WHERE i.reading_id = daily_readings.id))
+                )
+                RETURNING status
+                """, params)
+                for r in cur.fetchall():
+                    if r["status"] == "validated":
+                        validated += 1
+                    else:
+                        demoted += 1
+        by_rule = {rule: 0 for rule in _validation.RULES}
+        for issue in issues:
+            by_rule[issue[1]] += 1
+        return {"checked": checked, "issues": len(issues), "by_rule": by_rule,
+                "validated": validated, "demoted": demoted}
+
+    def list_reading_issues(self, date_from: str, date_to: str, rule: str | None = None) -> list[dict]:
+        """Нарушения из последней проверки периода (validate_daily_readings), по дате и скважине."""
+        sql = "SELECT * FROM daily_reading_issues WHERE date BETWEEN ? AND ?"
+        params: tuple = (date_from, date_to)
+        if rule is not None:
+            sql += " AND rule = ?"
+            params += (rule,)
+        with self._conn(readonly=True) as con:
+            return list(self._exec(con, sql + " ORDER BY date, well_id, rule", params))
+
     def daily_block_summary(self, date: str, block_id: int) -> dict | None:
-        with self.connect() as con:
+        """Сводка блока за сутки — из mv_daily_block_summary (ведётся триггерами, 013)."""
+        with self._conn(readonly=True) as con:
             cur = con.execute(
-                "SELECT * FROM v_daily_block_summary WHERE date=? AND block_id=?",
+                "SELECT * FROM mv_daily_block_summary WHERE date=? AND block_id=?",
                 (date, block_id),
             )
             return cur.fetchone()
 
+    def check_daily_block_summary(self, rebuild: bool = False, tol: float = 1e-9) -> list[dict]:
+        """
+        Сверяет mv_daily_block_summary с «живым» v_daily_block_summary.
+        Возвращает расхождения: [{"date", "block_id", "column", "stored", "expected"}]
+        (column="<missing>"/"<extra>" — строки нет в таблице / она лишняя).
+        rebuild=True после сверки перестраивает таблицу целиком из VIEW.
+        """
+        diffs: list[dict] = []
+        with self._conn(readonly=not rebuild) as con:
+            stored = {(r["date"], r["block_id"]): r for r in con.execute("SELECT * FROM mv_daily_block_summary")}
+            for exp in con.execute("SELECT * FROM v_daily_block_summary"):
+                key = (exp["date"], exp["block_id"])
+                got = stored.pop(key, None)
+                if got is None:
+                    diffs.append({"date": key[0], "block_id": key[1], "column": "<missing>",
+                                  "stored": None, "expected": exp})
+                    continue
+                for col, ev in exp.items():
+                    gv = got[col]
+                    if gv == ev:
+                        continue
+                    if isinstance(gv, (int, float)) and isinstance(ev, (int, float)) \
+                            and abs(gv - ev) <= tol * max(1.0, abs(ev)):
+                        continue
+                    diffs.append({"date": key[0], "block_id": key[1], "column": col,
+                                  "stored": gv, "expected": ev})
+            for key, got in stored.items():
+                diffs.append({"date": key[0], "block_id": key[1], "column": "<extra>",
+                              "stored": got, "expected": None})
+            if rebuild:
+                self._exec(con, "DELETE FROM mv_daily_block_summary")
+                self._exec(con, "INSERT INTO mv_daily_block_summary SELECT * FROM v_daily_block_summary")
+        return diffs
+
     # ----------------------------------------------------------------
     # Analyses
     # ----------------------------------------------------------------
+    # Во всех as-of запросах дата сравнивается как substr(...,1,10):
+    # под это выражение заведены индексы в 011_asof_indexes.sql — не менять написание.
     def insert_block_acidity(self, date: str, block_id: int, metric_name: str, value: float,
                              sample_no=None, lab_name=None, note=None) -> None:
         sql = """
@@ -276,7 +1360,7 @@ class Database:
         ON CONFLICT(date, block_id, metric_name) DO UPDATE SET
           value=excluded.value, sample_no=excluded.sample_no, lab_name=excluded.lab_name, note=excluded.note
         """
-        with self.connect() as con:
+        with self._conn() as con:
             self._exec(con, sql, (date, block_id, metric_name, value, sample_no, lab_name, note))
 
     def insert_metal_analysis(self, date: str, block_id: int, metal_gpl: float,
@@ -285,7 +1369,7 @@ class Database:
         INSERT INTO metal_analyses(date, block_id, well_id, metal_gpl, sample_no, lab_name, note)
         VALUES(?,?,?,?,?,?,?)
         """
-        with self.connect() as con:
+        with self._conn() as con:
             self._exec(con, sql, (date, block_id, well_id, metal_gpl, sample_no, lab_name, note))
 
     def block_acidity_asof(self, date: str, block_id: int, metric_name: str) -> float | None:
@@ -302,7 +1386,7 @@ class Database:
         ORDER BY substr(date,1,10) DESC, id DESC
         LIMIT 1
         """
-        with self.connect() as con:
+        with self._conn(readonly=True) as con:
             row = con.execute(sql, (block_id, metric_name, date)).fetchone()
             return row["value"] if row else None
 
@@ -330,7 +1414,7 @@ class Database:
         ORDER BY substr(date,1,10) DESC, id DESC
         LIMIT 1
         """
-        with self.connect() as con:
+        with self._conn(readonly=True) as con:
             r = con.execute(sql_block, (block_id, date)).fetchone()
             if r:
                 return r["metal_gpl"]
@@ -350,10 +1434,81 @@ class Database:
         ORDER BY substr(date,1,10) DESC, id DESC
         LIMIT 1
         """
-        with self.connect() as con:
+        with self._conn(readonly=True) as con:
             row = con.execute(sql, (well_id, date)).fetchone()
             return row["metal_gpl"] if row else None
 
+    # Пакетные as-of: вся сетка блоки × даты за один запрос и один проход слиянием.
+    def metal_asof_many(self, block_ids, dates) -> dict[tuple[int, str], float | None]:
+        """
+        То же, что block_metal_asof, но сразу для всех пар (block_id, date).
+        Семантика сохраняется: сначала последняя блочная проба (well_id IS NULL) ≤ date,
+        если её нет — последняя проба любой скважины блока.
+        Возвращает плотный словарь {(block_id, date): metal_gpl | None}.
+        """
+        block_ids, dates = _asof_grid_args(block_ids, dates)
+        grid = {(b, d): None for b in block_ids for d in dates}
+        if not grid:
+            return grid
+        sql = """
+        SELECT block_id, well_id, substr(date,1,10) AS day, metal_gpl AS value
+        FROM metal_analyses
+        WHERE block_id IN ({ids})
+        AND substr(date,1,10) <= ?
+        ORDER BY block_id, day, id
+        """
+        rows = self._fetch_by_ids(sql, block_ids, (max(dates),))
+        series_block: dict[int, tuple[list, list]] = {}
+        series_any: dict[int, tuple[list, list]] = {}
+        for r in rows:
+            for series, use in ((series_block, r["well_id"] is None), (series_any, True)):
+                if use:
+                    days, values = series.setdefault(r["block_id"], ([], []))
+                    days.append(r["day"])
+                    values.append(r["value"])
+        for b in block_ids:
+            for d in dates:
+                v = _asof_pick(series_block.get(b), d)
+                grid[(b, d)] = v if v is not None else _asof_pick(series_any.get(b), d)
+        return grid
+
+    def acidity_asof_many(self, block_ids, dates, metric_name: str = "acid_ph") -> dict[tuple[int, str], float | None]:
+        """
+        То же, что block_acidity_asof, для всей сетки блоки × даты.
+        Возвращает плотный словарь {(block_id, date): value | None}.
+        """
+        block_ids, dates = _asof_grid_args(block_ids, dates)
+        grid = {(b, d): None for b in block_ids for d in dates}
+        if not grid:
+            return grid
+        sql = """
+        SELECT block_id, substr(date,1,10) AS day, value
+        FROM block_acidity_analyses
+        WHERE block_id IN ({ids})
+        AND metric_name = ?
+        AND substr(date,1,10) <= ?
+        ORDER BY block_id, day, id
+        """
+        series: dict[int, tuple[list, list]] = {}
+        for r in self._fetch_by_ids(sql, block_ids, (metric_name, max(dates))):
+            days, values = series.setdefault(r["block_id"], ([], []))
+            days.append(r["day"])
+            values.append(r["value"])
+        for b in block_ids:
+            for d in dates:
+                grid[(b, d)] = _asof_pick(series.get(b), d)
+        return grid
+
+    def _fetch_by_ids(self, sql: str, ids: list[int], params: tuple = ()) -> list[dict]:
+        """Выполняет sql с подстановкой {ids} кусками, чтобы не упереться в лимит параметров SQLite."""
+        out: list[dict] = []
+        with self._conn(readonly=True) as con:
+            for i in range(0, len(ids), _IN_CHUNK):
+                chunk = ids[i:i + _IN_CHUNK]
+                q = _in_sql(sql, len(chunk))
+                out.extend(self._exec(con, q, (*chunk, *params)))
+        return out
+
 
     # ----------------------------------------------------------------
     # Tanks & Levels (ССК)
@@ -373,16 +1528,22 @@ class Database:
             height_cm  = COALESCE(excluded.height_cm,  acid_tanks.height_cm),
             is_active  = excluded.is_active
         """
-        with self.connect() as con:
+        # id бака по имени не меняется: если он уже в кэше, повторный SELECT не нужен
+        tank_id = self._cache.get("tanks", name, None) if self._cache.enabled else None
+        with self._conn() as con:
             try:
                 # пробуем UPSERT
                 self._exec(con, upsert_sql, (name, capacity_t, location, height_cm, is_active))
             except UniqueConstraintError:
                 # на старых SQLite без UPSERT это не должно понадобиться, но оставим как страховку
                 pass
+            if tank_id is not None:
+                return tank_id
             # в любом случае возвращаем id существующей/вставленной записи
             row = con.execute("SELECT id FROM acid_tanks WHERE name=?", (name,)).fetchone()
-            return row["id"]
+            tank_id = row["id"]
+        self._invalidate("tanks", name)  # мог быть закэширован «бака нет» (None)
+        return tank_id
 
 
     def add_tank_calib(self, tank_id: int, cm: int, tons: float) -> None:
@@ -391,14 +1552,82 @@ class Database:
         VALUES(?,?,?)
         ON CONFLICT(tank_id, cm) DO UPDATE SET tons=excluded.tons
         """
-        with self.connect() as con:
+        with self._conn() as con:
             self._exec(con, sql, (tank_id, cm, tons))
+        self._invalidate("calibration", tank_id)
 
-    def insert_acid_level(self, al: dict) -> int:
+    def get_tank_id(self, name: str) -> int | None:
+        def load():
+            with self._conn(readonly=True) as con:
+                row = con.execute("SELECT id FROM acid_tanks WHERE name = ?", (name,)).fetchone()
+                return row["id"] if row else None
+        return self._cached("tanks", name, load)
+
+    def load_tank_calibration(self, tank_id: int, points) -> dict:
+        """
+        Полная замена градуировки бака одной транзакцией (DELETE + executemany).
+        points — итерируемое (cm, tons) / {"cm", "tons"} или путь к CSV (см. calibration.read_calibration_csv).
+        Точки сортируются по cm; cm — целые ≥ 0 без повторов, tons ≥ 0 и не убывают с ростом cm.
+        Возвращает {"tank_id", "points", "replaced", "elapsed_ms"}.
+        """
+        t0 = time.perf_counter()
+        tank_id = _require_positive_int("tank_id", tank_id)
+        try:
+            if isinstance(points, (str, os.PathLike)):
+                points = read_calibration_csv(points)
+            rows = validate_calibration(points)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+        with self._conn() as con:
+            if con.execute("SELECT 1 FROM acid_tanks WHERE id = ?", (tank_id,)).fetchone() is None:
+                raise ValidationError(f"tank {tank_id} does not exist")
+            replaced = self._exec(con, "DELETE FROM tank_calibration WHERE tank_id = ?", (tank_id,)).rowcount
+            try:
+                con.executemany(
+                    "INSERT INTO tank_calibration(tank_id, cm, tons) VALUES(?,?,?)",
+                    [(tank_id, cm, tons) for cm, tons in rows],
+                )
+            except sqlite3.IntegrityError as e:
+                raise _map_integrity_error(e)
+        self._invalidate("calibration", tank_id)
+        return {
+            "tank_id": tank_id,
+            "points": len(rows),
+            "replaced": replaced,
+            "elapsed_ms": (time.perf_counter() - t0) * 1000.0,
+        }
+
+    def levels_cm_to_tons(self, tank_id: int, cms, method: str = "linear") -> list[float | None]:
+        """
+        Пересчёт уровней (см) в тонны по градуировке бака: интерполяция между
+        точками tank_calibration (method="linear" или "pchip"). Таблица бака
+        читается из БД один раз и кэшируется до следующего add_tank_calib.
+        None — уровень None или вне диапазона градуировки.
+        """
+        if method not in CALIB_METHODS:
+            raise ValidationError(f"method must be one of {CALIB_METHODS}, got {method!r}")
+        with self._conn(readonly=True) as con:
+            table = self._calib.get(con, tank_id, cached=not self._in_write_tx())
+        return [table.tons_at(cm, method) for cm in cms]
+
+    def insert_acid_level(self, al: dict, *, from_cm: bool = False, method: str = "linear") -> int:
         """
         Идемпотентная запись уровней ССК на дату: если (date, tank_id) уже есть —
         обновляем значения. Возвращаем id строки.
+        from_cm=True — level_begin_t/level_end_t вычисляются из level_begin_cm/level_end_cm
+        по градуировке бака (см. levels_cm_to_tons).
         """
+        if from_cm:
+            cms = (al.get("level_begin_cm"), al.get("level_end_cm"))
+            if None in cms:
+                raise ValidationError("level_begin_cm and level_end_cm are required when from_cm=True")
+            begin_t, end_t = self.levels_cm_to_tons(al.get("tank_id"), cms, method)
+            if begin_t is None or end_t is None:
+                raise ValidationError(
+                    f"levels {cms} cm are outside the calibration table of tank {al.get('tank_id')}"
+                )
+            al = {**al, "level_begin_t": begin_t, "level_end_t": end_t}
         sql = """
         INSERT INTO acid_levels(
             date, tank_id,
@@ -429,7 +1658,7 @@ class Database:
             al.get("adjustments_t", 0.0),
             al.get("note"),
         )
-        with self.connect() as con:
+        with self._conn() as con:
             self._exec(con, sql, values)
             row = con.execute(
                 "SELECT id FROM acid_levels WHERE date=? AND tank_id=?",
@@ -449,7 +1678,7 @@ class Database:
                             - transfers_out_t + adjustments_t - level_end_t)
         Если total_t <= 0 или total_vr <= 0 — удаляем записи на эту дату и возвращаем [].
         """
-        with self.connect() as con:
+        with self._conn() as con:
             # 1) посчитать расход по баку(ам) на эту дату
             row = con.execute(
                 """
@@ -490,6 +1719,221 @@ class Database:
                 self._exec(con, "DELETE FROM acid_distribution WHERE date=?", (date,))
             return results
 
+    def compute_acid_distribution_range(self, date_from: str, date_to: str) -> list[dict]:
+        """
+        То же распределение VR-share, но сразу за диапазон дат (включительно),
+        одним INSERT ... SELECT с оконной суммой VR по дню и в одной транзакции.
+        Правила как у compute_and_store_acid_distribution_vr_share: день, где расход
+        склада или суммарный VR <= 0, очищается от записей acid_distribution.
+        Возвращает итоги по дням, где есть уровни ССК или суточные:
+        [{"date", "consumption_t", "vr_m3", "distributed_t", "blocks"}].
+        """
+        if date_from > date_to:
+            raise ValidationError("date_from must be <= date_to.")
+        ctes = """
+        WITH cons AS (
+            SELECT date,
+                   SUM(COALESCE(level_begin_t,0) + COALESCE(receipts_t,0) + COALESCE(transfers_in_t,0)
+                       - COALESCE(transfers_out_t,0) + COALESCE(adjustments_t,0)
+                       - COALESCE(level_end_t,0)) AS consumption_t
+            FROM acid_levels
+            WHERE date BETWEEN :d1 AND :d2
+            GROUP BY date
+        ),
+        vr AS (
+            SELECT date, block_id,
+                   COALESCE(SUM(vr_volume_m3), 0) AS vr_m3,
+                   SUM(COALESCE(SUM(vr_volume_m3), 0)) OVER (PARTITION BY date) AS total_vr
+            FROM daily_readings
+            WHERE date BETWEEN :d1 AND :d2
+            GROUP BY date, block_id
+        ),
+        share AS (
+            SELECT vr.date, vr.block_id, cons.consumption_t * vr.vr_m3 / vr.total_vr AS acid_tons
+            FROM vr JOIN cons ON cons.date = vr.date
+            WHERE cons.consumption_t > 0 AND vr.total_vr > 0
+        )
+        """
+        params = {"d1": date_from, "d2": date_to}
+        with self._conn() as con:
+            self._exec(con, ctes + """
+            INSERT INTO acid_distribution(date, block_id, acid_tons, method, note)
+            SELECT date, block_id, acid_tons, 'VR-share', NULL FROM share WHERE true
+            ON CONFLICT(date, block_id) DO UPDATE SET
+            acid_tons=excluded.acid_tons, method=excluded.method, note=excluded.note
+            """, params)
+            self._exec(con, ctes + """
+            DELETE FROM acid_distribution
+            WHERE date BETWEEN :d1 AND :d2
+            AND date NOT IN (SELECT date FROM share)
+            """, params)
+            return list(self._exec(con, """
+            WITH days AS (
+                SELECT date FROM acid_levels WHERE date BETWEEN :d1 AND :d2
+                UNION SELECT date FROM daily_readings WHERE date BETWEEN :d1 AND :d2
+            )
+            SELECT d.date,
+                   COALESCE((SELECT SUM(COALESCE(level_begin_t,0) + COALESCE(receipts_t,0)
+                                        + COALESCE(transfers_in_t,0) - COALESCE(transfers_out_t,0)
+                                        + COALESCE(adjustments_t,0) - COALESCE(level_end_t,0))
+                             FROM acid_levels al WHERE al.date = d.date), 0) AS consumption_t,
+                   COALESCE((SELECT SUM(vr_volume_m3) FROM daily_readings dr WHERE dr.date = d.date), 0) AS vr_m3,
+                   COALESCE((SELECT SUM(acid_tons) FROM acid_distribution ad WHERE ad.date = d.date), 0) AS distributed_t,
+                   (SELECT COUNT(*) FROM acid_distribution ad WHERE ad.date = d.date) AS blocks
+            FROM days d
+            ORDER BY d.date
+            """, params))
+
+    # ----------------------------------------------------------------
+    # Сверка склада кислоты (015_acid_reconciliation.sql)
+    # ----------------------------------------------------------------
+    def reconcile_acid(self, date_from: str, date_to: str, *, tolerance_t: float | None = None,
+                       tolerance_pct: float | None = None, drift_t: float | None = None) -> dict:
+        """
+        Пересчитывает сверку склада за [date_from; date_to] в acid_recon_daily/_tank/_block
+        одной транзакцией: по дню — расход склада, распределено, delta_t и флаг
+        over_tolerance (|delta| > max(tolerance_t, tolerance_pct% расхода)); по баку —
+        доля расхождения пропорционально расходу; по блоку — ожидаемое по VR-share
+        против распределённого. Нарастающие итоги (cum_*) продолжаются от последнего
+        дня до date_from и пересчитываются до конца таблицы; drift — |cum_delta_t| > drift_t.
+        Допуски по умолчанию — из settings (acid_recon.*).
+        Возвращает {"days", "delta_t", "cum_delta_t", "over_tolerance": [даты], "drift": [даты], "tolerance"}.
+        """
+        if date_from > date_to:
+            raise ValidationError("date_from must be <= date_to.")
+        with self._conn() as con:
+            tol = {
+                "tolerance_t": _setting_float(con, "acid_recon.tolerance_t", 0.5, tolerance_t),
+                "tolerance_pct": _setting_float(con, "acid_recon.tolerance_pct", 2.0, tolerance_pct),
+                "drift_t": _setting_float(con, "acid_recon.drift_t", 5.0, drift_t),
+            }
+            params = {"d1": date_from, "d2": date_to, **tol}
+            for table in ("acid_recon_daily", "acid_recon_tank", "acid_recon_block"):
+                self._exec(con, f"DELETE FROM {table} WHERE date BETWEEN :d1 AND :d2", params)
+            for sql in _RECON_INSERT_SQL:
+                self._exec(con, sql, params)
+            for sql in _RECON_CUMULATIVE_SQL:
+                self._exec(con, sql, params)
+            rows = self._exec(con, """
+            SELECT date, delta_t, cum_delta_t, over_tolerance, drift
+            FROM acid_recon_daily WHERE date BETWEEN :d1 AND :d2 ORDER BY date
+            """, params).fetchall()
+        report = {
+            "days": len(rows),
+            "delta_t": sum(r["delta_t"] for r in rows),
+            "cum_delta_t": rows[-1]["cum_delta_t"] if rows else None,
+            "over_tolerance": [r["date"] for r in rows if r["over_tolerance"]],
+            "drift": [r["date"] for r in rows if r["drift"]],
+            "tolerance": tol,
+        }
+        if report["over_tolerance"] or report["drift"]:
+            recon_log.warning("acid reconciliation %s..%s: %d day(s) over tolerance, %d day(s) of drift, "
+                              "cumulative delta %.3f t", date_from, date_to, len(report["over_tolerance"]),
+                              len(report["drift"]), report["cum_delta_t"])
+        return report
+
+    def acid_reconciliation(self, date_from: str, date_to: str, grain: str = "day",
+                            flagged_only: bool = False) -> list[dict]:
+        """
+        Сохранённая сверка (см. reconcile_acid): grain="day" — строки acid_recon_daily,
+        "month"/"year" — v_acid_recon_monthly/yearly, периоды, пересекающие диапазон.
+        flagged_only — только дни/периоды с over_tolerance или drift.
+        """
+        if grain not in _RECON_GRAINS:
+            raise ValidationError(f"grain must be one of {tuple(_RECON_GRAINS)}, got {grain!r}")
+        source, width = _RECON_GRAINS[grain]
+        if grain == "day":
+            sql = f"SELECT * FROM {source} WHERE date BETWEEN ? AND ?"
+            if flagged_only:
+                sql += " AND (over_tolerance = 1 OR drift = 1)"
+            sql += " ORDER BY date"
+        else:
+            sql = f"SELECT * FROM {source} WHERE period BETWEEN substr(?,1,{width}) AND substr(?,1,{width})"
+            if flagged_only:
+                sql += " AND (over_tolerance_days > 0 OR drift_days > 0)"
+            sql += " ORDER BY period"
+        with self._conn(readonly=True) as con:
+            return list(self._exec(con, sql, (date_from, date_to)))
+
+    def acid_reconciliation_tanks(self, date_from: str, date_to: str, tank_id: int | None = None) -> list[dict]:
+        """Сверка по бакам за период: [{"date", "tank_id", "consumption_t", "imbalance_t", "cum_imbalance_t"}]."""
+        return self._recon_detail("acid_recon_tank", "tank_id", date_from, date_to, tank_id)
+
+    def acid_reconciliation_blocks(self, date_from: str, date_to: str, block_id: int | None = None) -> list[dict]:
+        """Сверка по блокам за период: ожидаемое/распределённое, расхождение и нарастающий итог."""
+        return self._recon_detail("acid_recon_block", "block_id", date_from, date_to, block_id)
+
+    def _recon_detail(self, table: str, key: str, date_from: str, date_to: str, key_value) -> list[dict]:
+        if key_value is None:
+            sql, params = f"SELECT * FROM {table} WHERE date BETWEEN ? AND ? ORDER BY date, {key}", \
+                (date_from, date_to)
+        else:
+            sql, params = f"SELECT * FROM {table} WHERE {key} = ? AND date BETWEEN ? AND ? ORDER BY date", \
+                (key_value, date_from, date_to)
+        with self._conn(readonly=True) as con:
+            return list(self._exec(con, sql, params))
+
+# -------------------------------------------------------------------
+# Аудит: какие методы Database изменяют данные и что они пишут в audit_log
+# -------------------------------------------------------------------
+# метод → (entity, аргумент с id сущности; None — id берётся из результата, если это int).
+# action в audit_log — имя метода. Служебные записи (perf_log, sync_spatial_index,
+# пересборка mv в check_daily_block_summary) не аудируются.
+_AUDITED: dict[str, tuple[str, str | None]] = {
+    "create_block": ("blocks", None),
+    "set_block_shape": ("blocks", "block_id"),
+    "create_well": ("wells", None),
+    "add_well_mode_interval": ("well_mode_history", "well_id"),
+    "add_block_mode_interval": ("block_mode_history", "block_id"),
+    "insert_daily_reading": ("daily_readings", None),
+    "insert_daily_readings_bulk": ("daily_readings", None),
+    "repair_pr_counters": ("daily_readings", None),
+    "validate_daily_readings": ("daily_readings", None),
+    "add_pr_counter_event": ("pr_counter_events", None),
+    "insert_block_acidity": ("block_acidity_analyses", None),
+    "insert_metal_analysis": ("metal_analyses", None),
+    "insert_tank": ("acid_tanks", None),
+    "add_tank_calib": ("tank_calibration", "tank_id"),
+    "load_tank_calibration": ("tank_calibration", "tank_id"),
+    "insert_acid_level": ("acid_levels", None),
+    "compute_and_store_acid_distribution_vr_share": ("acid_distribution", None),
+    "compute_acid_distribution_range": ("acid_distribution", None),
+    "reconcile_acid": ("acid_recon_daily", None),
+}
+
+def _audited(fn, entity: str, id_arg: str | None):
+    """
+    Обёртка метода: после успешного вызова ставит в очередь аудита
+    (action=имя метода, entity, entity_id, payload={"args", "result"}).
+    Вложенные вызовы аудируемых методов (один метод через другой) не пишутся.
+    """
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if self._audit is None or getattr(self._local, "audit_depth", 0):
+            return fn(self, *args, **kwargs)
+        bound = sig.bind(self, *args, **kwargs)
+        self._local.audit_depth = 1
+        try:
+            result = fn(self, *args, **kwargs)
+        finally:
+            self._local.audit_depth = 0
+        max_list = self._audit.config.max_list
+        call_args = {k: _audit_compact(v, max_list) for k, v in bound.arguments.items() if k != "self"}
+        entity_id = bound.arguments.get(id_arg) if id_arg else result
+        if isinstance(entity_id, bool) or not isinstance(entity_id, int):
+            entity_id = None
+        self._record_audit((fn.__name__, entity, entity_id,
+                            {"args": call_args, "result": _audit_compact(result, max_list)}, _audit_user.get()))
+        return result
+    return wrapper
+
+for _name, (_entity, _id_arg) in _AUDITED.items():
+    setattr(Database, _name, _audited(getattr(Database, _name), _entity, _id_arg))
+del _name, _entity, _id_arg
+
+
 
 
 
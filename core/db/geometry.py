@@ -0,0 +1,186 @@
+from __future__ import annotations
+import re
+import threading
+
+# -------------------------------------------------------------------
+# Контуры блоков: разбор WKT (POLYGON / MULTIPOLYGON) и точка-в-полигоне
+# -------------------------------------------------------------------
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_TOKEN = re.compile(rf"\s*(?:({_NUMBER})|([A-Za-z]+)|([(),]))")
+
+Ring = tuple[tuple[float, float], ...]
+
+
+class Geometry:
+    """
+    Разобранный контур: список полигонов, каждый — внешнее кольцо и дыры.
+    bbox = (min_x, max_x, min_y, max_y) — в порядке колонок blocks_rtree.
+    Z/M координаты отбрасываются: индекс плоский.
+    """
+
+    __slots__ = ("polygons", "bbox")
+
+    def __init__(self, polygons: list[tuple[Ring, ...]]) -> None:
+        self.polygons = polygons
+        xs = [x for poly in polygons for x, _ in poly[0]]
+        ys = [y for poly in polygons for _, y in poly[0]]
+        self.bbox = (min(xs), max(xs), min(ys), max(ys))
+
+    def contains(self, x: float, y: float) -> bool:
+        """Точка внутри (чётно-нечётное правило: внутри внешнего кольца и вне дыр); граница — как выпадет."""
+        min_x, max_x, min_y, max_y = self.bbox
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        return any(_in_ring(poly[0], x, y) and not any(_in_ring(h, x, y) for h in poly[1:])
+                   for poly in self.polygons)
+
+    def area(self) -> float:
+        return sum(abs(_ring_area(poly[0])) - sum(abs(_ring_area(h)) for h in poly[1:]) for poly in self.polygons)
+
+
+def _in_ring(ring: Ring, x: float, y: float) -> bool:
+    inside = False
+    x0, y0 = ring[-1]
+    for x1, y1 in ring:
+        if (y1 > y) != (y0 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+        x0, y0 = x1, y1
+    return inside
+
+
+def _ring_area(ring: Ring) -> float:
+    return 0.5 * sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]))
+
+
+def _tokens(text: str):
+    pos, n = 0, len(text)
+    while True:
+        while pos < n and text[pos].isspace():
+            pos += 1
+        if pos == n:
+            return
+        m = _TOKEN.match(text, pos)
+        if m is None:
+            raise ValueError(f"unexpected character in WKT at {pos}: {text[pos]!r}")
+        pos = m.end()
+        num, word, punct = m.groups()
+        yield float(num) if num is not None else (word.upper() if word is not None else punct)
+
+
+class _Reader:
+    def __init__(self, text: str) -> None:
+        self.toks = list(_tokens(text))
+        self.i = 0
+
+    def peek(self):
+        return self.toks[self.i] if self.i < len(self.toks) else None
+
+    def take(self, expected=None):
+        tok = self.peek()
+        if tok is None or (expected is not None and tok != expected):
+            raise ValueError(f"malformed WKT: expected {expected or 'a token'!r}, got {tok!r}")
+        self.i += 1
+        return tok
+
+    def seq(self, item):
+        """'(' item (',' item)* ')'."""
+        self.take("(")
+        out = [item()]
+        while self.peek() == ",":
+            self.take(",")
+            out.append(item())
+        self.take(")")
+        return out
+
+    def point(self) -> tuple[float, float]:
+        coords = []
+        while isinstance(self.peek(), float):
+            coords.append(self.take())
+        if len(coords) < 2:
+            raise ValueError("malformed WKT: a point needs at least x and y")
+        return coords[0], coords[1]
+
+    def ring(self) -> Ring:
+        pts = self.seq(self.point)
+        if len(pts) > 1 and pts[0] == pts[-1]:
+            pts.pop()
+        if len(pts) < 3:
+            raise ValueError("malformed WKT: a ring needs at least 3 distinct points")
+        return tuple(pts)
+
+    def polygon(self) -> tuple[Ring, ...]:
+        return tuple(self.seq(self.ring))
+
+
+def parse_wkt(text: str | None) -> Geometry | None:
+    """
+    POLYGON / MULTIPOLYGON (с Z/M или без) → Geometry; пустая строка, NULL
+    и ... EMPTY → None. Прочие типы и битый текст — ValueError.
+    """
+    if text is None or not text.strip():
+        return None
+    r = _Reader(text)
+    kind = r.take()
+    if r.peek() in ("Z", "M", "ZM"):
+        r.take()
+    if kind not in ("POLYGON", "MULTIPOLYGON"):
+        raise ValueError(f"unsupported WKT geometry: {kind!r} (POLYGON or MULTIPOLYGON expected)")
+    if r.peek() == "EMPTY":
+        r.take()
+        polygons = []
+    elif kind == "POLYGON":
+        polygons = [r.polygon()]
+    else:
+        polygons = r.seq(r.polygon)
+    if r.peek() is not None:
+        raise ValueError(f"malformed WKT: trailing {r.peek()!r}")
+    return Geometry(polygons) if polygons else None
+
+
+class GeometryCache:
+    """
+    Разобранные контуры блоков по block_id (WKT разбирается один раз) и
+    габарит множества скважин для поиска ближайших. invalidate() вызывается
+    DAO после записи в blocks/wells (и ещё раз после фиксации внешней
+    транзакции); synced — blocks_rtree сверен с blocks.
+    """
+
+    def __init__(self) -> None:
+        self._shapes: dict[int, Geometry | None] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.synced = False
+        self.wells_extent: tuple | None = None
+
+    def invalidate(self, block_id: int | None = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if block_id is None:
+                self._shapes.clear()
+                self.synced = False
+                self.wells_extent = None
+            else:
+                self._shapes.pop(block_id, None)
+
+    def invalidate_wells(self) -> None:
+        self.wells_extent = None
+
+    def get(self, con, block_id: int, cached: bool = True) -> Geometry | None:
+        """
+        Контур блока. cached=False — разобрать shape_wkt, прочитанный через con, мимо
+        кэша (внутри пишущей транзакции). Разобранный контур сохраняется, только
+        если за время чтения не было invalidate().
+        """
+        if cached and block_id in self._shapes:
+            return self._shapes[block_id]
+        generation = self._generation
+        row = con.execute("SELECT shape_wkt FROM blocks WHERE id = ?", (block_id,)).fetchone()
+        try:
+            shape = parse_wkt(row["shape_wkt"]) if row else None
+        except ValueError:
+            shape = None  # битый контур не участвует в поиске (см. sync_spatial_index)
+        if cached:
+            with self._lock:
+                if self._generation == generation:
+                    self._shapes[block_id] = shape
+        return shape
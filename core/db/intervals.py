@@ -0,0 +1,91 @@
+from __future__ import annotations
+import bisect
+import threading
+
+# -------------------------------------------------------------------
+# In-process индекс интервалов режимов (well_mode_history / block_mode_history)
+# -------------------------------------------------------------------
+class ModeIntervalIndex:
+    """
+    Отсортированные по date_from интервалы режимов для каждой сущности.
+    Строится лениво одним запросом, поиск на дату — bisect + проверка date_to,
+    то есть без обращения к SQLite. Семантика та же, что у SQL в DAO:
+    побеждает интервал с наибольшим date_from (при равенстве — с большим id),
+    покрывающий дату; даты сравниваются по первым 10 символам.
+    """
+
+    def __init__(self, table: str, key: str) -> None:
+        self.table = table
+        self.key = key
+        self._data: dict[int, tuple[list[str], list[tuple[str, str | None]]]] | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict | None:
+        """Текущие данные индекса или None, если он ещё не построен / сброшен."""
+        return self._data
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data = None
+
+    def ensure(self, con) -> dict:
+        """
+        Данные индекса, при необходимости перечитанные через con.
+        Загрузка идёт вне блокировки; результат сохраняется, только если за время
+        загрузки не было invalidate() — иначе он мог прочитать историю до чужой записи.
+        """
+        data = self._data
+        if data is not None:
+            return data
+        with self._lock:
+            if self._data is not None:
+                return self._data
+            generation = self._generation
+        data = self._load(con)
+        with self._lock:
+            if self._generation == generation and self._data is None:
+                self._data = data
+        return data
+
+    def _load(self, con) -> dict:
+        sql = f"""
+        SELECT {self.key} AS entity_id, mode,
+               substr(date_from,1,10) AS day_from, substr(date_to,1,10) AS day_to
+        FROM {self.table}
+        ORDER BY {self.key}, day_from, id
+        """
+        data: dict[int, tuple[list[str], list[tuple[str, str | None]]]] = {}
+        for r in con.execute(sql):
+            days, spans = data.setdefault(r["entity_id"], ([], []))
+            days.append(r["day_from"])
+            spans.append((r["mode"], r["day_to"]))
+        return data
+
+    @staticmethod
+    def _pick(entry, day: str) -> str | None:
+        if entry is None:
+            return None
+        days, spans = entry
+        i = bisect.bisect_right(days, day)
+        while i:
+            i -= 1
+            mode, day_to = spans[i]
+            if day_to is None or day_to >= day:
+                return mode
+        return None
+
+    def mode_on(self, data: dict, entity_id: int, date: str) -> str | None:
+        return self._pick(data.get(entity_id), str(date)[:10])
+
+    def modes_on(self, data: dict, date: str, entity_ids=None) -> dict[int, str | None]:
+        day = str(date)[:10]
+        if entity_ids is None:
+            out = {}
+            for eid, entry in data.items():
+                mode = self._pick(entry, day)
+                if mode is not None:
+                    out[eid] = mode
+            return out
+        return {eid: self._pick(data.get(eid), day) for eid in entity_ids}
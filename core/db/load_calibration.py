@@ -0,0 +1,36 @@
+from __future__ import annotations
+import argparse, os, sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.db.dao import Database, DaoError, DEFAULT_DB  # noqa: E402
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Загрузка градуировочной таблицы бака из CSV (cm, tons).")
+    ap.add_argument("csv", help="CSV с колонками cm, tons (заголовок необязателен)")
+    tank = ap.add_mutually_exclusive_group(required=True)
+    tank.add_argument("--tank-id", type=int)
+    tank.add_argument("--tank", help="имя бака (acid_tanks.name)")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    args = ap.parse_args(argv)
+
+    with Database(args.db) as db:
+        tank_id = args.tank_id
+        if tank_id is None:
+            tank_id = db.get_tank_id(args.tank)
+            if tank_id is None:
+                print(f"[calib] tank {args.tank!r} not found", file=sys.stderr)
+                return 2
+        try:
+            rep = db.load_tank_calibration(tank_id, args.csv)
+        except DaoError as e:
+            print(f"[calib] {type(e).__name__}: {e}", file=sys.stderr)
+            return 1
+    print(f"[calib] tank {rep['tank_id']}: {rep['points']} points loaded "
+          f"(replaced {rep['replaced']}) in {rep['elapsed_ms']:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,34 +1,172 @@
 from __future__ import annotations
-import os, sqlite3, glob
+import argparse, glob, hashlib, os, re, sqlite3, sys, time
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 SQL_DIR = os.path.join(ROOT, "app", "sql")
 DATA_DIR = os.path.join(ROOT, "data")
 DB_PATH = os.path.join(DATA_DIR, "uchet.db")
 
+# Журнал применённых миграций: имя файла + sha256 содержимого.
+# Изменённый файл (другая контрольная сумма) применяется повторно —
+# скрипты в app/sql идемпотентны (IF NOT EXISTS / защищённое заполнение).
+LEDGER_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  filename     TEXT PRIMARY KEY,
+  checksum     TEXT NOT NULL,
+  applied_at   TEXT NOT NULL DEFAULT (datetime('now')),
+  duration_ms  REAL
+)
+"""
+
 def ensure_dirs():
     os.makedirs(DATA_DIR, exist_ok=True)
 
-def run_sql(conn: sqlite3.Connection, sql_path: str):
-    with open(sql_path, "r", encoding="utf-8") as f:
-        sql = f.read()
-    print(f"[migrate] applying {os.path.basename(sql_path)}")
-    conn.executescript(sql)
+def checksum(sql: str) -> str:
+    return hashlib.sha256(sql.encode("utf-8")).hexdigest()
+
+def read_migrations(sql_dir: str = SQL_DIR) -> list[tuple[str, str, str]]:
+    """[(имя файла, текст, checksum)] в порядке применения."""
+    out = []
+    for path in sorted(glob.glob(os.path.join(sql_dir, "*.sql"))):
+        with open(path, "r", encoding="utf-8") as f:
+            sql = f.read()
+        out.append((os.path.basename(path), sql, checksum(sql)))
+    return out
 
-def main():
-    ensure_dirs()
-    conn = sqlite3.connect(DB_PATH)
+def legacy_view_sql(names, sql_dir: str = SQL_DIR) -> dict[str, str]:
+    """
+    Исходные определения VIEW (тело после AS) из ранних миграций 00*.sql —
+    до материализации 012; нужны тестам и бенчмаркам для сверки с mv_*.
+    """
+    out = {}
+    for path in sorted(glob.glob(os.path.join(sql_dir, "00*.sql"))):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        for m in re.finditer(r"CREATE VIEW IF NOT EXISTS (\w+) AS(.*?);", text, re.S):
+            if m.group(1) in names:
+                out[m.group(1)] = m.group(2)
+    return out
+
+def applied_checksums(conn: sqlite3.Connection) -> dict[str, str]:
+    """Единственный запрос к метаданным при старте; пустой dict, если журнала ещё нет."""
     try:
-        files = sorted(glob.glob(os.path.join(SQL_DIR, "*.sql")))
-        for path in files:
-            run_sql(conn, path)
+        return dict(conn.execute("SELECT filename, checksum FROM schema_migrations"))
+    except sqlite3.OperationalError:
+        return {}
+
+def plan(conn: sqlite3.Connection, migrations) -> list[tuple[str, str, str, str]]:
+    """[(имя, текст, checksum, state)], state: 'applied' | 'pending' | 'changed'."""
+    done = applied_checksums(conn)
+    out = []
+    for name, sql, digest in migrations:
+        state = "pending" if name not in done else ("applied" if done[name] == digest else "changed")
+        out.append((name, sql, digest, state))
+    return out
+
+def run_sql(conn: sqlite3.Connection, name: str, sql: str, digest: str) -> float:
+    """Одна миграция = одна транзакция вместе с записью в журнал. Возвращает время, мс."""
+    t0 = time.perf_counter()
+    try:
+        conn.executescript("BEGIN;\n" + sql + "\n;")
+        ms = (time.perf_counter() - t0) * 1000.0
+        conn.execute(
+            "INSERT INTO schema_migrations(filename, checksum, duration_ms) VALUES(?,?,?) "
+            "ON CONFLICT(filename) DO UPDATE SET checksum=excluded.checksum, "
+            "applied_at=datetime('now'), duration_ms=excluded.duration_ms",
+            (name, digest, ms),
+        )
         conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return ms
+
+def migrate(db_path: str = DB_PATH, sql_dir: str = SQL_DIR, dry_run: bool = False,
+            verbose: bool = True) -> list[tuple[str, str, float | None]]:
+    """
+    Применяет неприменённые и изменённые миграции.
+    Возвращает [(имя, state до запуска, время мс или None, если не применялась)].
+    """
+    log = print if verbose else (lambda *a, **k: None)
+    migrations = read_migrations(sql_dir)
+    if dry_run and not os.path.exists(db_path):
+        todo = [(name, sql, digest, "pending") for name, sql, digest in migrations]
+        conn = None
+    else:
+        conn = sqlite3.connect(db_path)
+    try:
+        if conn is not None:
+            conn.execute("PRAGMA foreign_keys = ON;")
+            todo = plan(conn, migrations)
+            if not dry_run:
+                conn.execute(LEDGER_DDL)
+                conn.commit()
+        result = []
+        for name, sql, digest, state in todo:
+            ms = None
+            if state != "applied":
+                if dry_run:
+                    log(f"[migrate] would apply {name} ({state})")
+                else:
+                    ms = run_sql(conn, name, sql, digest)
+                    log(f"[migrate] applied {name} ({state}) in {ms:.1f} ms")
+            result.append((name, state, ms))
+        if all(state == "applied" for _, state, _ in result):
+            log(f"[migrate] up to date ({len(result)} migrations)")
+        return result
+    finally:
+        if conn is not None:
+            conn.close()
+
+def status(db_path: str = DB_PATH, sql_dir: str = SQL_DIR) -> int:
+    """Печатает состояние каждой миграции; код возврата 1, если есть что применять."""
+    migrations = read_migrations(sql_dir)
+    todo = [(name, sql, digest, "pending") for name, sql, digest in migrations]
+    info: dict[str, tuple] = {}
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            todo = plan(conn, migrations)
+            try:
+                info = {r[0]: r[1:] for r in
+                        conn.execute("SELECT filename, applied_at, duration_ms FROM schema_migrations")}
+            except sqlite3.OperationalError:
+                pass
+        finally:
+            conn.close()
+    for name, _, _, state in todo:
+        extra = ""
+        if name in info:
+            applied_at, ms = info[name]
+            extra = f"  {applied_at}" + (f"  {ms:.1f} ms" if ms is not None else "")
+        print(f"[migrate] {state:>7}  {name}{extra}")
+    return 0 if all(state == "applied" for *_, state in todo) else 1
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Применение SQL-миграций из app/sql с журналом schema_migrations.")
+    ap.add_argument("--db", default=DB_PATH)
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true", help="показать, что будет применено, ничего не меняя")
+    mode.add_argument("--status", action="store_true", help="состояние каждой миграции")
+    args = ap.parse_args(argv)
+
+    if args.status:
+        return status(args.db)
+    if args.db == DB_PATH:
+        ensure_dirs()
+    t0 = time.perf_counter()
+    migrate(args.db, dry_run=args.dry_run)
+    if args.dry_run:
+        return 0
+    conn = sqlite3.connect(args.db)
+    try:
         cur = conn.execute("SELECT value FROM app_meta WHERE key='schema_version'")
         ver = cur.fetchone()
         print(f"[migrate] schema_version = {ver[0] if ver else 'unknown'}")
     finally:
         conn.close()
-    print(f"[migrate] done. DB at {DB_PATH}")
+    print(f"[migrate] done in {(time.perf_counter() - t0) * 1000:.1f} ms. DB at {args.db}")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import itertools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+# -------------------------------------------------------------------
+# Инструментирование запросов: статистика по шаблонам и лог медленных
+# -------------------------------------------------------------------
+log = logging.getLogger("core.db.perf")
+
+_WS = re.compile(r"\s+")
+_PLACEHOLDERS = re.compile(r"\?(?:\s*,\s*\?)+")
+_NO_ROWS = object()
+
+
+def sql_template(sql: str) -> str:
+    """Шаблон оператора: пробелы схлопнуты, списки '?,?,…' (чанки IN) — в один '?,…'."""
+    return _PLACEHOLDERS.sub("?,…", _WS.sub(" ", sql).strip())
+
+
+@dataclass
+class PerfConfig:
+    enabled: bool = True
+    slow_ms: float = 100.0        # порог лога медленных операторов
+    explain_slow: bool = True     # добавлять EXPLAIN QUERY PLAN в лог
+    sample: int = 1000            # сколько последних длительностей держать для p95
+
+
+class _TemplateStats:
+    __slots__ = ("count", "total_ms", "max_ms", "rows", "recent")
+
+    def __init__(self, sample: int) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.recent: deque[float] = deque(maxlen=sample)
+
+
+class PerfRecorder:
+    """Потокобезопасная сводка по шаблонам операторов."""
+
+    def __init__(self, config: PerfConfig | None = None) -> None:
+        self.config = config or PerfConfig()
+        self._stats: dict[str, _TemplateStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, ms: float, rows: int) -> None:
+        key = sql_template(sql)
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = _TemplateStats(self.config.sample)
+            st.count += 1
+            st.total_ms += ms
+            st.rows += rows
+            st.recent.append(ms)
+            if ms > st.max_ms:
+                st.max_ms = ms
+
+    def snapshot(self, reset: bool = False) -> dict[str, dict]:
+        """{шаблон: {"count", "total_ms", "avg_ms", "p95_ms", "max_ms", "rows"}}."""
+        with self._lock:
+            items = list(self._stats.items())
+            if reset:
+                self._stats = {}
+        out = {}
+        for key, st in items:
+            recent = sorted(st.recent)
+            p95 = recent[min(len(recent) - 1, int(0.95 * len(recent)))] if recent else 0.0
+            out[key] = {"count": st.count, "total_ms": st.total_ms, "avg_ms": st.total_ms / st.count,
+                        "p95_ms": p95, "max_ms": st.max_ms, "rows": st.rows}
+        return out
+
+    def slow(self, con: sqlite3.Connection, sql: str, params, ms: float, rows: int) -> None:
+        plan = ""
+        if self.config.explain_slow:
+            try:
+                cur = sqlite3.Cursor(con)  # неинструментированный курсор
+                cur.row_factory = None
+                detail = [r[3] for r in cur.execute("EXPLAIN QUERY PLAN " + sql, params)]
+                plan = "\n  plan: " + "; ".join(detail)
+            except sqlite3.Error as e:
+                plan = f"\n  plan: <unavailable: {e}>"
+        log.warning("slow query %.1f ms, %d rows: %s%s", ms, rows, sql_template(sql), plan)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Курсор, меряющий каждый оператор: время execute плюс время выборки строк.
+    Запись в PerfRecorder — когда результат исчерпан, курсор закрыт
+    или переиспользован для следующего execute.
+    """
+    _rec: list | None = None   # [sql, params, ms, rows]
+
+    def _finish(self) -> None:
+        rec, self._rec = self._rec, None
+        if rec is None:
+            return
+        perf: PerfRecorder | None = getattr(self.connection, "perf", None)
+        if perf is None:
+            return
+        sql, params, ms, rows = rec
+        perf.record(sql, ms, rows)
+        if ms >= perf.config.slow_ms:
+            perf.slow(self.connection, sql, params, ms, rows)
+
+    def execute(self, sql, params=()):
+        self._finish()
+        t0 = time.perf_counter()
+        try:
+            super().execute(sql, params)
+        finally:
+            self._rec = [sql, params, (time.perf_counter() - t0) * 1000.0, 0]
+            if self.description is None:   # DML/DDL: строк нет, фиксируем сразу
+                self._rec[3] = max(self.rowcount, 0)
+                self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        # первая строка параметров — для EXPLAIN в логе медленных; источник может быть генератором
+        rows = iter(seq_of_params)
+        first = next(rows, _NO_ROWS)
+        if first is not _NO_ROWS:
+            rows = itertools.chain((first,), rows)
+        t0 = time.perf_counter()
+        try:
+            super().executemany(sql, rows)
+        finally:
+            params = () if first is _NO_ROWS else first
+            self._rec = [sql, params, (time.perf_counter() - t0) * 1000.0, max(self.rowcount, 0)]
+            self._finish()
+        return self
+
+    def __next__(self):
+        rec = self._rec
+        t0 = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            if rec is not None:
+                rec[2] += (time.perf_counter() - t0) * 1000.0
+                self._finish()
+            raise
+        if rec is not None:
+            rec[2] += (time.perf_counter() - t0) * 1000.0
+            rec[3] += 1
+        return row
+
+    def fetchone(self):
+        try:
+            return next(self)
+        except StopIteration:
+            return None
+
+    def fetchmany(self, size=None):
+        n = self.arraysize if size is None else size
+        rows = []
+        for row in self:
+            rows.append(row)
+            if len(rows) >= n:
+                break
+        return rows
+
+    def fetchall(self):
+        return list(self)
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Соединение, все курсоры которого (в т.ч. неявные из execute) инструментированы."""
+    perf: PerfRecorder | None = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute в C создаёт курсор в обход cursor(), поэтому переопределяем явно
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
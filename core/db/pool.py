@@ -0,0 +1,161 @@
+from __future__ import annotations
+import os
+import queue
+import sqlite3
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+# -------------------------------------------------------------------
+# Пул соединений SQLite
+# -------------------------------------------------------------------
+@dataclass
+class PoolConfig:
+    """
+    Параметры пула и PRAGMA, применяемые к каждому новому соединению,
+    плюс профиль конкурентного доступа (busy_timeout, повторы при SQLITE_BUSY,
+    отдельные read-only соединения для отчётных запросов).
+    """
+    size: int = 4                      # максимум одновременно открытых соединений
+    timeout: float = 30.0              # ожидание свободного соединения, сек
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -16000           # отрицательное значение — в КиБ (≈16 МиБ)
+    mmap_size: int = 64 * 1024 * 1024  # 0 — отключить mmap
+    busy_timeout_ms: int = 5000        # сколько SQLite сам ждёт снятия блокировки
+    busy_retries: int = 3              # повторы оператора DAO после SQLITE_BUSY
+    busy_backoff: float = 0.05         # пауза перед 1-м повтором, сек; далее удваивается
+    read_size: int = 0                 # >0 — отдельный пул read-only соединений для чтения
+    cached_statements: int = 256       # кэш подготовленных операторов на соединение (по умолчанию в sqlite3 — 128)
+
+    @classmethod
+    def concurrent(cls, writers: int = 2, readers: int = 4) -> "PoolConfig":
+        """Профиль для многопользовательской работы: WAL, короткая очередь писателей, читатели отдельно."""
+        return cls(size=writers, read_size=readers, busy_timeout_ms=10000, busy_retries=5)
+
+
+class PoolTimeoutError(Exception):
+    """Не дождались свободного соединения в пуле."""
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул долгоживущих соединений.
+    Соединения создаются лениво (не больше size), PRAGMA выполняются один раз при открытии.
+    Повторный acquire() из того же потока возвращает уже выданное соединение,
+    поэтому вложенные вызовы DAO работают в одной транзакции и не блокируют пул.
+    """
+
+    def __init__(self, db_path: str, config: PoolConfig | None = None, row_factory=None,
+                 readonly: bool = False, factory=sqlite3.Connection, on_open=None) -> None:
+        self.db_path = db_path
+        self.config = config or PoolConfig()
+        self.readonly = readonly
+        self._size = self.config.read_size if readonly else self.config.size
+        if self._size <= 0:
+            raise ValueError("pool size must be > 0")
+        self._row_factory = row_factory
+        self._factory = factory
+        self._on_open = on_open
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._all: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        cfg = self.config
+        if self.readonly:
+            # режим журнала хранится в файле БД и задаётся пишущим пулом
+            uri = "file:" + urllib.parse.quote(os.path.abspath(self.db_path)) + "?mode=ro"
+            con = sqlite3.connect(uri, uri=True, timeout=cfg.timeout, check_same_thread=False,
+                                  factory=self._factory, cached_statements=cfg.cached_statements)
+            con.execute("PRAGMA query_only = ON;")
+        else:
+            con = sqlite3.connect(self.db_path, timeout=cfg.timeout, check_same_thread=False,
+                                  factory=self._factory, cached_statements=cfg.cached_statements)
+        con.row_factory = self._row_factory
+        con.execute(f"PRAGMA busy_timeout = {int(cfg.busy_timeout_ms)};")
+        con.execute("PRAGMA foreign_keys = ON;")
+        if cfg.journal_mode and not self.readonly:
+            con.execute(f"PRAGMA journal_mode = {cfg.journal_mode};")
+        if cfg.synchronous:
+            con.execute(f"PRAGMA synchronous = {cfg.synchronous};")
+        con.execute(f"PRAGMA cache_size = {int(cfg.cache_size)};")
+        con.execute(f"PRAGMA mmap_size = {int(cfg.mmap_size)};")
+        if self._on_open is not None:
+            self._on_open(con)
+        return con
+
+    def _take(self) -> sqlite3.Connection:
+        if self._closed:
+            raise PoolTimeoutError("pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self._size:
+                con = self._open()
+                self._all.append(con)
+                return con
+        try:
+            return self._idle.get(timeout=self.config.timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"no free connection in pool (size={self._size}) after {self.config.timeout}s"
+            )
+
+    def held(self) -> sqlite3.Connection | None:
+        """Соединение, уже выданное текущему потоку (внутри acquire), иначе None."""
+        return getattr(self._local, "con", None)
+
+    @contextmanager
+    def acquire(self):
+        """
+        Выдаёт соединение на время блока with.
+        Внешний уровень фиксирует транзакцию (или откатывает при исключении)
+        и возвращает соединение в пул; вложенные уровни просто переиспользуют его.
+        """
+        held = getattr(self._local, "con", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        con = self._take()
+        self._local.con = con
+        self._local.depth = 1
+        try:
+            yield con
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            self._local.con = None
+            self._local.depth = 0
+            if self._closed:
+                con.close()
+            else:
+                self._idle.put(con)
+
+    def close(self) -> None:
+        """Закрывает все простаивающие соединения; занятые закроются при возврате."""
+        self._closed = True
+        while True:
+            try:
+                con = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            con.close()
+        with self._lock:
+            self._all.clear()
+
+    @property
+    def opened(self) -> int:
+        return len(self._all)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+import dataclasses
+import sqlite3
+from functools import lru_cache
+from operator import itemgetter
+
+# -------------------------------------------------------------------
+# Режимы представления строк результата
+# -------------------------------------------------------------------
+# dict  — словарь на строку (поведение по умолчанию, совместимо со старым кодом);
+# row   — sqlite3.Row: доступ по имени и индексу без копирования в dict;
+# typed — dataclass из core.models (slots=True), если у метода есть своя модель.
+ROW_MODES = ("dict", "row", "typed")
+
+
+@lru_cache(maxsize=256)
+def _model_builder(model: type, columns: tuple[str, ...]):
+    """
+    Строит функцию «кортеж строки → экземпляр model» для данного набора колонок.
+    Лишние колонки (created_at и т.п.) отбрасываются; поля модели, которых нет
+    в выборке, получают значения по умолчанию из dataclass.
+    Кэшируется по (model, имена колонок), т.е. один раз на описание курсора.
+    """
+    pos = {name: i for i, name in enumerate(columns)}
+    fields = [f.name for f in dataclasses.fields(model)]
+    present = [f for f in fields if f in pos]
+    if not present:
+        raise TypeError(f"no columns of {model.__name__} in result set")
+    idx = [pos[f] for f in present]
+    get = itemgetter(*idx) if len(idx) > 1 else (lambda row, i=idx[0]: (row[i],))
+
+    if present == fields:
+        return lambda row: model(*get(row))
+
+    names = tuple(present)
+    return lambda row: model(**dict(zip(names, get(row))))
+
+
+def typed_rows(cur: sqlite3.Cursor, model: type):
+    """Итератор dataclass-объектов по курсору, выполненному с row_factory=None."""
+    columns = tuple(d[0] for d in cur.description)
+    return map(_model_builder(model, columns), cur)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+import datetime as dt
+import sqlite3
+import statistics
+from collections import deque
+from dataclasses import dataclass, fields
+
+# -------------------------------------------------------------------
+# Проверка суточных показаний за день/период (draft → validated)
+# -------------------------------------------------------------------
+RULES = ("pr_hours_limit", "vr_hours_limit", "counter_decrease", "vr_mode", "pr_outlier", "vr_outlier")
+
+# ключ settings → поле ValidationConfig
+_SETTINGS = {
+    "validation.pr.max_hours_per_day": "pr_max_hours",
+    "validation.vr.max_hours_per_day": "vr_max_hours",
+    "validation.outlier.window_days": "window_days",
+    "validation.outlier.factor": "outlier_factor",
+    "validation.outlier.min_points": "min_points",
+}
+
+
+@dataclass
+class ValidationConfig:
+    pr_max_hours: float = 24.0     # часы работы + простоя PR за сутки
+    vr_max_hours: float = 24.0     # то же для VR
+    window_days: int = 14          # окно скользящей медианы (и глубина истории для счётчика)
+    outlier_factor: float = 3.0
+    min_points: int = 5
+
+    @classmethod
+    def from_settings(cls, con: sqlite3.Connection, **overrides) -> "ValidationConfig":
+        """Значения из settings, поверх — явные аргументы (None — не переопределять)."""
+        cfg = cls()
+        types = {f.name: f.type for f in fields(cls)}
+        cur = con.cursor()
+        cur.row_factory = None
+        cur.execute(f"SELECT key, value FROM settings WHERE key IN ({','.join('?' * len(_SETTINGS))})",
+                    tuple(_SETTINGS))
+        for key, value in cur.fetchall():
+            name = _SETTINGS[key]
+            try:
+                setattr(cfg, name, int(float(value)) if types[name] == "int" else float(value))
+            except ValueError:
+                raise ValueError(f"setting {key} must be a number, got {value!r}") from None
+        for name, value in overrides.items():
+            if value is not None:
+                setattr(cfg, name, value)
+        return cfg
+
+
+def lookback(date_from: str, window_days: int) -> str:
+    """Начало истории, нужной для проверок дня date_from."""
+    return (dt.date.fromisoformat(date_from[:10]) - dt.timedelta(days=int(window_days))).isoformat()
+
+
+# Правила, которые считаются одним SQL-проходом по периоду (с историей от :lo для LAG).
+# Колонки: reading_id, rule, date, well_id, detail, value, limit_value.
+CHECK_SQL = """
+WITH r AS (
+    SELECT id, date, well_id,
+           COALESCE(pr_counter_prev_eff, 0) AS prev_eff, COALESCE(pr_counter_curr, 0) AS curr,
+           LAG(pr_counter_curr) OVER (PARTITION BY well_id ORDER BY date) AS prev_curr,
+           LAG(date) OVER (PARTITION BY well_id ORDER BY date) AS prev_date,
+           COALESCE(pr_hours, 0) + COALESCE(pr_downtime_h, 0) AS pr_total_h,
+           COALESCE(vr_hours, 0) + COALESCE(vr_downtime_h, 0) AS vr_total_h,
+           COALESCE(vr_volume_m3, 0) AS vr_m3
+    FROM daily_readings
+    WHERE date BETWEEN :lo AND :d2
+),
+cur AS (SELECT * FROM r WHERE date >= :d1)
+SELECT id, 'pr_hours_limit', date, well_id, 'pr_hours + pr_downtime_h exceed the daily limit', pr_total_h, :pr_max
+FROM cur WHERE pr_total_h > :pr_max
+UNION ALL
+SELECT id, 'vr_hours_limit', date, well_id, 'vr_hours + vr_downtime_h exceed the daily limit', vr_total_h, :vr_max
+FROM cur WHERE vr_total_h > :vr_max
+UNION ALL
+SELECT id, 'counter_decrease', date, well_id,
+       CASE WHEN curr < prev_eff THEN 'counter is below its effective previous value'
+            ELSE 'counter is below the previous reading' END,
+       curr, CASE WHEN curr < prev_eff THEN prev_eff ELSE prev_curr END
+FROM cur WHERE curr > 0 AND (curr < prev_eff OR curr < prev_curr)
+AND NOT EXISTS (  -- замена/переполнение счётчика между показаниями (pr_counter_events)
+    SELECT 1 FROM pr_counter_events e
+    WHERE e.well_id = cur.well_id AND e.date <= cur.date AND e.date > COALESCE(cur.prev_date, ''))
+UNION ALL
+SELECT cur.id, 'vr_mode', cur.date, cur.well_id, 'VR volume while the well mode is ' || m.mode, cur.vr_m3, NULL
+FROM cur JOIN v_well_mode_on_date m ON m.well_id = cur.well_id AND m.date = cur.date
+WHERE cur.vr_m3 > 0 AND m.mode <> 'VR'
+"""
+
+# История ставок для скользящей медианы: одна выборка, упорядоченная по скважине и дате.
+# В день переполнения счётчика к добыче прибавляется остаток старого круга (carry_m3, 019).
+HISTORY_SQL = """
+SELECT dr.id, dr.date, dr.well_id,
+       CASE WHEN dr.pr_hours > 0
+            THEN (MAX(0, COALESCE(dr.pr_counter_curr, 0) - COALESCE(dr.pr_counter_prev_eff, 0))
+                  + COALESCE(e.carry_m3, 0)) / dr.pr_hours
+       END AS pr_rate,
+       CASE WHEN dr.vr_hours > 0 THEN COALESCE(dr.vr_volume_m3, 0) / dr.vr_hours END AS vr_rate
+FROM daily_readings dr
+LEFT JOIN pr_counter_events e ON e.well_id = dr.well_id AND e.date = dr.date AND e.kind = 'rollover'
+WHERE dr.date BETWEEN :lo AND :d2
+ORDER BY dr.well_id, dr.date
+"""
+
+
+def outlier_issues(rows, date_from: str, cfg: ValidationConfig) -> list[tuple]:
+    """
+    Выбросы ставок (м³/ч работы) относительно медианы предыдущих window_days дней
+    той же скважины. rows — результат HISTORY_SQL как кортежи; один проход,
+    окно по каждой скважине — deque. Сутки без часов работы не проверяются
+    и в окно не попадают.
+    """
+    out = []
+    well = None
+    windows: dict[str, deque] = {}
+    for reading_id, date, well_id, pr_rate, vr_rate in rows:
+        if well_id != well:
+            well = well_id
+            windows = {"pr": deque(), "vr": deque()}
+        cutoff = lookback(date, cfg.window_days)
+        for kind, rate in (("pr", pr_rate), ("vr", vr_rate)):
+            win = windows[kind]
+            while win and win[0][0] < cutoff:
+                win.popleft()
+            if rate is None:
+                continue
+            if date >= date_from and len(win) >= cfg.min_points:
+                med = statistics.median(v for _, v in win)
+                if med > 0 and (rate > cfg.outlier_factor * med or rate < med / cfg.outlier_factor):
+                    out.append((reading_id, f"{kind}_outlier", date, well_id,
+                                f"{kind} rate deviates from the {cfg.window_days}-day median", rate, med))
+            win.append((date, rate))
+    return out
@@ -2,7 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from .common import DateStr
 
-@dataclass
+@dataclass(slots=True)
 class BlockAcidity:
     date: DateStr
     block_id: int
@@ -12,7 +12,7 @@ class BlockAcidity:
     lab_name: str | None = None
     note: str | None = None
 
-@dataclass
+@dataclass(slots=True)
 class MetalAnalysis:
     date: DateStr
     block_id: int
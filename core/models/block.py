@@ -2,7 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from .common import DateStr
 
-@dataclass
+@dataclass(slots=True)
 class Block:
     id: int | None
     block_no: str
@@ -15,7 +15,7 @@ class Block:
     regime: str | None = None
     shape_wkt: str | None = None
 
-@dataclass
+@dataclass(slots=True)
 class BlockModeInterval:
     block_id: int
     mode: str
@@ -2,7 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from .common import DateStr
 
-@dataclass
+@dataclass(slots=True)
 class DailyReading:
     date: DateStr
     block_id: int
@@ -17,8 +17,9 @@ class DailyReading:
     rvr_type_id: int | None = None
     comment: str | None = None
     status: str = "draft"  # 'draft'|'validated'|'reconciled'|'approved'
+    id: int | None = None
 
-@dataclass
+@dataclass(slots=True)
 class Downtime:
     date: DateStr
     block_id: int
@@ -2,7 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from .common import DateStr
 
-@dataclass
+@dataclass(slots=True)
 class AcidTank:
     id: int | None
     name: str
@@ -11,13 +11,13 @@ class AcidTank:
     height_cm: int | None = None
     is_active: int = 1
 
-@dataclass
+@dataclass(slots=True)
 class TankCalibration:
     tank_id: int
     cm: int
     tons: float
 
-@dataclass
+@dataclass(slots=True)
 class AcidLevel:
     date: DateStr
     tank_id: int
@@ -30,8 +30,9 @@ class AcidLevel:
     transfers_out_t: float = 0.0
     adjustments_t: float = 0.0
     note: str | None = None
+    id: int | None = None
 
-@dataclass
+@dataclass(slots=True)
 class AcidDistribution:
     date: DateStr
     block_id: int
@@ -2,7 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from .common import DateStr
 
-@dataclass
+@dataclass(slots=True)
 class Well:
     id: int | None
     block_id: int
@@ -19,7 +19,7 @@ class Well:
     coord_sys: str | None = "local"
     status: str | None = "active"
 
-@dataclass
+@dataclass(slots=True)
 class WellModeInterval:
     well_id: int
     mode: str        # 'PR' | 'VR' | 'OBS' | 'OTHER'
@@ -0,0 +1,10 @@
+from __future__ import annotations
+import pytest
+from core.db.migrate import migrate
+
+@pytest.fixture
+def tmp_db_path(tmp_path) -> str:
+    """Пустая БД со всеми миграциями из app/sql — чтобы не зависеть от data/uchet.db."""
+    path = str(tmp_path / "uchet_test.db")
+    migrate(path, verbose=False)
+    return path
@@ -0,0 +1,53 @@
+from __future__ import annotations
+import pytest
+from core.db.dao import Database, ValidationError
+
+def _seed(db: Database) -> tuple[list[int], list[str]]:
+    blocks = [db.create_block(f"B{i}") for i in range(3)]
+    wells = [db.create_well(b, "W1", "VR") for b in blocks]
+    tank = db.insert_tank("T1")
+    days = [f"2025-07-{d:02d}" for d in range(1, 8)]
+    for i, day in enumerate(days):
+        for j, (b, w) in enumerate(zip(blocks, wells)):
+            if day == "2025-07-04":
+                continue                                # день без VR → очистка
+            db.insert_daily_reading({"date": day, "block_id": b, "well_id": w,
+                                     "vr_volume_m3": float((i + 1) * (j + 1))})
+        if day != "2025-07-06":                         # день без уровней → очистка
+            db.insert_acid_level({"date": day, "tank_id": tank,
+                                  "level_begin_t": 100.0, "level_end_t": 100.0 - (i + 1)})
+    return blocks, days
+
+def test_range_matches_single_day(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        blocks, days = _seed(db)
+        # заведомо лишняя запись, которую должна убрать очистка
+        with db._conn() as con:
+            con.execute("INSERT INTO acid_distribution(date, block_id, acid_tons) VALUES('2025-07-04', ?, 1)",
+                        (blocks[0],))
+
+        report = db.compute_acid_distribution_range(days[0], days[-1])
+        with db._conn() as con:
+            got = {(r["date"], r["block_id"]): r["acid_tons"]
+                   for r in con.execute("SELECT * FROM acid_distribution")}
+
+        expected = {}
+        for day in days:
+            for r in db.compute_and_store_acid_distribution_vr_share(day):
+                expected[(day, r["block_id"])] = r["acid_tons"]
+        assert got.keys() == expected.keys()
+        for k, v in expected.items():
+            assert got[k] == pytest.approx(v)
+
+        by_day = {r["date"]: r for r in report}
+        assert [r["date"] for r in report] == days
+        assert by_day["2025-07-04"]["blocks"] == 0 and by_day["2025-07-06"]["blocks"] == 0
+        assert by_day["2025-07-02"]["consumption_t"] == pytest.approx(2.0)
+        assert by_day["2025-07-02"]["distributed_t"] == pytest.approx(2.0)
+        assert by_day["2025-07-02"]["vr_m3"] == pytest.approx(12.0)
+        assert by_day["2025-07-02"]["blocks"] == 3
+
+def test_range_rejects_inverted_dates(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        with pytest.raises(ValidationError):
+            db.compute_acid_distribution_range("2025-07-02", "2025-07-01")
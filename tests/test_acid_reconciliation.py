@@ -0,0 +1,68 @@
+from __future__ import annotations
+import logging
+import pytest
+from core.db.dao import Database, ValidationError
+
+def _seed(db: Database) -> tuple[int, int, int, int]:
+    b1, b2 = db.create_block("B1"), db.create_block("B2")
+    w1, w2 = db.create_well(b1, "W1", "VR"), db.create_well(b2, "W2", "VR")
+    t1, t2 = db.insert_tank("T1"), db.insert_tank("T2")
+    for day in ("2025-01-30", "2025-01-31", "2025-02-01"):
+        db.insert_daily_reading({"date": day, "block_id": b1, "well_id": w1, "vr_volume_m3": 300, "vr_hours": 24})
+        db.insert_daily_reading({"date": day, "block_id": b2, "well_id": w2, "vr_volume_m3": 100, "vr_hours": 24})
+        db.insert_acid_level({"date": day, "tank_id": t1, "level_begin_t": 50, "level_end_t": 44})   # 6 т
+        db.insert_acid_level({"date": day, "tank_id": t2, "level_begin_t": 20, "level_end_t": 18})   # 2 т
+    db.compute_acid_distribution_range("2025-01-30", "2025-02-01")
+    return b1, b2, t1, t2
+
+def test_reconcile_acid_flags_and_cumulative(tmp_db_path, caplog):
+    with Database(tmp_db_path) as db:
+        b1, b2, t1, t2 = _seed(db)
+        rep = db.reconcile_acid("2025-01-30", "2025-02-01")
+        assert rep["days"] == 3 and rep["delta_t"] == pytest.approx(0.0)
+        assert rep["over_tolerance"] == [] and rep["drift"] == []
+        assert rep["tolerance"] == {"tolerance_t": 0.5, "tolerance_pct": 2.0, "drift_t": 5.0}
+
+        # ручная правка распределения: блок B1 недополучил 3 т 31-го числа
+        with db._conn() as con:
+            con.execute("UPDATE acid_distribution SET acid_tons = acid_tons - 3 WHERE date='2025-01-31' AND block_id=?",
+                        (b1,))
+            con.execute("UPDATE acid_distribution SET acid_tons = acid_tons - 3 WHERE date='2025-02-01' AND block_id=?",
+                        (b1,))
+        with caplog.at_level(logging.WARNING, logger="core.db.recon"):
+            rep = db.reconcile_acid("2025-01-31", "2025-02-01")
+        assert rep["over_tolerance"] == ["2025-01-31", "2025-02-01"] and rep["drift"] == ["2025-02-01"]
+        assert rep["cum_delta_t"] == pytest.approx(6.0)
+        assert "over tolerance" in caplog.text
+
+        days = db.acid_reconciliation("2025-01-01", "2025-12-31")
+        assert [d["cum_delta_t"] for d in days] == pytest.approx([0.0, 3.0, 6.0])
+        assert days[1]["warehouse_consumption_t"] == pytest.approx(8.0) and days[1]["distributed_t"] == pytest.approx(5.0)
+
+        tanks = db.acid_reconciliation_tanks("2025-02-01", "2025-02-01")
+        assert [(t["tank_id"], t["imbalance_t"], t["cum_imbalance_t"]) for t in tanks] == \
+            [(t1, pytest.approx(2.25), pytest.approx(4.5)), (t2, pytest.approx(0.75), pytest.approx(1.5))]
+        blocks = db.acid_reconciliation_blocks("2025-01-30", "2025-02-01", block_id=b1)
+        assert [b["expected_t"] for b in blocks] == pytest.approx([6.0, 6.0, 6.0])
+        assert [b["cum_imbalance_t"] for b in blocks] == pytest.approx([0.0, 3.0, 6.0])
+
+        months = db.acid_reconciliation("2025-01-15", "2025-02-15", grain="month")
+        assert [(m["period"], m["days"], m["over_tolerance_days"]) for m in months] == [("2025-01", 2, 1), ("2025-02", 1, 1)]
+        assert months[0]["cum_delta_t"] == pytest.approx(3.0)
+        year = db.acid_reconciliation("2025-01-01", "2025-12-31", grain="year", flagged_only=True)
+        assert len(year) == 1 and year[0]["delta_t"] == pytest.approx(6.0) and year[0]["drift_days"] == 1
+        assert [d["date"] for d in db.acid_reconciliation("2025-01-01", "2025-12-31", flagged_only=True)] == \
+            ["2025-01-31", "2025-02-01"]
+
+        # пересчёт начала диапазона сдвигает нарастающий итог у более поздних дней
+        with db._conn() as con:
+            con.execute("UPDATE acid_distribution SET acid_tons = acid_tons - 1 WHERE date='2025-01-30' AND block_id=?",
+                        (b2,))
+        rep = db.reconcile_acid("2025-01-30", "2025-01-30", tolerance_t=2)
+        assert rep["over_tolerance"] == [] and rep["cum_delta_t"] == pytest.approx(1.0)
+        assert db.acid_reconciliation("2025-02-01", "2025-02-01")[0]["cum_delta_t"] == pytest.approx(7.0)
+
+        with pytest.raises(ValidationError):
+            db.reconcile_acid("2025-02-01", "2025-01-01")
+        with pytest.raises(ValidationError):
+            db.acid_reconciliation("2025-01-01", "2025-12-31", grain="week")
@@ -0,0 +1,27 @@
+from __future__ import annotations
+from core.db.dao import Database
+
+# Индексы из 011_asof_indexes.sql должны давать SEARCH, а не SCAN. Проверяем планы
+# тех операторов, которые DAO действительно выполняет (снятых инструментированием),
+# а не их копий: правка SQL в DAO без индекса под неё сломает этот тест.
+ASOF_TABLES = {"block_acidity_analyses", "metal_analyses"}
+
+def _asof_statements(db: Database) -> list[str]:
+    db.stats(reset=True)
+    db.block_acidity_asof("2025-01-01", 1, "acid_ph")
+    db.block_metal_asof("2025-01-01", 1)     # пусто: выполняются оба запроса (блочный и по скважинам)
+    db.well_metal_asof("2025-01-01", 1)
+    db.metal_asof_many([1], ["2025-01-01"])
+    db.acidity_asof_many([1], ["2025-01-01"])
+    return [sql for sql in db.stats() if "substr(date,1,10) <=" in sql]
+
+def test_asof_lookups_use_index_seek(tmp_db_path):
+    with Database(tmp_db_path, instrument=True) as db:
+        statements = _asof_statements(db)
+        assert len(statements) == 6, statements
+        with db._conn() as con:
+            for sql in statements:
+                params = (None,) * sql.count("?")
+                plan = " | ".join(r["detail"] for r in con.execute("EXPLAIN QUERY PLAN " + sql, params))
+                assert any(f"SEARCH {t} USING INDEX" in plan for t in ASOF_TABLES), (sql, plan)
+                assert "TEMP B-TREE" not in plan, (sql, plan)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+import random
+from core.db.dao import Database
+
+def test_asof_many_matches_single_lookups(tmp_db_path):
+    rnd = random.Random(1)
+    with Database(tmp_db_path) as db:
+        blocks = [db.create_block(f"B{i}") for i in range(6)]
+        wells = {b: [db.create_well(b, f"W{j}", "PR") for j in range(3)] for b in blocks}
+        for b in blocks[:-1]:  # последний блок — совсем без анализов
+            for _ in range(25):
+                day = f"2025-0{rnd.randint(1, 6)}-{rnd.randint(1, 28):02d}"
+                w = None if b == blocks[0] or rnd.random() < 0.3 else rnd.choice(wells[b])
+                if b == blocks[1]:
+                    w = rnd.choice(wells[b])  # только скважинные пробы → срабатывает fallback
+                db.insert_metal_analysis(day, b, round(rnd.random() * 2, 3), w)
+                db.insert_block_acidity(day, b, "acid_ph", round(rnd.random() * 5, 3))
+
+        dates = [f"2025-0{m}-{d:02d}" for m in range(1, 8) for d in (1, 10, 20)]
+        metal = db.metal_asof_many(blocks, dates)
+        acid = db.acidity_asof_many(blocks, dates, "acid_ph")
+        assert len(metal) == len(acid) == len(blocks) * len(dates)
+        for b in blocks:
+            for d in dates:
+                assert metal[(b, d)] == db.block_metal_asof(d, b), (b, d)
+                assert acid[(b, d)] == db.block_acidity_asof(d, b, "acid_ph"), (b, d)
+        assert all(metal[(blocks[-1], d)] is None for d in dates)
+
+def test_asof_many_empty_grid(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        assert db.metal_asof_many([], ["2025-01-01"]) == {}
+        assert db.acidity_asof_many([1], []) == {}
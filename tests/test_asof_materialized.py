@@ -0,0 +1,58 @@
+from __future__ import annotations
+import random
+from core.db.dao import Database
+from core.db.migrate import legacy_view_sql
+
+VIEWS = {
+    "v_block_acidity_asof": ("date", "block_id", "metric_name"),
+    "v_block_metal_asof": ("date", "block_id"),
+    "v_well_metal_asof": ("date", "well_id"),
+    "v_well_mode_on_date": ("date", "well_id"),
+    "v_block_mode_on_date": ("date", "block_id"),
+}
+
+def _assert_views_match(db: Database) -> None:
+    legacy = legacy_view_sql(VIEWS)
+    assert set(legacy) == set(VIEWS)
+    with db._conn() as con:
+        for name, key in VIEWS.items():
+            order = ", ".join(key)
+            new = list(con.execute(f"SELECT * FROM {name} ORDER BY {order}"))
+            old = list(con.execute(f"SELECT * FROM ({legacy[name]}) ORDER BY {order}"))
+            assert new == old, name
+
+def test_materialized_asof_views_follow_changes(tmp_db_path):
+    rnd = random.Random(5)
+    with Database(tmp_db_path) as db:
+        blocks = [db.create_block(f"B{i}") for i in range(3)]
+        wells = [db.create_well(b, f"W{j}", rnd.choice(["PR", "VR"])) for b in blocks for j in range(2)]
+        _assert_views_match(db)
+
+        def day() -> str:
+            return f"2025-0{rnd.randint(1, 4)}-{rnd.randint(1, 28):02d}"
+
+        db.insert_daily_readings_bulk(
+            ({"date": day(), "block_id": blocks[0], "well_id": rnd.choice(wells)} for _ in range(30)),
+            upsert=True,
+        )
+        for _ in range(20):
+            b = rnd.choice(blocks)
+            db.insert_metal_analysis(day(), b, rnd.random(), rnd.choice([None, wells[blocks.index(b) * 2]]))
+            db.insert_block_acidity(day(), b, rnd.choice(["acid_ph", "acid_gpl"]), rnd.random())
+        db.add_well_mode_interval(wells[0], "VR", "2025-02-01", "2025-03-01")
+        db.add_well_mode_interval(wells[0], "OBS", "2025-03-15")
+        db.add_block_mode_interval(blocks[1], "RUN", "2025-01-10")
+        db.insert_acid_level({"date": "2025-05-05", "tank_id": db.insert_tank("T1"),
+                              "level_begin_t": 1.0, "level_end_t": 0.5})
+        _assert_views_match(db)
+
+        # новая сущность, правки и удаления
+        b_new = db.create_block("B_NEW")
+        db.create_well(b_new, "W_NEW", "VR")
+        with db._conn() as con:
+            con.execute("UPDATE metal_analyses SET date='2025-01-02' WHERE id=(SELECT MIN(id) FROM metal_analyses)")
+            con.execute("DELETE FROM block_acidity_analyses WHERE metric_name='acid_gpl'")
+            con.execute("DELETE FROM daily_readings WHERE id % 3 = 0")
+            con.execute("UPDATE well_mode_history SET date_to='2025-02-10' WHERE mode='VR'")
+            con.execute("DELETE FROM block_mode_history")
+        _assert_views_match(db)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import asyncio, threading, time
+import pytest
+from core.db.async_dao import AsyncDatabase
+from core.db.dao import UniqueConstraintError
+
+def test_async_facade_reads_writes_and_coalescing(tmp_db_path):
+    async def scenario():
+        async with AsyncDatabase(tmp_db_path, max_workers=4) as adb:
+            b = await adb.create_block("B_ASYNC")
+            wells = await asyncio.gather(*(adb.create_well(b, f"W{i}", "VR") for i in range(10)))
+            assert len(set(wells)) == 10
+
+            # одинаковые одновременные чтения выполняются один раз
+            calls = []
+            orig = adb.db.list_wells_by_block
+
+            def slow(block_id):
+                calls.append(threading.get_ident())
+                time.sleep(0.05)
+                return orig(block_id)
+            adb.db.list_wells_by_block = slow
+            results = await asyncio.gather(*(adb.list_wells_by_block(b) for _ in range(20)))
+            assert len(calls) == 1 and adb.coalesced == 19
+            assert all(len(r) == 10 for r in results)
+
+            with pytest.raises(UniqueConstraintError):
+                await adb.create_block("B_ASYNC")
+
+            rows = [r async for r in adb.iter_wells_by_block(b, batch_size=3, chunk=4)]
+            assert [r["id"] for r in rows] == sorted(wells)
+
+    asyncio.run(scenario())
+
+def test_transaction_survives_cancellation(tmp_db_path):
+    async def scenario():
+        async with AsyncDatabase(tmp_db_path, max_workers=2) as adb:
+            started = threading.Event()
+
+            def body(db):
+                db.create_block("B_TX1")
+                started.set()
+                time.sleep(0.1)
+                db.create_block("B_TX2")
+
+            task = asyncio.create_task(adb.run_in_transaction(body))
+            while not started.is_set():
+                await asyncio.sleep(0.005)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.2)
+            # начатая транзакция доведена до конца целиком
+            assert await adb.get_block_by_no("B_TX2") is not None
+
+            def failing(db):
+                db.create_block("B_TX3")
+                raise RuntimeError("boom")
+            with pytest.raises(RuntimeError):
+                await adb.run_in_transaction(failing)
+            assert await adb.get_block_by_no("B_TX3") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import asyncio, json, sqlite3, time
+import pytest
+from core.db.async_dao import AsyncDatabase
+from core.db.audit import AuditConfig, AuditWriter
+from core.db.dao import Database, UniqueConstraintError
+
+def _audit_rows(path: str) -> list[tuple]:
+    con = sqlite3.connect(path)
+    try:
+        return con.execute("SELECT user_id, action, entity, entity_id, payload FROM audit_log ORDER BY id").fetchall()
+    finally:
+        con.close()
+
+def test_mutations_are_audited(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        with db.audit_user(7):
+            b = db.create_block("B1", shape_wkt="")
+            w = db.create_well(b, "PR1", "PR")
+        db.insert_daily_readings_bulk(
+            ({"date": f"2025-01-{d:02d}", "block_id": b, "well_id": w, "pr_counter_curr": d} for d in range(1, 31)))
+        db.list_blocks()  # чтения не аудируются
+        with pytest.raises(UniqueConstraintError):
+            db.create_block("B1")
+        assert db.flush_audit(5)
+        rows = _audit_rows(tmp_db_path)
+        assert [(r[0], r[1], r[2], r[3]) for r in rows] == [
+            (7, "create_block", "blocks", b), (7, "create_well", "wells", w),
+            (None, "insert_daily_readings_bulk", "daily_readings", None)]
+        payload = json.loads(rows[0][4])
+        assert payload == {"args": {"block_no": "B1", "kw": {"shape_wkt": ""}}, "result": b}
+        bulk = json.loads(rows[2][4])
+        assert bulk["args"]["rows"] == "<generator>" and bulk["result"]["ok"] == 30
+        assert db.audit_stats()["written"] == 3
+
+    with Database(tmp_db_path, audit=False) as db:
+        db.create_block("B2")
+        assert db.audit_stats() == {}
+    assert len(_audit_rows(tmp_db_path)) == 3
+
+def test_batches_flush_on_close_and_rollback(tmp_db_path):
+    db = Database(tmp_db_path, audit=AuditConfig(batch_size=3, flush_interval_s=60))
+    for i in range(7):
+        db.create_block(f"B{i}")
+    db.close()
+    assert len(_audit_rows(tmp_db_path)) == 7
+    assert db.audit_stats()["batches"] == 3   # 3 + 3 + 1 (при закрытии)
+
+    async def scenario():
+        async with AsyncDatabase(tmp_db_path) as adb:
+            def body(db):
+                db.create_block("B-rolled-back")
+                raise RuntimeError("boom")
+            with pytest.raises(RuntimeError):
+                await adb.run_in_transaction(body)
+            with adb.audit_user(42):
+                await adb.run_in_transaction(lambda db: db.create_block("B-committed"))
+    asyncio.run(scenario())
+    rows = _audit_rows(tmp_db_path)
+    assert len(rows) == 8 and rows[-1][0] == 42 and json.loads(rows[-1][4])["args"]["block_no"] == "B-committed"
+
+def test_backpressure_drops_after_timeout(tmp_db_path):
+    Database(tmp_db_path, audit=False).close()
+    writer = AuditWriter(tmp_db_path, AuditConfig(max_queue=1, put_timeout_s=0.05, flush_interval_s=0))
+    lock = sqlite3.connect(tmp_db_path)
+    lock.execute("BEGIN IMMEDIATE")   # писатель аудита ждёт блокировку
+    try:
+        assert writer.record("a", "blocks")
+        while writer.stats()["pending"]:
+            time.sleep(0.01)
+        assert writer.record("b", "blocks")       # заняла единственное место в очереди
+        assert not writer.record("c", "blocks")   # очередь не освободилась за put_timeout_s
+        t0 = time.monotonic()
+        assert not writer.flush(0.1)              # полная очередь не держит flush дольше timeout
+        assert time.monotonic() - t0 < 1.0
+    finally:
+        lock.rollback()
+        lock.close()
+    writer.close()
+    assert writer.stats() == {"queued": 2, "written": 2, "dropped": 1, "failed": 0, "batches": 2, "pending": 0}
+    assert not writer.record("d", "blocks")
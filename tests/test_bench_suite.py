@@ -0,0 +1,44 @@
+from __future__ import annotations
+import json, sqlite3
+from benchmarks.polygon_gen import SCALES, generate
+from benchmarks.run_suite import main
+
+def _dump(path: str) -> list:
+    con = sqlite3.connect(path)
+    try:
+        # колонки с DEFAULT (datetime('now')) (users.created_at из 001 и т.п.) хранят время
+        # генерации — заменяем их в незафиксированной транзакции, БД на диске не меняется
+        tables = [r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                            "AND name NOT LIKE 'sqlite_%'")]
+        for t in tables:
+            for col in con.execute(f'PRAGMA table_info("{t}")').fetchall():
+                if col[4] and "datetime('now')" in col[4].replace('"', "'").lower():
+                    con.execute(f'UPDATE "{t}" SET "{col[1]}" = ?', ("<now>",))
+        # журнал миграций хранит время применения — его не сравниваем
+        return [line for line in con.iterdump() if "schema_migrations" not in line]
+    finally:
+        con.rollback()
+        con.close()
+
+def test_generator_is_deterministic(tmp_path):
+    a, b = str(tmp_path / "a.db"), str(tmp_path / "b.db")
+    counts = generate(a, SCALES["tiny"])
+    assert generate(b, SCALES["tiny"]) == counts
+    assert counts["daily_readings"] == 3 * 4 * 30 and counts["acid_levels"] == 30
+    assert _dump(a) == _dump(b)
+
+def test_suite_report_and_compare(tmp_path):
+    out = tmp_path / "report.json"
+    assert main(["--scales", "tiny", "--rounds", "2", "--only", "list_", "--out", str(out)]) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    names = {b["name"] for b in report["benchmarks"]}
+    assert "list_blocks[tiny]" in names and all("list_" in n for n in names)
+    stats = report["benchmarks"][0]["stats"]
+    assert stats["rounds"] == 2 and stats["min"] <= stats["median"] <= stats["max"]
+    assert report["machine_info"]["sqlite_version"] == sqlite3.sqlite_version
+
+    # прошлый прогон «в 1000 раз быстрее» — каждый бенчмарк считается регрессией
+    for b in report["benchmarks"]:
+        b["stats"]["mean"] /= 1000
+    out.write_text(json.dumps(report), encoding="utf-8")
+    assert main(["--scales", "tiny", "--rounds", "1", "--only", "list_blocks", "--compare", str(out)]) == 1
@@ -0,0 +1,56 @@
+from __future__ import annotations
+from core.db.dao import Database
+
+def test_bulk_insert_upsert_and_report(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B1")
+        wells = [db.create_well(b, f"W{i}", "VR") for i in range(5)]
+
+        def gen():
+            for day in range(1, 11):
+                for w in wells:
+                    yield {"date": f"2025-07-{day:02d}", "block_id": b, "well_id": w, "vr_volume_m3": 1.0}
+            yield {"date": "2025-07-11", "block_id": b, "well_id": 999999}          # FK
+            yield {"date": "2025-07-11", "block_id": b, "well_id": wells[0], "vr_hours": 30}  # CHECK
+            yield {"block_id": b, "well_id": wells[0]}                              # нет даты
+
+        rep = db.insert_daily_readings_bulk(gen(), batch_size=7)
+        assert rep["total"] == 53
+        assert rep["ok"] == 50
+        assert rep["failed"] == 3
+        by_idx = {e["index"]: e["error"] for e in rep["errors"]}
+        assert sorted(by_idx) == [50, 51, 52]
+        assert by_idx[50].startswith("ForeignKeyError")
+        assert "required" in by_idx[52]
+
+        # повтор без upsert — все строки упираются в UNIQUE(date, well_id)
+        rows = [{"date": "2025-07-01", "block_id": b, "well_id": w, "vr_volume_m3": 5.0} for w in wells]
+        rep = db.insert_daily_readings_bulk(rows)
+        assert rep["ok"] == 0 and rep["failed"] == 5
+
+        rep = db.insert_daily_readings_bulk(rows, upsert=True)
+        assert rep["ok"] == 5 and rep["failed"] == 0
+        s = db.daily_block_summary("2025-07-01", b)
+        assert s["vr_m3"] == 25.0
+        assert db.daily_block_summary("2025-07-02", b)["vr_m3"] == 5.0
+
+def test_bulk_insert_nested_rolls_back_with_caller(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B1")
+        w = db.create_well(b, "W1", "VR")
+        rows = [{"date": f"2025-07-{d:02d}", "block_id": b, "well_id": w, "vr_volume_m3": 1.0}
+                for d in range(1, 6)]
+        try:
+            with db._conn():
+                db.create_block("OUTER")
+                db.insert_daily_readings_bulk(rows, batch_size=2, derive_prev=True)
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert [x["block_no"] for x in db.list_blocks()] == ["B1"]
+        assert db.list_daily_readings("2025-07-01", "2025-07-31") == []
+
+        # без внешней транзакции пачки фиксируются как раньше
+        rep = db.insert_daily_readings_bulk(rows, batch_size=2)
+        assert rep["ok"] == 5
+        assert len(db.list_daily_readings("2025-07-01", "2025-07-31")) == 5
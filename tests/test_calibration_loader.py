@@ -0,0 +1,45 @@
+from __future__ import annotations
+import os, subprocess, sys
+import pytest
+from core.db.dao import Database, ValidationError
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def _table(db: Database, tank_id: int) -> list[tuple[int, float]]:
+    with db._conn() as con:
+        return [(r["cm"], r["tons"]) for r in
+                con.execute("SELECT cm, tons FROM tank_calibration WHERE tank_id=? ORDER BY cm", (tank_id,))]
+
+def test_load_tank_calibration_replaces_atomically(tmp_db_path, tmp_path):
+    with Database(tmp_db_path) as db:
+        tank = db.insert_tank("T_LOAD")
+        rep = db.load_tank_calibration(tank, [(cm, cm * 0.1) for cm in range(300, -1, -1)])
+        assert rep["points"] == 301 and rep["replaced"] == 0 and rep["elapsed_ms"] >= 0
+        assert db.levels_cm_to_tons(tank, [150]) == [pytest.approx(15.0)]
+
+        csv_path = tmp_path / "t.csv"
+        csv_path.write_text("cm;tons\n0;0\n10;1,5\n20;3,25\n", encoding="utf-8")
+        rep = db.load_tank_calibration(tank, str(csv_path))
+        assert rep["points"] == 3 and rep["replaced"] == 301
+        # кэш интерполяции сброшен вместе с заменой таблицы
+        assert db.levels_cm_to_tons(tank, [150, 15]) == [None, pytest.approx(2.375)]
+
+        for bad in ([(0, 0.0), (10, 2.0), (20, 1.0)], [(0, 0.0), (0, 1.0)], [(1.5, 1.0)], []):
+            with pytest.raises(ValidationError):
+                db.load_tank_calibration(tank, bad)
+        with pytest.raises(ValidationError):
+            db.load_tank_calibration(999_999, [(0, 0.0)])
+        assert _table(db, tank) == [(0, 0.0), (10, 1.5), (20, 3.25)]
+
+def test_load_calibration_cli(tmp_db_path, tmp_path):
+    with Database(tmp_db_path) as db:
+        tank = db.insert_tank("T_CLI")
+    csv_path = tmp_path / "cli.csv"
+    csv_path.write_text("0,0\n100,12.5\n200,25\n", encoding="utf-8")
+    script = os.path.join(ROOT, "core", "db", "load_calibration.py")
+    res = subprocess.run([sys.executable, script, str(csv_path), "--tank", "T_CLI", "--db", tmp_db_path],
+                         capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    assert "3 points loaded" in res.stdout
+    with Database(tmp_db_path) as db:
+        assert _table(db, tank) == [(0, 0.0), (100, 12.5), (200, 25.0)]
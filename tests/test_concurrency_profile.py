@@ -0,0 +1,38 @@
+from __future__ import annotations
+import sqlite3, threading
+import pytest
+from core.db.dao import BusyError, Database
+from core.db.pool import PoolConfig
+
+def test_reads_use_readonly_pool_but_see_own_transaction(tmp_db_path):
+    with Database(tmp_db_path, pool_config=PoolConfig.concurrent(writers=1, readers=2)) as db:
+        b = db.create_block("B_RO")
+        assert db.get_block_by_no("B_RO")["id"] == b
+        assert db._read_pool.opened == 1
+        with db._conn(readonly=True) as con:
+            assert con.execute("PRAGMA query_only").fetchone()["query_only"] == 1
+            assert con.execute("PRAGMA journal_mode").fetchone()["journal_mode"] == "wal"
+
+        with db._conn():
+            db.create_block("B_RO_TX")
+            # внутри пишущей транзакции чтение идёт через неё же
+            assert db.get_block_by_no("B_RO_TX") is not None
+        assert db.get_block_by_no("B_RO_TX") is not None
+
+def test_busy_statement_is_retried_with_backoff(tmp_db_path):
+    cfg = PoolConfig(busy_timeout_ms=0, busy_retries=2, busy_backoff=0.01)
+    blocker = sqlite3.connect(tmp_db_path, isolation_level=None, check_same_thread=False)
+    try:
+        with Database(tmp_db_path, pool_config=cfg) as db:
+            db.list_blocks()  # WAL включается первым соединением пула
+            blocker.execute("BEGIN IMMEDIATE")
+            with pytest.raises(BusyError):
+                db.create_block("B_BUSY")
+
+            cfg.busy_retries = 8
+            db2 = Database(tmp_db_path, pool_config=cfg)
+            threading.Timer(0.05, blocker.execute, ("COMMIT",)).start()
+            assert db2.create_block("B_BUSY") > 0
+            db2.close()
+    finally:
+        blocker.close()
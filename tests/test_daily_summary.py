@@ -0,0 +1,48 @@
+from __future__ import annotations
+import os, subprocess, sys
+from core.db.dao import Database
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def test_summary_table_follows_readings(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b1 = db.create_block("B1")
+        b2 = db.create_block("B2")
+        w1 = db.create_well(b1, "W1", "PR")
+        w2 = db.create_well(b1, "W2", "VR")
+        db.insert_daily_reading({"date": "2025-07-15", "block_id": b1, "well_id": w1,
+                                 "pr_counter_prev_eff": 120.0, "pr_counter_curr": 150.0, "pr_hours": 10.0})
+        db.insert_daily_reading({"date": "2025-07-15", "block_id": b1, "well_id": w2,
+                                 "vr_volume_m3": 30.0, "vr_hours": 5.0})
+        s = db.daily_block_summary("2025-07-15", b1)
+        assert s["wells_count"] == 2
+        assert s["pr_m3"] == 30.0 and s["pr_rate_m3ph"] == 3.0
+        assert s["vr_m3"] == 30.0 and s["injectivity_m3ph"] == 6.0
+
+        with db._conn() as con:
+            con.execute("UPDATE daily_readings SET vr_volume_m3 = 40 WHERE well_id = ?", (w2,))
+            con.execute("UPDATE daily_readings SET block_id = ? WHERE well_id = ?", (b2, w1))
+        assert db.daily_block_summary("2025-07-15", b1)["vr_m3"] == 40.0
+        assert db.daily_block_summary("2025-07-15", b1)["pr_m3"] == 0.0
+        assert db.daily_block_summary("2025-07-15", b2)["pr_m3"] == 30.0
+
+        with db._conn() as con:
+            con.execute("DELETE FROM daily_readings WHERE well_id = ?", (w2,))
+        assert db.daily_block_summary("2025-07-15", b1) is None
+        assert db.check_daily_block_summary() == []
+
+def test_consistency_check_detects_and_rebuilds(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B1")
+        w = db.create_well(b, "W1", "VR")
+        db.insert_daily_reading({"date": "2025-07-01", "block_id": b, "well_id": w, "vr_volume_m3": 5.0})
+        with db._conn() as con:
+            con.execute("UPDATE mv_daily_block_summary SET vr_m3 = 99")
+
+    cmd = [sys.executable, os.path.join(ROOT, "core", "db", "consistency.py"), "--db", tmp_db_path]
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    assert res.returncode == 1 and "1 mismatches" in res.stdout, res.stdout + res.stderr
+    res = subprocess.run(cmd + ["--rebuild"], capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    assert res.returncode == 0 and "0 mismatches" in res.stdout
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import pytest
+from core.db.cache import CacheConfig, LRUCache
+from core.db.dao import Database
+
+def test_lru_ttl_and_eviction():
+    now = [0.0]
+    c = LRUCache(maxsize=2, ttl=10.0, clock=lambda: now[0])
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1
+    c.put("c", 3)                  # вытесняет самый давний — "b"
+    assert c.get("b", None) is None and c.get("c") == 3
+    now[0] = 11.0
+    assert c.get("a", None) is None
+    assert c.stats() == {"size": 1, "hits": 2, "misses": 2, "evictions": 1}
+
+def test_reference_lookups_cached_and_invalidated(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B_CACHE")
+        assert db.get_block_by_no("B_CACHE")["id"] == b
+        db.get_block_by_no("B_CACHE")["block_no"] = "mutated"   # копия, кэш не портится
+        assert db.get_block_by_no("B_CACHE")["block_no"] == "B_CACHE"
+        assert db.cache_stats()["blocks"]["hits"] == 2
+
+        assert db.list_wells_by_block(b) == []
+        w = db.create_well(b, "W1", "VR")
+        assert [x["id"] for x in db.list_wells_by_block(b)] == [w]
+
+        assert db.get_tank_id("T_CACHE") is None
+        tank = db.insert_tank("T_CACHE")
+        assert db.get_tank_id("T_CACHE") == tank
+        assert db.insert_tank("T_CACHE", capacity_t=10.0) == tank
+
+        db.add_well_mode_interval(w, "VR", "2024-01-01")
+        assert db.mode_of_well_on(w, "2024-02-01") == "VR"
+        db.add_well_mode_interval(w, "PR", "2024-03-01")
+        assert db.mode_of_well_on(w, "2024-03-02") == "PR"
+
+        # изменение в обход DAO видно только после сброса
+        with db._conn() as con:
+            con.execute("UPDATE blocks SET flank='N' WHERE id=?", (b,))
+        assert db.get_block_by_no("B_CACHE")["flank"] == ""
+        db.invalidate_cache("blocks")
+        assert db.get_block_by_no("B_CACHE")["flank"] == "N"
+
+def test_invalidation_deferred_until_outer_commit(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B_OUTER")
+        with pytest.raises(RuntimeError):
+            with db._conn():
+                db.create_well(b, "W_ROLLBACK", "VR")
+                # внутри транзакции кэш не используется — видим свою запись
+                assert len(db.list_wells_by_block(b)) == 1
+                raise RuntimeError("boom")
+        assert db.list_wells_by_block(b) == []
+
+def test_cache_switch(tmp_db_path):
+    with Database(tmp_db_path, cache=False) as db:
+        db.create_block("B_NOCACHE")
+        db.get_block_by_no("B_NOCACHE")
+        db.get_block_by_no("B_NOCACHE")
+        assert db.cache_stats()["blocks"]["hits"] == 0
+    with Database(tmp_db_path, cache=CacheConfig(limits={"blocks": (0, 60.0)})) as db:
+        db.get_block_by_no("B_NOCACHE")
+        assert db.cache_stats()["blocks"]["size"] == 0
+
+def test_load_racing_invalidation_not_cached(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B_RACE")
+
+        def load():
+            # пока читаем, другой поток фиксирует правку и сбрасывает сущность
+            row = {"id": b, "flank": ""}
+            db._invalidate("blocks", "B_RACE")
+            return row
+
+        assert db._cached("blocks", "B_RACE", load)["flank"] == ""
+        assert db.cache_stats()["blocks"]["size"] == 0
+        db._cached("blocks", "B_RACE", lambda: {"id": b, "flank": "N"})
+        assert db.cache_stats()["blocks"]["size"] == 1
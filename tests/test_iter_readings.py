@@ -0,0 +1,36 @@
+from __future__ import annotations
+import pytest
+from core.db.dao import Database, ValidationError
+from core.models.readings import DailyReading
+
+def test_iter_daily_readings_pages_match_list(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b1 = db.create_block("B_IT1")
+        b2 = db.create_block("B_IT2")
+        wells = [db.create_well(b, f"W{b}-{i}", "VR") for b in (b1, b2) for i in range(3)]
+        rows = [
+            {"date": f"2024-01-{d:02d}", "block_id": b1 if i < 3 else b2, "well_id": w, "vr_volume_m3": d + i}
+            for d in range(1, 11) for i, w in enumerate(wells)
+        ]
+        assert db.insert_daily_readings_bulk(rows)["ok"] == 60
+
+        def key(r):
+            return (r["date"], r["well_id"])
+
+        for block_id in (None, b2):
+            expected = sorted(db.list_daily_readings("2024-01-03", "2024-01-07", block_id), key=key)
+            for batch in (1, 4, 1000):
+                got = list(db.iter_daily_readings("2024-01-03", "2024-01-07", block_id, batch_size=batch))
+                ids = [r["id"] for r in got]
+                assert ids == sorted(ids)
+                assert sorted(got, key=key) == expected
+
+        assert list(db.iter_daily_readings("2030-01-01", "2030-12-31")) == []
+        assert [w["id"] for w in db.iter_wells_by_block(b1, batch_size=2)] == wells[:3]
+        assert [b["id"] for b in db.iter_blocks(batch_size=1)] == [x["id"] for x in db.list_blocks()]
+        with pytest.raises(ValidationError):
+            db.iter_blocks(batch_size=0)
+
+    with Database(tmp_db_path, row_mode="typed") as db:
+        got = list(db.iter_daily_readings("2024-01-01", "2024-01-31", batch_size=7))
+        assert len(got) == 60 and all(isinstance(r, DailyReading) for r in got)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+import sqlite3
+import pytest
+from core.db.migrate import migrate
+
+def test_ledger_skips_applied_and_rolls_back_failures(tmp_path):
+    sql_dir = tmp_path / "sql"
+    sql_dir.mkdir()
+    (sql_dir / "001_a.sql").write_text("CREATE TABLE IF NOT EXISTS a(x INTEGER);", encoding="utf-8")
+    (sql_dir / "002_b.sql").write_text("CREATE TABLE IF NOT EXISTS b(x INTEGER);", encoding="utf-8")
+    db = str(tmp_path / "m.db")
+
+    assert [(n, s) for n, s, _ in migrate(db, str(sql_dir), verbose=False)] == \
+        [("001_a.sql", "pending"), ("002_b.sql", "pending")]
+    assert all(ms is None for *_, ms in migrate(db, str(sql_dir), verbose=False))
+
+    (sql_dir / "002_b.sql").write_text("CREATE TABLE IF NOT EXISTS b(x INTEGER, y TEXT);", encoding="utf-8")
+    assert migrate(db, str(sql_dir), dry_run=True, verbose=False)[1][:2] == ("002_b.sql", "changed")
+    assert migrate(db, str(sql_dir), verbose=False)[1][1] == "changed"
+
+    # падение посреди скрипта откатывает всю миграцию вместе с записью в журнал
+    (sql_dir / "003_bad.sql").write_text("CREATE TABLE c(x INTEGER);\nINSERT INTO nope VALUES(1);",
+                                         encoding="utf-8")
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(db, str(sql_dir), verbose=False)
+    con = sqlite3.connect(db)
+    try:
+        names = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert "c" not in names
+        assert [r[0] for r in con.execute("SELECT filename FROM schema_migrations ORDER BY 1")] == \
+            ["001_a.sql", "002_b.sql"]
+    finally:
+        con.close()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+from core.db.dao import Database
+
+def test_mode_index_matches_history_and_invalidates(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B1")
+        w1 = db.create_well(b, "W1", "PR")
+        w2 = db.create_well(b, "W2", "VR")
+        w3 = db.create_well(b, "W3", "VR")
+
+        db.add_well_mode_interval(w1, "PR", "2025-01-01")
+        db.add_well_mode_interval(w1, "VR", "2025-03-01", "2025-03-31 23:59:59")
+        db.add_well_mode_interval(w2, "VR", "2025-02-01T08:00:00", "2025-02-28")
+        assert db.mode_of_well_on(w1, "2024-12-31") is None
+        assert db.mode_of_well_on(w1, "2025-02-15") == "PR"
+        assert db.mode_of_well_on(w1, "2025-03-31") == "VR"
+        assert db.mode_of_well_on(w1, "2025-04-01") == "PR"   # закрытый VR кончился — снова открытый PR
+        assert db.mode_of_well_on(w2, "2025-02-01") == "VR"   # время в date_from не мешает
+        assert db.mode_of_well_on(w2, "2025-03-01") is None
+
+        assert db.modes_of_wells_on("2025-02-10") == {w1: "PR", w2: "VR"}
+        assert db.modes_of_wells_on("2025-03-10", [w1, w2, w3]) == {w1: "VR", w2: None, w3: None}
+
+        # запись через DAO сбрасывает индекс
+        db.add_well_mode_interval(w3, "OBS", "2025-03-05")
+        assert db.modes_of_wells_on("2025-03-10", [w3]) == {w3: "OBS"}
+
+        # правка в обход DAO видна только после явного сброса
+        with db._conn() as con:
+            con.execute("DELETE FROM well_mode_history WHERE well_id = ?", (w3,))
+        assert db.mode_of_well_on(w3, "2025-03-10") == "OBS"
+        db.invalidate_mode_index()
+        assert db.mode_of_well_on(w3, "2025-03-10") is None
+
+        db.add_block_mode_interval(b, "RUN", "2025-01-01")
+        db.add_block_mode_interval(b, "STOP", "2025-02-01", "2025-02-10")
+        assert db.mode_of_block_on(b, "2025-02-05") == "STOP"
+        assert db.mode_of_block_on(b, "2025-02-11") == "RUN"
+
+def test_mode_index_not_left_stale_by_concurrent_reader(tmp_db_path):
+    import threading
+    from core.db.intervals import ModeIntervalIndex
+
+    # загрузка, во время которой индекс сбросили, не сохраняется
+    with Database(tmp_db_path) as db, db._conn() as con:
+        idx = ModeIntervalIndex("well_mode_history", "well_id")
+        load = idx._load
+        idx._load = lambda c: (idx.invalidate(), load(c))[1]
+        idx.ensure(con)
+        assert idx.snapshot() is None
+
+    for cache in (True, False):
+        with Database(tmp_db_path, cache=cache) as db:
+            b = db.create_block(f"B-{cache}")
+            w = db.create_well(b, "W1", "VR")
+            assert db.mode_of_well_on(w, "2025-03-10") is None
+            with db._conn():
+                db.add_well_mode_interval(w, "PR", "2025-01-01")
+                # другой поток перечитывает историю до фиксации и видит её старой
+                t = threading.Thread(target=db.mode_of_well_on, args=(w, "2025-03-10"))
+                t.start()
+                t.join()
+            assert db.mode_of_well_on(w, "2025-03-10") == "PR"
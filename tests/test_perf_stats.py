@@ -0,0 +1,45 @@
+from __future__ import annotations
+import logging
+from core.db.dao import Database
+from core.db.perf import PerfConfig, sql_template
+
+def test_sql_template_normalizes_whitespace_and_in_lists():
+    assert sql_template("SELECT *\n  FROM t WHERE id IN (?, ?,?)") == "SELECT * FROM t WHERE id IN (?,…)"
+
+def test_stats_slow_log_and_perf_log(tmp_db_path, caplog):
+    with Database(tmp_db_path) as plain:
+        assert plain.stats() == {}
+
+    with Database(tmp_db_path, instrument=PerfConfig(slow_ms=0.0), cache=False) as db:
+        b = db.create_block("B_PERF")
+        for i in range(3):
+            db.create_well(b, f"W{i}", "VR")
+        with caplog.at_level(logging.WARNING, logger="core.db.perf"):
+            assert len(db.list_wells_by_block(b)) == 3
+            assert db.get_block_by_no("B_PERF")["id"] == b
+        assert "slow query" in caplog.text and "plan:" in caplog.text
+
+        stats = db.stats()
+        wells = stats["SELECT * FROM wells WHERE block_id=? ORDER BY id"]
+        assert wells["count"] == 1 and wells["rows"] == 3
+        inserts = [v for k, v in stats.items() if k.startswith("INSERT INTO wells")]
+        assert inserts[0]["count"] == 3 and inserts[0]["rows"] == 3
+        assert all(v["avg_ms"] <= v["max_ms"] and v["p95_ms"] <= v["max_ms"] for v in stats.values())
+
+        written = db.dump_perf_log()
+        assert written == len(stats)
+        with db._conn() as con:
+            n = con.execute("SELECT COUNT(*) AS n FROM perf_log").fetchone()["n"]
+        assert n == written
+        # после сброса в журнал счётчики обнулены: остались только запросы к самому perf_log
+        assert db.stats() and all("perf_log" in k for k in db.stats())
+
+def test_slow_executemany_explains_with_first_row(tmp_db_path, caplog):
+    with Database(tmp_db_path, instrument=PerfConfig(slow_ms=0.0)) as db:
+        b = db.create_block("B_MANY")
+        rows = ({"date": f"2025-01-0{d}", "block_id": b, "well_id": db.create_well(b, f"W{d}", "VR")}
+                for d in range(1, 4))
+        with caplog.at_level(logging.WARNING, logger="core.db.perf"):
+            assert db.insert_daily_readings_bulk(rows)["ok"] == 3
+        slow = [r.getMessage() for r in caplog.records if "INSERT INTO daily_readings" in r.getMessage()]
+        assert slow and "plan:" in slow[0] and "unavailable" not in slow[0]
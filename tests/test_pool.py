@@ -0,0 +1,67 @@
+from __future__ import annotations
+import threading
+import pytest
+from core.db.dao import Database, DaoError
+from core.db.pool import PoolConfig
+
+def test_pool_reuses_connections_and_pragmas(tmp_db_path):
+    with Database(tmp_db_path, pool_config=PoolConfig(size=2)) as db:
+        b = db.create_block("B1")
+        db.create_well(b, "W1", "PR")
+        assert len(db.list_wells_by_block(b)) == 1
+        assert db._pool.opened == 1
+
+        with db._conn() as con:
+            assert con.execute("PRAGMA journal_mode").fetchone()["journal_mode"] == "wal"
+            assert con.execute("PRAGMA foreign_keys").fetchone()["foreign_keys"] == 1
+            # вложенный вызов DAO в том же потоке берёт то же соединение
+            assert db.get_block_by_no("B1")["id"] == b
+        assert db._pool.opened == 1
+
+def test_pool_rollback_on_error(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        with pytest.raises(RuntimeError):
+            with db._conn():
+                db.create_block("B_ROLLBACK")
+                raise RuntimeError("boom")
+        assert db.get_block_by_no("B_ROLLBACK") is None
+
+def test_pool_threads_bounded(tmp_db_path):
+    db = Database(tmp_db_path, pool_config=PoolConfig(size=2))
+    b = db.create_block("B_THREADS")
+    errors: list[Exception] = []
+
+    def worker(n: int) -> None:
+        try:
+            for i in range(20):
+                db.create_well(b, f"W{n}-{i}", "VR")
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert db._pool.opened <= 2
+    assert len(db.list_wells_by_block(b)) == 80
+    db.close()
+
+def test_oneshot_mode(tmp_db_path):
+    db = Database(tmp_db_path, pooled=False)
+    b = db.create_block("B_ONESHOT")
+    assert db.get_block_by_no("B_ONESHOT")["id"] == b
+    with pytest.raises(DaoError):
+        db.create_block("B_ONESHOT")
+
+@pytest.mark.parametrize("kw", [{"pool_config": PoolConfig(cached_statements=0)}, {"pooled": False}])
+def test_statement_cache_settings(tmp_db_path, kw):
+    with Database(tmp_db_path, **kw) as db:
+        b = db.create_block("B1")
+        w = db.create_well(b, "W1", "VR")
+        db.insert_daily_reading({"date": "2025-01-01", "block_id": b, "well_id": w, "vr_volume_m3": 5})
+        rep = db.insert_daily_readings_bulk(
+            [{"date": "2025-01-01", "block_id": b, "well_id": w, "vr_volume_m3": 7}], upsert=True)
+        assert rep["ok"] == 1
+        assert [r["vr_volume_m3"] for r in db.list_daily_readings("2025-01-01", "2025-01-01", b)] == [7]
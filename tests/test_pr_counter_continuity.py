@@ -0,0 +1,79 @@
+from __future__ import annotations
+import pytest
+from core.db.dao import Database, ValidationError
+
+def _setup(db: Database) -> tuple[int, int]:
+    b = db.create_block("B1")
+    return b, db.create_well(b, "PR1", "PR")
+
+def _prev(db: Database, date_from: str = "2025-01-01", date_to: str = "2025-12-31") -> dict[str, float]:
+    return {r["date"]: r["pr_counter_prev_eff"] for r in db.list_daily_readings(date_from, date_to)}
+
+def test_insert_derives_prev_from_latest_nonzero_reading(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b, w = _setup(db)
+        db.insert_daily_reading({"date": "2025-01-01", "block_id": b, "well_id": w,
+                                 "pr_counter_prev_eff": 900, "pr_counter_curr": 1000}, derive_prev=True)
+        # сутки в VR: счётчик PR не снимался
+        db.insert_daily_reading({"date": "2025-01-02", "block_id": b, "well_id": w, "vr_volume_m3": 50},
+                                derive_prev=True)
+        db.insert_daily_reading({"date": "2025-01-03", "block_id": b, "well_id": w,
+                                 "pr_counter_prev_eff": 0, "pr_counter_curr": 1200}, derive_prev=True)
+        assert _prev(db) == {"2025-01-01": 900, "2025-01-02": 0, "2025-01-03": 1000}
+        # вставка задним числом пересчитывает следующее показание
+        db.insert_daily_reading({"date": "2025-01-02", "block_id": b, "well_id": db.create_well(b, "PR2", "PR"),
+                                 "pr_counter_curr": 5}, derive_prev=True)
+        db.insert_daily_reading({"date": "2024-12-31", "block_id": b, "well_id": w,
+                                 "pr_counter_curr": 880}, derive_prev=True)
+        assert _prev(db, "2025-01-01", "2025-01-01") == {"2025-01-01": 880}
+
+def test_bulk_backfill_and_repair(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b, w = _setup(db)
+        rows = [{"date": f"2025-02-{d:02d}", "block_id": b, "well_id": w, "pr_counter_curr": 100.0 * d}
+                for d in (1, 2, 3, 5, 6)]
+        assert db.insert_daily_readings_bulk(rows, batch_size=2, derive_prev=True)["ok"] == 5
+        assert _prev(db) == {"2025-02-01": 0, "2025-02-02": 100, "2025-02-03": 200,
+                             "2025-02-05": 300, "2025-02-06": 500}
+        db.insert_daily_readings_bulk([{"date": "2025-02-04", "block_id": b, "well_id": w,
+                                        "pr_counter_curr": 400}], derive_prev=True)
+        assert _prev(db)["2025-02-05"] == 400
+        # ручная порча и пересчёт одним проходом
+        con = db.connect()
+        con.execute("UPDATE daily_readings SET pr_counter_prev_eff = 0 WHERE date >= '2025-02-03'")
+        con.commit()
+        con.close()
+        assert db.repair_pr_counters("2025-02-04", "2025-02-05") == 2
+        assert _prev(db)["2025-02-03"] == 0  # вне периода
+        assert db.repair_pr_counters("2025-02-01") == 2
+        assert db.repair_pr_counters("2025-02-01", well_ids=[w]) == 0
+        assert db.daily_block_summary("2025-02-06", b)["pr_m3"] == pytest.approx(100)
+        with pytest.raises(ValidationError):
+            db.repair_pr_counters("2025-03-01", "2025-02-01")
+
+def test_counter_events(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b, w = _setup(db)
+        rows = [{"date": f"2025-03-{d:02d}", "block_id": b, "well_id": w, "pr_counter_curr": c, "pr_hours": 24}
+                for d, c in ((1, 99900), (2, 99950), (3, 30), (4, 80), (5, 20), (6, 60))]
+        db.insert_daily_readings_bulk(rows, derive_prev=True)
+        db.add_pr_counter_event(w, "2025-03-03", "rollover", capacity=100000)
+        db.add_pr_counter_event(w, "2025-03-05", "replacement", new_start=5, note="new meter")
+        assert _prev(db) == {"2025-03-01": 0, "2025-03-02": 99900, "2025-03-03": 0,
+                             "2025-03-04": 30, "2025-03-05": 5, "2025-03-06": 20}
+        events = db.list_pr_counter_events(w)
+        assert [e["kind"] for e in events] == ["rollover", "replacement"]
+        assert events[0]["carry_m3"] == pytest.approx(50)
+        # в день переполнения добыча — остаток старого круга + показание нового
+        assert db.daily_block_summary("2025-03-03", b)["pr_m3"] == pytest.approx(80)
+        assert db.daily_block_summary("2025-03-04", b)["pr_m3"] == pytest.approx(50)
+        assert db.check_daily_block_summary() == []
+        # новое показание после замены — тоже от события
+        db.insert_daily_reading({"date": "2025-03-08", "block_id": b, "well_id": w, "pr_counter_curr": 100},
+                                derive_prev=True)
+        assert _prev(db)["2025-03-08"] == 60
+        # события не считаются уменьшением счётчика
+        rep = db.validate_daily_readings("2025-03-02", "2025-03-08")
+        assert rep["by_rule"]["counter_decrease"] == 0
+        with pytest.raises(ValidationError):
+            db.add_pr_counter_event(w, "2025-03-07", "swap")
@@ -0,0 +1,69 @@
+from __future__ import annotations
+import pytest
+from core.db.dao import Database, ValidationError
+
+def _seed(db: Database) -> tuple[int, int, int]:
+    b = db.create_block("B1")
+    pr, vr = db.create_well(b, "PR1", "PR"), db.create_well(b, "VR1", "VR")
+    db.add_well_mode_interval(pr, "PR", "2025-01-01")
+    db.add_well_mode_interval(vr, "VR", "2025-01-01")
+    rows, counter = [], 1000.0
+    for d in range(1, 11):
+        day = f"2025-01-{d:02d}"
+        rows.append({"date": day, "block_id": b, "well_id": pr, "pr_counter_prev_eff": counter,
+                     "pr_counter_curr": counter + 120, "pr_hours": 24})
+        counter += 120
+        rows.append({"date": day, "block_id": b, "well_id": vr, "vr_volume_m3": 240, "vr_hours": 24})
+    assert db.insert_daily_readings_bulk(rows)["ok"] == 20
+    return b, pr, vr
+
+def test_clean_day_is_promoted(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        _seed(db)
+        rep = db.validate_daily_readings("2025-01-01", "2025-01-10")
+        assert rep == {"checked": 20, "issues": 0, "by_rule": {r: 0 for r in rep["by_rule"]},
+                       "validated": 20, "demoted": 0}
+        assert {r["status"] for r in db.list_daily_readings("2025-01-01", "2025-01-10")} == {"validated"}
+
+def test_rules_flag_rows_and_block_promotion(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b, pr, vr = _seed(db)
+        db.validate_daily_readings("2025-01-01", "2025-01-10")
+        db.add_well_mode_interval(vr, "OBS", "2025-01-12")
+        db.insert_daily_readings_bulk([
+            # счётчик ниже вчерашнего и сверхлимит часов
+            {"date": "2025-01-11", "block_id": b, "well_id": pr, "pr_counter_prev_eff": 2200,
+             "pr_counter_curr": 2150, "pr_hours": 20, "pr_downtime_h": 6},
+            # выброс закачки: 10× медианы
+            {"date": "2025-01-11", "block_id": b, "well_id": vr, "vr_volume_m3": 2400, "vr_hours": 24},
+            {"date": "2025-01-12", "block_id": b, "well_id": pr, "pr_counter_prev_eff": 2150,
+             "pr_counter_curr": 2270, "pr_hours": 24},
+            # VR при режиме OBS
+            {"date": "2025-01-12", "block_id": b, "well_id": vr, "vr_volume_m3": 240, "vr_hours": 24},
+        ])
+        rep = db.validate_daily_readings("2025-01-11", "2025-01-12")
+        assert rep["checked"] == 4 and rep["validated"] == 1
+        assert {k: v for k, v in rep["by_rule"].items() if v} == \
+            {"pr_hours_limit": 1, "counter_decrease": 1, "pr_outlier": 1, "vr_outlier": 1, "vr_mode": 1}
+        issues = db.list_reading_issues("2025-01-11", "2025-01-12")
+        assert [(i["date"], i["well_id"], i["rule"]) for i in issues] == [
+            ("2025-01-11", pr, "counter_decrease"), ("2025-01-11", pr, "pr_hours_limit"),
+            ("2025-01-11", pr, "pr_outlier"), ("2025-01-11", vr, "vr_outlier"), ("2025-01-12", vr, "vr_mode"),
+        ]
+        assert issues[0]["limit_value"] == 2200 and issues[3]["limit_value"] == pytest.approx(10.0)
+        status = {(r["date"], r["well_id"]): r["status"] for r in db.list_daily_readings("2025-01-11", "2025-01-12")}
+        assert status == {("2025-01-11", pr): "draft", ("2025-01-11", vr): "draft",
+                          ("2025-01-12", pr): "validated", ("2025-01-12", vr): "draft"}
+
+        # ужесточили лимит — уже проверенный день возвращается в draft; issues перезаписаны
+        rep = db.validate_daily_readings("2025-01-05", pr_max_hours=20)
+        assert rep["demoted"] == 1 and rep["by_rule"]["pr_hours_limit"] == 1
+        assert db.validate_daily_readings("2025-01-05")["validated"] == 1
+        assert db.list_reading_issues("2025-01-05", "2025-01-05") == []
+
+        # смена статусов не затрагивает сводку блока
+        assert db.daily_block_summary("2025-01-12", b)["vr_m3"] == 240
+        with pytest.raises(ValidationError):
+            db.validate_daily_readings("2025-01-10", "2025-01-01")
+        with pytest.raises(ValidationError):
+            db.validate_daily_readings("2025-01-01", bogus=1)
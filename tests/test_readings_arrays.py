@@ -0,0 +1,73 @@
+from __future__ import annotations
+import math
+import pytest
+from core.db.dao import Database
+
+np = pytest.importorskip("numpy")
+from core.db.arrays import summarize_readings  # noqa: E402
+
+def _seed(db: Database) -> tuple[int, int]:
+    b1, b2 = db.create_block("B1"), db.create_block("B2")
+    w1, w2 = db.create_well(b1, "W1", "PR"), db.create_well(b1, "W2", "VR")
+    w3 = db.create_well(b2, "W3", "VR")
+    rows = []
+    for day in ("2025-01-01", "2025-01-02", "2025-02-01"):
+        rows += [
+            {"date": day, "block_id": b1, "well_id": w1, "pr_counter_prev_eff": 100, "pr_counter_curr": 148,
+             "pr_hours": 24},
+            {"date": day, "block_id": b1, "well_id": w2, "vr_volume_m3": 120, "vr_hours": 20, "vr_downtime_h": 4},
+            {"date": day, "block_id": b2, "well_id": w3, "vr_volume_m3": 30, "vr_hours": 0},
+        ]
+    assert db.insert_daily_readings_bulk(rows)["ok"] == 9
+    return b1, b2
+
+def test_readings_to_arrays_matches_summary_view(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b1, b2 = _seed(db)
+        cols = db.readings_to_arrays("2025-01-01", "2025-01-31")
+        assert cols["date"].dtype == np.dtype("datetime64[D]") and cols["well_id"].dtype == np.int32
+        assert cols["vr_volume_m3"].dtype == np.float64 and len(cols["date"]) == 6
+        assert list(cols["date"].astype(str)[:3]) == ["2025-01-01"] * 3
+
+        got = summarize_readings(cols)
+        with db._conn() as con:
+            view = con.execute("SELECT * FROM v_daily_block_summary WHERE date <= '2025-01-31' "
+                               "ORDER BY date, block_id").fetchall()
+        assert len(view) == len(got["block_id"])
+        for i, row in enumerate(view):
+            assert str(got["date"][i]) == row["date"] and got["block_id"][i] == row["block_id"]
+            for col in ("wells_count", "pr_m3", "pr_hours", "pr_rate_m3ph", "vr_m3", "injectivity_m3ph",
+                        "vr_downtime_h"):
+                if row[col] is None:
+                    assert math.isnan(got[col][i])
+                else:
+                    assert got[col][i] == pytest.approx(row[col])
+
+        only_b2 = db.readings_to_arrays("2025-01-01", "2025-12-31", block_ids=[b2])
+        assert set(only_b2["block_id"]) == {b2} and len(only_b2["date"]) == 3
+        assert len(db.readings_to_arrays("2030-01-01", "2030-12-31")["date"]) == 0
+        assert len(db.readings_to_arrays("2025-01-01", "2025-12-31", block_ids=[])["well_id"]) == 0
+
+def test_summarize_arbitrary_grouping(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b1, _ = _seed(db)
+        cols = db.readings_to_arrays("2025-01-01", "2025-12-31", block_ids=[b1])
+    monthly = summarize_readings(cols, by={"month": cols["date"].astype("datetime64[M]")})
+    assert list(monthly["month"].astype(str)) == ["2025-01", "2025-02"]
+    assert list(monthly["pr_m3"]) == [96.0, 48.0] and list(monthly["wells_count"]) == [2, 2]
+    assert monthly["injectivity_m3ph"][0] == pytest.approx(6.0)
+
+    total = summarize_readings(cols, by=())
+    assert total["pr_rate_m3ph"][0] == pytest.approx(2.0) and total["vr_downtime_h"][0] == 12.0
+
+def test_rollover_carry_in_pr_m3(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B1")
+        w = db.create_well(b, "PR1", "PR")
+        rows = [{"date": f"2025-03-{d:02d}", "block_id": b, "well_id": w, "pr_counter_curr": c, "pr_hours": 20}
+                for d, c in ((1, 99900), (2, 99950), (3, 30))]
+        db.insert_daily_readings_bulk(rows, derive_prev=True)
+        db.add_pr_counter_event(w, "2025-03-03", "rollover", capacity=100000)
+        got = summarize_readings(db.readings_to_arrays("2025-03-02", "2025-03-03"))
+        assert list(got["pr_m3"]) == [50.0, 80.0]
+        assert got["pr_rate_m3ph"][1] == pytest.approx(4.0)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+import sqlite3
+import pytest
+from core.db.dao import Database, ValidationError
+from core.models.block import Block
+from core.models.readings import DailyReading
+from core.models.well import Well
+
+def _seed(db: Database) -> tuple[int, int]:
+    b = db.create_block("B_ROWS")
+    w = db.create_well(b, "W1", "VR")
+    db.insert_daily_reading({"date": "2024-01-01", "block_id": b, "well_id": w, "vr_volume_m3": 12.5})
+    db.insert_daily_reading({"date": "2024-01-02", "block_id": b, "well_id": w, "vr_volume_m3": 7.0})
+    return b, w
+
+def test_typed_mode_returns_slotted_models(tmp_db_path):
+    with Database(tmp_db_path) as plain:
+        b, w = _seed(plain)
+        as_dict = plain.list_daily_readings("2024-01-01", "2024-01-31", block_id=b)
+
+    with Database(tmp_db_path, row_mode="typed") as db:
+        block = db.get_block_by_no("B_ROWS")
+        assert isinstance(block, Block) and block.id == b
+        assert not hasattr(block, "__dict__")
+        assert db.get_block_by_no("nope") is None
+        assert [x.id for x in db.list_blocks()] == [b]
+
+        wells = db.list_wells_by_block(b)
+        assert isinstance(wells[0], Well) and wells[0].well_no == "W1" and wells[0].type == "VR"
+
+        readings = db.list_daily_readings("2024-01-01", "2024-01-31", block_id=b)
+        assert all(isinstance(r, DailyReading) for r in readings)
+        assert [r.vr_volume_m3 for r in readings] == [12.5, 7.0]
+        # те же значения, что и в словарном режиме (created_at модели не нужен)
+        assert [r.id for r in readings] == [d["id"] for d in as_dict]
+
+        # внутренняя логика DAO продолжает работать со словарями
+        assert db.daily_block_summary("2024-01-01", b)["vr_m3"] == pytest.approx(12.5)
+
+def test_row_mode_returns_sqlite_rows(tmp_db_path):
+    with Database(tmp_db_path, row_mode="row") as db:
+        b, _ = _seed(db)
+        rows = db.list_daily_readings("2024-01-01", "2024-01-01")
+        assert isinstance(rows[0], sqlite3.Row)
+        assert rows[0]["block_id"] == b and rows[0]["vr_volume_m3"] == 12.5
+
+def test_unknown_row_mode_rejected(tmp_db_path):
+    with pytest.raises(ValidationError):
+        Database(tmp_db_path, row_mode="tuple")
@@ -12,6 +12,13 @@ def test_migrate_and_schema():
     db_path = os.path.join(ROOT, "data", "uchet.db")
     assert os.path.exists(db_path), "DB not created"
 
+    # повторный запуск ничего не применяет — только сверка с schema_migrations
+    res = subprocess.run([PY, migrate], capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    assert "up to date" in res.stdout and "applied " not in res.stdout
+    res = subprocess.run([PY, migrate, "--status"], capture_output=True, text=True)
+    assert res.returncode == 0, res.stdout
+
     conn = sqlite3.connect(db_path)
     try:
         def exists(name, type_="table"):
@@ -23,14 +30,16 @@ def test_migrate_and_schema():
             "rvr_types","rvr_events","analyses","users","settings","audit_log",
             "block_acidity_analyses","metal_analyses","well_mode_history",
             "block_mode_history","acid_tanks","tank_calibration","enums_current",
-            "downtimes",
+            "downtimes","schema_migrations","perf_log",
+            "acid_recon_daily","acid_recon_tank","acid_recon_block","daily_reading_issues","pr_counter_events",
+            "wells_rtree","blocks_rtree",
         ]:
             assert exists(t, "table"), f"missing table {t}"
 
         for v in [
             "v_daily_block_summary","v_acid_reconciliation","v_acid_levels_with_calc",
             "v_block_acidity_asof","v_block_metal_asof","v_well_metal_asof",
-            "v_well_mode_on_date","v_block_mode_on_date",
+            "v_well_mode_on_date","v_block_mode_on_date","v_acid_recon_monthly","v_acid_recon_yearly",
         ]:
             assert exists(v, "view"), f"missing view {v}"
     finally:
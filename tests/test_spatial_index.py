@@ -0,0 +1,87 @@
+from __future__ import annotations
+import pytest
+from core.db.dao import Database, ValidationError
+from core.db.geometry import parse_wkt
+
+SQUARE = "POLYGON((0 0, 100 0, 100 100, 0 100, 0 0), (40 40, 60 40, 60 60, 40 60, 40 40))"
+
+def test_parse_wkt():
+    g = parse_wkt(SQUARE)
+    assert g.bbox == (0, 100, 0, 100)
+    assert g.area() == pytest.approx(100 * 100 - 20 * 20)
+    assert g.contains(10, 10) and not g.contains(50, 50) and not g.contains(150, 10)
+    m = parse_wkt("multipolygon z (((0 0 1, 1 0 1, 1 1 1, 0 0 1)), ((5 5, 6 5, 6 6, 5 6)))")
+    assert m.bbox == (0, 6, 0, 6) and m.contains(5.5, 5.5) and not m.contains(3, 3)
+    assert parse_wkt("") is None and parse_wkt("POLYGON EMPTY") is None
+    for bad in ("POINT(1 2)", "POLYGON((0 0, 1 1))", "POLYGON((0 0, 1 0, 1 1)", "POLYGON((0 0, 1 0, 1 1)) x"):
+        with pytest.raises(ValueError):
+            parse_wkt(bad)
+
+def test_block_at_and_shape_changes(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b1 = db.create_block("B1", shape_wkt=SQUARE)
+        b2 = db.create_block("B2", shape_wkt="POLYGON((100 0, 200 0, 200 100, 100 100))")
+        with pytest.raises(ValidationError):
+            db.create_block("B3", shape_wkt="POLYGON((0 0, 1 1))")
+        assert db.block_at(10, 10) == b1
+        assert db.block_at(150, 50) == b2
+        assert db.block_at(50, 50) is None      # дыра
+        assert db.block_at(-5, 50) is None
+        db.set_block_shape(b2, "POLYGON((40 40, 60 40, 60 60, 40 60))")
+        assert db.block_at(50, 50) == b2 and db.block_at(150, 50) is None
+        with pytest.raises(ValidationError):
+            db.set_block_shape(999, SQUARE)
+
+        # правка сырым SQL: триггер убирает габарит, sync_spatial_index дописывает новый
+        con = db.connect()
+        con.execute("UPDATE blocks SET shape_wkt = 'POLYGON((300 0, 400 0, 400 100, 300 100))' WHERE id = ?", (b1,))
+        con.execute("INSERT INTO blocks(block_no, shape_wkt) VALUES('B4', 'not wkt')")
+        con.commit()
+        con.close()
+        db.invalidate_cache("geometry")
+        assert db.block_at(350, 50) == b1 and db.block_at(10, 10) is None
+        assert db.sync_spatial_index() == {"indexed": 0, "invalid": [b2 + 1]}
+
+def test_block_shape_rollback_keeps_committed_outline(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B1", shape_wkt="POLYGON((0 0, 10 0, 10 10, 0 10))")
+        assert db.block_at(5, 5) == b
+        with pytest.raises(RuntimeError):
+            with db._conn():
+                db.set_block_shape(b, "POLYGON((20 0, 30 0, 30 10, 20 10))")
+                assert db.block_at(25, 5) == b and db.block_at(5, 5) is None
+                raise RuntimeError("boom")
+        assert db.block_at(5, 5) == b and db.block_at(25, 5) is None
+
+def test_wells_within_and_nearest(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        b = db.create_block("B1")
+        pr = db.create_well(b, "PR1", "PR", coord_x=0.0, coord_y=0.0)
+        vr = {i: db.create_well(b, f"VR{i}", "VR", coord_x=10.0 * i, coord_y=0.0) for i in range(1, 6)}
+        far = db.create_well(b, "VR-far", "VR", coord_x=5000.0, coord_y=5000.0)
+        other = db.create_well(b, "PR2", "PR", coord_x=5.0, coord_y=0.0)
+
+        hits = db.wells_within(0, 0, 20)
+        assert [h["id"] for h in hits] == [pr, other, vr[1], vr[2]]
+        assert hits[2]["distance_m"] == pytest.approx(10)
+        assert [h["id"] for h in db.wells_within(0, 0, 20, well_type="VR")] == [vr[1], vr[2]]
+        with pytest.raises(ValidationError):
+            db.wells_within(0, 0, -1)
+
+        assert [h["id"] for h in db.nearest_wells(pr, k=3)] == [vr[1], vr[2], vr[3]]
+        assert [h["id"] for h in db.nearest_wells(pr, k=1, well_type=None)] == [other]
+        assert [h["id"] for h in db.nearest_wells(pr, k=10)][-1] == far      # весь полигон
+        # режим на дату важнее типа
+        db.add_well_mode_interval(vr[1], "PR", "2025-01-01")
+        assert [h["id"] for h in db.nearest_wells(pr, k=2, date="2025-02-01")] == [vr[2], vr[3]]
+
+        # триггеры wells_rtree: перенос и удаление скважины
+        con = db.connect()
+        con.execute("UPDATE wells SET coord_x = 10000, coord_y = 10000 WHERE id = ?", (vr[2],))
+        con.execute("DELETE FROM wells WHERE id = ?", (vr[3],))
+        con.commit()
+        con.close()
+        assert [h["id"] for h in db.wells_within(0, 0, 50, well_type="VR")] == [vr[1], vr[4], vr[5]]
+        assert [h["id"] for h in db.nearest_wells(pr, k=5)][-1] == vr[2]    # дальше устаревшего габарита
+        with pytest.raises(ValidationError):
+            db.nearest_wells(12345)
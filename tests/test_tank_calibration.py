@@ -0,0 +1,67 @@
+from __future__ import annotations
+import pytest
+from core.db.calibration import CalibrationTable
+from core.db.dao import Database, ValidationError
+
+def test_calibration_table_interpolation():
+    t = CalibrationTable([(100, 10.0), (0, 0.0), (50, 4.0), (200, 30.0)])
+    assert t.tons_at(50) == 4.0
+    assert t.tons_at(25) == pytest.approx(2.0)
+    assert t.tons_at(150) == pytest.approx(20.0)
+    assert t.tons_at(-1) is None and t.tons_at(201) is None and t.tons_at(None) is None
+
+    # PCHIP проходит через точки и сохраняет монотонность
+    assert t.tons_at(100, "pchip") == 10.0
+    values = [t.tons_at(cm, "pchip") for cm in range(0, 201)]
+    assert all(b >= a for a, b in zip(values, values[1:]))
+    with pytest.raises(ValueError):
+        t.tons_at(10, "spline")
+
+def test_levels_cm_to_tons_and_insert_from_cm(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        tank = db.insert_tank("T_CALIB", capacity_t=50.0)
+        for cm, tons in ((0, 0.0), (100, 10.0), (200, 30.0)):
+            db.add_tank_calib(tank, cm, tons)
+
+        assert db.levels_cm_to_tons(tank, [0, 50, 150, 250]) == [0.0, 5.0, 20.0, None]
+
+        # новая точка сбрасывает кэш таблицы бака
+        db.add_tank_calib(tank, 50, 4.0)
+        assert db.levels_cm_to_tons(tank, [50, 25]) == [4.0, pytest.approx(2.0)]
+
+        level_id = db.insert_acid_level(
+            {"date": "2024-01-01", "tank_id": tank, "level_begin_cm": 150, "level_end_cm": 25}, from_cm=True
+        )
+        with db._conn() as con:
+            row = con.execute("SELECT * FROM acid_levels WHERE id=?", (level_id,)).fetchone()
+        assert row["level_begin_t"] == pytest.approx(20.0) and row["level_end_t"] == pytest.approx(2.0)
+
+        with pytest.raises(ValidationError):
+            db.insert_acid_level({"date": "2024-01-02", "tank_id": tank, "level_begin_cm": 150,
+                                  "level_end_cm": 999}, from_cm=True)
+        with pytest.raises(ValidationError):
+            db.levels_cm_to_tons(tank, [10], method="spline")
+
+def test_calibration_cache_follows_commit_and_rollback(tmp_db_path):
+    with Database(tmp_db_path) as db:
+        tank = db.insert_tank("T_TX", capacity_t=50.0)
+        db.load_tank_calibration(tank, [(0, 0.0), (100, 10.0)])
+        assert db.levels_cm_to_tons(tank, [50]) == [5.0]
+
+        with pytest.raises(RuntimeError):
+            with db._conn():
+                db.load_tank_calibration(tank, [(0, 0.0), (100, 20.0)])
+                assert db.levels_cm_to_tons(tank, [50]) == [10.0]   # своя незафиксированная таблица
+                raise RuntimeError("boom")
+        assert db.levels_cm_to_tons(tank, [50]) == [5.0]
+
+        # чтение, во время которого другой поток сменил таблицу, в кэш не попадает
+        class RacingCon:
+            def execute(self, *a):
+                old = [{"cm": 0, "tons": 0.0}, {"cm": 100, "tons": 10.0}]
+                db.load_tank_calibration(tank, [(0, 0.0), (100, 40.0)])
+                return old
+
+        db.invalidate_cache("calibration")
+        assert db._calib.get(RacingCon(), tank).tons_at(50) == 5.0
+        assert db.levels_cm_to_tons(tank, [50]) == [20.0]